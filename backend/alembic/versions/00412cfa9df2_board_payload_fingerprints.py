@@ -0,0 +1,32 @@
+"""Board payload fingerprints
+
+Revision ID: 00412cfa9df2
+Revises: e023b127a91b
+Create Date: 2026-10-17 09:01:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "00412cfa9df2"
+down_revision: str | None = "e023b127a91b"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("companies", sa.Column("payload_hash", sa.String(64)))
+    op.add_column("companies", sa.Column("ats_etag", sa.String(255)))
+    op.add_column("companies", sa.Column("ats_last_modified", sa.String(64)))
+    op.add_column("scrape_runs", sa.Column("payload_hash", sa.String(64)))
+
+
+def downgrade() -> None:
+    op.drop_column("scrape_runs", "payload_hash")
+    op.drop_column("companies", "ats_last_modified")
+    op.drop_column("companies", "ats_etag")
+    op.drop_column("companies", "payload_hash")
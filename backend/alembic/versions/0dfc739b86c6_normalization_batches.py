@@ -0,0 +1,42 @@
+"""Normalization batches
+
+Revision ID: 0dfc739b86c6
+Revises: 917485a914c3
+Create Date: 2026-10-17 09:30:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0dfc739b86c6"
+down_revision: str | None = "917485a914c3"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "normalization_batches",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("provider_batch_id", sa.String(100), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("provider_status", sa.String(20)),
+        sa.Column("requests", postgresql.JSONB(), nullable=False),
+        sa.Column("job_count", sa.Integer(), nullable=False),
+        sa.Column("succeeded", sa.Integer()),
+        sa.Column("failed", sa.Integer()),
+        sa.Column("error_message", sa.Text()),
+        sa.Column("submitted_at", sa.DateTime(), nullable=False),
+        sa.Column("completed_at", sa.DateTime()),
+    )
+    op.create_index("ix_normalization_batches_status", "normalization_batches", ["status"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_normalization_batches_status", table_name="normalization_batches")
+    op.drop_table("normalization_batches")
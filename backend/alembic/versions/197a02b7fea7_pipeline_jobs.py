@@ -0,0 +1,45 @@
+"""Pipeline jobs
+
+Revision ID: 197a02b7fea7
+Revises: eb59d6148c0e
+Create Date: 2026-10-17 09:06:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "197a02b7fea7"
+down_revision: str | None = "eb59d6148c0e"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "pipeline_jobs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("kind", sa.String(50), nullable=False),
+        sa.Column("params", postgresql.JSONB(), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("worker_id", sa.String(255)),
+        sa.Column("progress", postgresql.JSONB()),
+        sa.Column("stages", postgresql.JSONB()),
+        sa.Column("result", postgresql.JSONB()),
+        sa.Column("error_message", sa.Text()),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("started_at", sa.DateTime()),
+        sa.Column("completed_at", sa.DateTime()),
+        sa.Column("heartbeat_at", sa.DateTime()),
+    )
+    op.create_index("ix_pipeline_jobs_status", "pipeline_jobs", ["status"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_pipeline_jobs_status", table_name="pipeline_jobs")
+    op.drop_table("pipeline_jobs")
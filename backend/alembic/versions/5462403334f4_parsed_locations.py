@@ -0,0 +1,47 @@
+"""Parsed posting locations
+
+Revision ID: 5462403334f4
+Revises: fd9bde55c865
+Create Date: 2026-10-17 09:54:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5462403334f4"
+down_revision: str | None = "fd9bde55c865"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("job_postings", sa.Column("location_cities", postgresql.ARRAY(sa.String())))
+    op.add_column("job_postings", sa.Column("location_countries", postgresql.ARRAY(sa.String(2))))
+    op.add_column("job_postings", sa.Column("location_remote", sa.Boolean()))
+    op.create_index(
+        "ix_job_postings_location_cities",
+        "job_postings",
+        ["location_cities"],
+        postgresql_using="gin",
+    )
+    op.create_index(
+        "ix_job_postings_location_countries",
+        "job_postings",
+        ["location_countries"],
+        postgresql_using="gin",
+    )
+    op.create_index("ix_job_postings_location_remote", "job_postings", ["location_remote"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_job_postings_location_remote", table_name="job_postings")
+    op.drop_index("ix_job_postings_location_countries", table_name="job_postings")
+    op.drop_index("ix_job_postings_location_cities", table_name="job_postings")
+    op.drop_column("job_postings", "location_remote")
+    op.drop_column("job_postings", "location_countries")
+    op.drop_column("job_postings", "location_cities")
@@ -0,0 +1,33 @@
+"""Normalization leases
+
+Revision ID: 6adfb033061b
+Revises: 197a02b7fea7
+Create Date: 2026-10-17 09:12:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "6adfb033061b"
+down_revision: str | None = "197a02b7fea7"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("job_postings", sa.Column("normalize_lease_owner", sa.String(100)))
+    op.add_column("job_postings", sa.Column("normalize_leased_until", sa.DateTime()))
+    op.add_column(
+        "job_postings",
+        sa.Column("normalize_attempts", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("job_postings", "normalize_attempts")
+    op.drop_column("job_postings", "normalize_leased_until")
+    op.drop_column("job_postings", "normalize_lease_owner")
@@ -0,0 +1,26 @@
+"""ATS revision of postings
+
+Revision ID: 86fe3d4aec90
+Revises: b35ab287749a
+Create Date: 2026-10-17 09:03:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "86fe3d4aec90"
+down_revision: str | None = "b35ab287749a"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("job_postings", sa.Column("ats_updated_at", sa.DateTime()))
+
+
+def downgrade() -> None:
+    op.drop_column("job_postings", "ats_updated_at")
@@ -0,0 +1,36 @@
+"""Near-duplicate postings
+
+Revision ID: 917485a914c3
+Revises: a5c4b96e472c
+Create Date: 2026-10-17 09:24:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "917485a914c3"
+down_revision: str | None = "a5c4b96e472c"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("job_postings", sa.Column("duplicate_of", postgresql.UUID(as_uuid=True)))
+    op.create_foreign_key(
+        "job_postings_duplicate_of_fkey",
+        "job_postings",
+        "job_postings",
+        ["duplicate_of"],
+        ["id"],
+        ondelete="SET NULL",
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("job_postings_duplicate_of_fkey", "job_postings", type_="foreignkey")
+    op.drop_column("job_postings", "duplicate_of")
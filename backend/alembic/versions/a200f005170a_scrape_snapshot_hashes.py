@@ -0,0 +1,26 @@
+"""Scrape snapshot hashes
+
+Revision ID: a200f005170a
+Revises: 86fe3d4aec90
+Create Date: 2026-10-17 09:04:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a200f005170a"
+down_revision: str | None = "86fe3d4aec90"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("scrape_runs", sa.Column("snapshot_hash", sa.String(64)))
+
+
+def downgrade() -> None:
+    op.drop_column("scrape_runs", "snapshot_hash")
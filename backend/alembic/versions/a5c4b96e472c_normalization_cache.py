@@ -0,0 +1,35 @@
+"""Normalization cache
+
+Revision ID: a5c4b96e472c
+Revises: 6adfb033061b
+Create Date: 2026-10-17 09:18:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a5c4b96e472c"
+down_revision: str | None = "6adfb033061b"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "normalization_cache",
+        sa.Column("input_hash", sa.String(64), primary_key=True),
+        sa.Column("model", sa.String(100), nullable=False),
+        sa.Column("result", postgresql.JSONB(), nullable=False),
+        sa.Column("hit_count", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("last_hit_at", sa.DateTime()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("normalization_cache")
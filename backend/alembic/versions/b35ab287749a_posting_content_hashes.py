@@ -0,0 +1,31 @@
+"""Posting content hashes
+
+Existing postings keep a NULL content_hash until their next scrape fills it
+in, without sending them back through the normalizer.
+
+Revision ID: b35ab287749a
+Revises: 00412cfa9df2
+Create Date: 2026-10-17 09:02:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b35ab287749a"
+down_revision: str | None = "00412cfa9df2"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("job_postings", sa.Column("content_hash", sa.String(64)))
+    op.add_column("scrape_runs", sa.Column("jobs_changed", sa.Integer()))
+
+
+def downgrade() -> None:
+    op.drop_column("scrape_runs", "jobs_changed")
+    op.drop_column("job_postings", "content_hash")
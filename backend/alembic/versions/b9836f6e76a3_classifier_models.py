@@ -0,0 +1,38 @@
+"""Classifier models
+
+Revision ID: b9836f6e76a3
+Revises: 0dfc739b86c6
+Create Date: 2026-10-17 09:36:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b9836f6e76a3"
+down_revision: str | None = "0dfc739b86c6"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "classifier_models",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("training_jobs", sa.Integer(), nullable=False),
+        sa.Column("report", postgresql.JSONB(), nullable=False),
+        sa.Column("weights", sa.LargeBinary(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_classifier_models_created_at", "classifier_models", ["created_at"])
+    op.add_column("job_postings", sa.Column("normalized_by", sa.String(20)))
+
+
+def downgrade() -> None:
+    op.drop_column("job_postings", "normalized_by")
+    op.drop_index("ix_classifier_models_created_at", table_name="classifier_models")
+    op.drop_table("classifier_models")
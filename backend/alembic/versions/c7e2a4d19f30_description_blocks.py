@@ -0,0 +1,29 @@
+"""Description block keys
+
+Revision ID: c7e2a4d19f30
+Revises: 5462403334f4
+Create Date: 2026-10-17 09:58:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c7e2a4d19f30"
+down_revision: str | None = "5462403334f4"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "job_postings", sa.Column("description_blocks", postgresql.ARRAY(sa.String(16)))
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("job_postings", "description_blocks")
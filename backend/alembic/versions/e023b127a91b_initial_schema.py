@@ -0,0 +1,141 @@
+"""Initial schema
+
+The tables as scripts/init_db.py created them before migrations were kept.
+A database created that way is already at this revision: run
+`alembic stamp e023b127a91b` once, then `alembic upgrade head`.
+
+Revision ID: e023b127a91b
+Revises:
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e023b127a91b"
+down_revision: str | None = None
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "companies",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("slug", sa.String(255), nullable=False, unique=True),
+        sa.Column("website_url", sa.String(500)),
+        sa.Column("careers_url", sa.String(500)),
+        sa.Column("ats_type", sa.String(50)),
+        sa.Column("ats_identifier", sa.String(255)),
+        sa.Column("profile_markdown", sa.Text()),
+        sa.Column("tier", sa.String(20), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("last_scraped_at", sa.DateTime()),
+    )
+    op.create_table(
+        "job_postings",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "company_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("companies.id"),
+            nullable=False,
+        ),
+        sa.Column("external_id", sa.String(255), nullable=False),
+        sa.Column("title_raw", sa.String(500), nullable=False),
+        sa.Column("description_html", sa.Text()),
+        sa.Column("description_plain", sa.Text()),
+        sa.Column("department_raw", sa.String(255)),
+        sa.Column("location_raw", sa.String(255)),
+        sa.Column("job_url", sa.String(1000)),
+        sa.Column("apply_url", sa.String(1000)),
+        sa.Column("published_at", sa.DateTime()),
+        sa.Column("first_seen_at", sa.DateTime(), nullable=False),
+        sa.Column("last_seen_at", sa.DateTime(), nullable=False),
+        sa.Column("removed_at", sa.DateTime()),
+        sa.Column("normalized_title", sa.String(255)),
+        sa.Column("seniority", sa.String(50)),
+        sa.Column("function", sa.String(50)),
+        sa.Column("team_area", sa.String(100)),
+        sa.Column("is_leadership", sa.Boolean()),
+        sa.Column("experience_years_min", sa.Integer()),
+        sa.Column("remote_policy", sa.String(50)),
+        sa.Column("tech_stack", postgresql.ARRAY(sa.String())),
+        sa.Column("keywords", postgresql.ARRAY(sa.String())),
+        sa.Column("notable_signals", postgresql.ARRAY(sa.String())),
+        sa.Column("salary_min", sa.Integer()),
+        sa.Column("salary_max", sa.Integer()),
+        sa.Column("salary_currency", sa.String(10)),
+        sa.Column("normalized_at", sa.DateTime()),
+        sa.UniqueConstraint("company_id", "external_id", name="uq_company_external_id"),
+    )
+    op.create_table(
+        "scrape_runs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "company_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("companies.id"),
+            nullable=False,
+        ),
+        sa.Column("started_at", sa.DateTime(), nullable=False),
+        sa.Column("completed_at", sa.DateTime()),
+        sa.Column("status", sa.String(50)),
+        sa.Column("jobs_found", sa.Integer()),
+        sa.Column("jobs_added", sa.Integer()),
+        sa.Column("jobs_removed", sa.Integer()),
+        sa.Column("error_message", sa.Text()),
+    )
+    op.create_table(
+        "company_weekly_summaries",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "company_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("companies.id"),
+            nullable=False,
+        ),
+        sa.Column("week_start", sa.Date(), nullable=False),
+        sa.Column("jobs_added_count", sa.Integer()),
+        sa.Column("jobs_removed_count", sa.Integer()),
+        sa.Column("total_active_jobs", sa.Integer()),
+        sa.Column("jobs_added_ids", postgresql.ARRAY(postgresql.UUID(as_uuid=True))),
+        sa.Column("jobs_removed_ids", postgresql.ARRAY(postgresql.UUID(as_uuid=True))),
+        sa.Column("summary_text", sa.Text()),
+        sa.Column("hiring_velocity", sa.String(20)),
+        sa.Column("focus_areas", postgresql.ARRAY(sa.String())),
+        sa.Column("notable_changes", postgresql.ARRAY(sa.String())),
+        sa.Column("anomalies", postgresql.ARRAY(sa.String())),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint("company_id", "week_start", name="uq_company_week"),
+    )
+    op.create_table(
+        "sector_weekly_summaries",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("week_start", sa.Date(), nullable=False, unique=True),
+        sa.Column("total_companies", sa.Integer()),
+        sa.Column("total_active_jobs", sa.Integer()),
+        sa.Column("total_jobs_added", sa.Integer()),
+        sa.Column("total_jobs_removed", sa.Integer()),
+        sa.Column("summary_text", sa.Text()),
+        sa.Column("trending_roles", postgresql.ARRAY(sa.String())),
+        sa.Column("trending_skills", postgresql.ARRAY(sa.String())),
+        sa.Column("sector_signals", postgresql.ARRAY(sa.String())),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("sector_weekly_summaries")
+    op.drop_table("company_weekly_summaries")
+    op.drop_table("scrape_runs")
+    op.drop_table("job_postings")
+    op.drop_table("companies")
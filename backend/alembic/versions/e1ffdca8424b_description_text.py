@@ -0,0 +1,26 @@
+"""Preprocessed description text
+
+Revision ID: e1ffdca8424b
+Revises: b9836f6e76a3
+Create Date: 2026-10-17 09:42:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e1ffdca8424b"
+down_revision: str | None = "b9836f6e76a3"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("job_postings", sa.Column("description_text", sa.Text()))
+
+
+def downgrade() -> None:
+    op.drop_column("job_postings", "description_text")
@@ -0,0 +1,28 @@
+"""Scrape schedule
+
+Existing companies have no next_scrape_at, so they are all due at once.
+
+Revision ID: eb59d6148c0e
+Revises: a200f005170a
+Create Date: 2026-10-17 09:05:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "eb59d6148c0e"
+down_revision: str | None = "a200f005170a"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("companies", sa.Column("next_scrape_at", sa.DateTime()))
+
+
+def downgrade() -> None:
+    op.drop_column("companies", "next_scrape_at")
@@ -0,0 +1,34 @@
+"""ATS-native posting fields
+
+Revision ID: fd9bde55c865
+Revises: e1ffdca8424b
+Create Date: 2026-10-17 09:48:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "fd9bde55c865"
+down_revision: str | None = "e1ffdca8424b"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("job_postings", sa.Column("ats_remote_policy", sa.String(50)))
+    op.add_column("job_postings", sa.Column("ats_employment_type", sa.String(50)))
+    op.add_column("job_postings", sa.Column("ats_salary_min", sa.Integer()))
+    op.add_column("job_postings", sa.Column("ats_salary_max", sa.Integer()))
+    op.add_column("job_postings", sa.Column("ats_salary_currency", sa.String(10)))
+
+
+def downgrade() -> None:
+    op.drop_column("job_postings", "ats_salary_currency")
+    op.drop_column("job_postings", "ats_salary_max")
+    op.drop_column("job_postings", "ats_salary_min")
+    op.drop_column("job_postings", "ats_employment_type")
+    op.drop_column("job_postings", "ats_remote_policy")
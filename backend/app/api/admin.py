@@ -1,15 +1,26 @@
-from datetime import date, timedelta
+import uuid
+from datetime import date
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.database import get_db
 from app.dependencies import verify_admin_api_key
-from app.models import Company, JobPosting, ScrapeRun, CompanyWeeklySummary, SectorWeeklySummary
+from app.models import (
+    ClassifierModel,
+    Company,
+    CompanyWeeklySummary,
+    JobPosting,
+    PipelineJob,
+    ScrapeRun,
+    SectorWeeklySummary,
+)
+from app.services.pipeline import enqueue_job
 from app.services.scraper import run_scrape_for_company
-from app.services.normalizer import normalize_pending_jobs, normalize_job, normalize_jobs_parallel
+from app.services.scheduler import run_due_scrapes, schedule_summary
+from app.services.normalizer import normalize_jobs_parallel, normalize_pending_jobs
 from app.services.synthesizer import (
-    run_weekly_synthesis,
     synthesize_company_week,
     synthesize_sector_week,
     get_week_start,
@@ -29,34 +40,50 @@ def trigger_scrape(slug: str, db: Session = Depends(get_db)):
     return result
 
 
-@router.post("/scrape-all")
+@router.post("/scrape-all", status_code=202)
 def trigger_scrape_all(
     normalize: bool = Query(default=True, description="Auto-normalize new jobs after scraping"),
     db: Session = Depends(get_db),
 ):
-    """Trigger scrape for all active companies, then normalize new jobs."""
-    companies = db.query(Company).filter(Company.is_active == True).all()
-    scrape_results = []
-    total_added = 0
+    """Queue a scrape of all active companies, then normalization of new jobs.
+
+    Boards are fetched concurrently (capped per ATS host), so wall time tracks
+    the slowest board rather than the sum of all of them. Poll
+    GET /jobs/{job_id} for progress and results.
+    """
+    return _queued(enqueue_job(db, "scrape_all", normalize=normalize))
+
+
+@router.post("/scrape-due")
+def trigger_scrape_due(
+    limit: int | None = Query(default=None, description="Max boards to scrape this round"),
+    normalize: bool = Query(default=True, description="Auto-normalize new jobs after scraping"),
+    db: Session = Depends(get_db),
+):
+    """Scrape only the companies whose adaptive schedule says they are due.
 
-    for company in companies:
-        try:
-            result = run_scrape_for_company(db, company)
-            scrape_results.append({"company": company.slug, **result})
-            total_added += result.get("jobs_added", 0)
-        except Exception as e:
-            scrape_results.append({"company": company.slug, "status": "failed", "error": str(e)})
+    Meant to be called on a short fixed cadence (e.g. every few minutes).
+    Each company's next scrape time follows how often its board has changed
+    recently, so busy boards are polled often and quiet ones rarely.
+    """
+    scrape_result = run_due_scrapes(db, limit=limit)
+    total_added = scrape_result["total_jobs_added"]
 
-    response = {"scrape": {"results": scrape_results, "total_jobs_added": total_added}}
+    response = {"scrape": scrape_result}
 
-    # Auto-normalize if enabled and there are new jobs
     if normalize and total_added > 0:
-        normalize_result = normalize_pending_jobs(db, limit=total_added + 50)
-        response["normalize"] = normalize_result
+        response["normalize"] = normalize_pending_jobs(db, limit=total_added + 50)
 
     return response
 
 
+@router.get("/schedule")
+def view_schedule(db: Session = Depends(get_db)):
+    """View each active company's next scrape time and recent churn."""
+    companies = db.query(Company).filter(Company.is_active == True).all()
+    return schedule_summary(db, companies)
+
+
 @router.get("/scrape-runs")
 def list_scrape_runs(
     limit: int = 50,
@@ -139,35 +166,18 @@ def trigger_sector_synthesis(
     return result
 
 
-@router.post("/synthesize-all")
+@router.post("/synthesize-all", status_code=202)
 def trigger_full_synthesis(
     week: date | None = None,
     force: bool = Query(default=False, description="Force regenerate even if exists"),
     db: Session = Depends(get_db),
 ):
-    """Run full weekly synthesis - all companies then sector.
+    """Queue full weekly synthesis - all companies then sector.
 
     When week is not specified, analyzes the PREVIOUS week (since this typically
     runs Monday morning after the week ends).
     """
-    # Calculate the target week - same logic as run_weekly_synthesis
-    if week is None:
-        week_start = get_week_start() - timedelta(days=7)  # Previous week
-    else:
-        week_start = get_week_start(week)
-
-    if force:
-        # Delete existing summaries for this week
-        db.query(CompanyWeeklySummary).filter(
-            CompanyWeeklySummary.week_start == week_start
-        ).delete()
-        db.query(SectorWeeklySummary).filter(
-            SectorWeeklySummary.week_start == week_start
-        ).delete()
-        db.commit()
-
-    result = run_weekly_synthesis(db, week_start)
-    return result
+    return _queued(enqueue_job(db, "synthesize_all", week=week, force=force))
 
 
 @router.post("/reset")
@@ -189,8 +199,14 @@ def reset_data(
     if not keep_companies:
         companies_deleted = db.query(Company).delete()
     else:
-        # Reset company scrape timestamps
-        db.query(Company).update({"last_scraped_at": None})
+        # Reset company scrape timestamps and change-detection state
+        db.query(Company).update({
+            "last_scraped_at": None,
+            "payload_hash": None,
+            "ats_etag": None,
+            "ats_last_modified": None,
+            "next_scrape_at": None,
+        })
 
     db.commit()
 
@@ -206,137 +222,59 @@ def reset_data(
     }
 
 
-@router.post("/repopulate")
+@router.post("/repopulate", status_code=202)
 def repopulate_all(
     db: Session = Depends(get_db),
 ):
-    """Full pipeline: wipe data, scrape all companies, normalize ALL, synthesize.
+    """Queue the full pipeline: wipe data, scrape all companies, normalize ALL, synthesize.
 
     This is the nuclear option - wipes everything and rebuilds from scratch.
     Takes several minutes depending on job count (~3-4 sec per job for normalization).
     """
-    results = {
-        "reset": None,
-        "scrape": None,
-        "normalize": None,
-        "synthesize": None,
-    }
+    return _queued(enqueue_job(db, "repopulate"))
 
-    # 1. Reset (keeping companies)
-    sector_deleted = db.query(SectorWeeklySummary).delete()
-    company_summaries_deleted = db.query(CompanyWeeklySummary).delete()
-    jobs_deleted = db.query(JobPosting).delete()
-    scrape_runs_deleted = db.query(ScrapeRun).delete()
-    db.query(Company).update({"last_scraped_at": None})
-    db.commit()
 
-    results["reset"] = {
-        "jobs_deleted": jobs_deleted,
-        "summaries_deleted": company_summaries_deleted + sector_deleted,
-    }
+@router.post("/normalize-all", status_code=202)
+def normalize_all_jobs(
+    max_workers: int = Query(default=50, le=100, description="Concurrent API calls"),
+    db: Session = Depends(get_db),
+):
+    """Queue normalization of ALL pending jobs, streamed with max_workers calls in flight.
 
-    # 2. Scrape all companies
-    companies = db.query(Company).filter(Company.is_active == True).all()
-    scrape_results = []
-    total_added = 0
-
-    for company in companies:
-        try:
-            result = run_scrape_for_company(db, company)
-            scrape_results.append({"company": company.slug, **result})
-            total_added += result.get("jobs_added", 0)
-        except Exception as e:
-            scrape_results.append({"company": company.slug, "status": "failed", "error": str(e)})
-
-    results["scrape"] = {"companies": len(scrape_results), "total_jobs": total_added}
-
-    # 3. Normalize ALL jobs in parallel (batches of 200, 50 concurrent workers)
-    total_normalized = 0
-    total_failed = 0
-    batch_size = 200
-    max_workers = 50
-
-    while True:
-        # Count remaining
-        remaining = (
-            db.query(JobPosting)
-            .filter(
-                JobPosting.normalized_at.is_(None),
-                JobPosting.removed_at.is_(None),
-            )
-            .count()
-        )
-
-        if remaining == 0:
-            break
-
-        # Process batch in parallel
-        batch_result = normalize_jobs_parallel(db, limit=batch_size, max_workers=max_workers)
-        total_normalized += batch_result.get("success", 0)
-        total_failed += batch_result.get("failed", 0)
-
-        # If no jobs were processed, break to avoid infinite loop
-        if batch_result.get("total", 0) == 0:
-            break
-
-    results["normalize"] = {
-        "total": total_normalized + total_failed,
-        "success": total_normalized,
-        "failed": total_failed,
-    }
+    Jobs are leased from the table as slots free up, so several of these
+    (or scripts/normalize_worker.py processes) can run side by side.
+    """
+    return _queued(enqueue_job(db, "normalize_all", max_workers=max_workers))
 
-    # 4. Run synthesis
-    synthesis_result = run_weekly_synthesis(db)
-    results["synthesize"] = {
-        "companies_synthesized": len(synthesis_result.get("companies", {})),
-        "sector_status": synthesis_result.get("sector", {}).get("status"),
-    }
 
-    return results
+@router.post("/normalize-batch", status_code=202)
+def normalize_batch_jobs(db: Session = Depends(get_db)):
+    """Queue normalization of ALL pending jobs through the OpenAI Batch API.
 
+    Half the price of normalize-all and outside the per-minute rate limits,
+    but results can take up to 24 hours: meant for overnight re-normalizations.
+    """
+    return _queued(enqueue_job(db, "normalize_batch"))
+
+
+@router.post("/classifier/train", status_code=202)
+def retrain_classifier(db: Session = Depends(get_db)):
+    """Queue retraining of the local pre-classifier on the postings normalized so far."""
+    return _queued(enqueue_job(db, "train_classifier"))
 
-@router.post("/normalize-all")
-def normalize_all_jobs(
-    batch_size: int = Query(default=200, le=500, description="Jobs per batch"),
-    max_workers: int = Query(default=50, le=100, description="Concurrent API calls"),
-    db: Session = Depends(get_db),
-):
-    """Normalize ALL pending jobs in parallel. Much faster with tier 3 rate limits."""
-    total_processed = 0
-    total_success = 0
-    total_failed = 0
-    batches = 0
-
-    while True:
-        # Count remaining
-        remaining = (
-            db.query(JobPosting)
-            .filter(
-                JobPosting.normalized_at.is_(None),
-                JobPosting.removed_at.is_(None),
-            )
-            .count()
-        )
-
-        if remaining == 0:
-            break
-
-        batches += 1
-        result = normalize_jobs_parallel(db, limit=batch_size, max_workers=max_workers)
-        total_processed += result.get("total", 0)
-        total_success += result.get("success", 0)
-        total_failed += result.get("failed", 0)
-
-        # Safety: break if nothing was processed
-        if result.get("total", 0) == 0:
-            break
+
+@router.get("/classifier")
+def view_classifier(db: Session = Depends(get_db)):
+    """Held-out accuracy report of the pre-classifier currently in use."""
+    model = db.query(ClassifierModel).order_by(ClassifierModel.created_at.desc()).first()
+    if not model:
+        raise HTTPException(status_code=404, detail="No classifier trained yet")
 
     return {
-        "status": "complete",
-        "batches_processed": batches,
-        "total_processed": total_processed,
-        "success": total_success,
-        "failed": total_failed,
+        "id": str(model.id),
+        "created_at": model.created_at,
+        "enabled": settings.classifier_enabled,
+        "report": model.report,
     }
 
 
@@ -349,3 +287,46 @@ def normalize_parallel_batch(
     """Normalize a batch of jobs in parallel. Returns immediately with results."""
     result = normalize_jobs_parallel(db, limit=limit, max_workers=max_workers)
     return result
+
+
+@router.get("/jobs")
+def list_pipeline_jobs(
+    limit: int = 20,
+    db: Session = Depends(get_db),
+):
+    """View recent pipeline jobs."""
+    jobs = db.query(PipelineJob).order_by(PipelineJob.created_at.desc()).limit(limit).all()
+    return [_job_status(job, include_result=False) for job in jobs]
+
+
+@router.get("/jobs/{job_id}")
+def get_pipeline_job(job_id: uuid.UUID, db: Session = Depends(get_db)):
+    """Poll a pipeline job for progress, per-stage timings and its final result."""
+    job = db.get(PipelineJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return _job_status(job)
+
+
+def _queued(job: PipelineJob) -> dict:
+    return {"job_id": str(job.id), "kind": job.kind, "status": job.status}
+
+
+def _job_status(job: PipelineJob, include_result: bool = True) -> dict:
+    status = {
+        "id": str(job.id),
+        "kind": job.kind,
+        "params": job.params,
+        "status": job.status,
+        "attempts": job.attempts,
+        "progress": job.progress,
+        "stages": job.stages,
+        "error_message": job.error_message,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "completed_at": job.completed_at,
+    }
+    if include_result:
+        status["result"] = job.result
+    return status
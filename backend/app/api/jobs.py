@@ -2,10 +2,12 @@ from datetime import datetime, timedelta
 from typing import Literal
 
 from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.models import Company, JobPosting
+from app.services.locations import parse_location
 
 router = APIRouter()
 
@@ -15,6 +17,9 @@ def list_jobs(
     company: str | None = None,
     function: str | None = None,
     seniority: str | None = None,
+    city: str | None = None,
+    country: str | None = None,
+    remote: bool | None = None,
     status: Literal["active", "removed", "added_this_week"] | None = None,
     limit: int = Query(default=100, le=500),
     offset: int = 0,
@@ -32,6 +37,18 @@ def list_jobs(
     if seniority:
         query = query.filter(JobPosting.seniority == seniority)
 
+    # Resolved through the gazetteer, so "NYC" finds postings in "New York, NY"
+    if city:
+        cities = parse_location(city).cities or (city,)
+        query = query.filter(JobPosting.location_cities.overlap(list(cities)))
+
+    if country:
+        countries = parse_location(country).countries or (country.upper(),)
+        query = query.filter(JobPosting.location_countries.overlap(list(countries)))
+
+    if remote is not None:
+        query = query.filter(JobPosting.location_remote.is_(remote))
+
     if status == "active":
         query = query.filter(JobPosting.removed_at.is_(None))
     elif status == "removed":
@@ -55,12 +72,16 @@ def list_jobs(
                 "title_raw": j.title_raw,
                 "normalized_title": j.normalized_title,
                 "location_raw": j.location_raw,
+                "location_cities": j.location_cities,
+                "location_countries": j.location_countries,
+                "location_remote": j.location_remote,
                 "function": j.function,
                 "seniority": j.seniority,
                 "team_area": j.team_area,
                 "remote_policy": j.remote_policy,
                 "job_url": j.job_url,
                 "first_seen_at": j.first_seen_at,
+                "last_seen_at": j.last_confirmed_at,
                 "removed_at": j.removed_at,
             }
             for j in jobs
@@ -68,6 +89,42 @@ def list_jobs(
     }
 
 
+@router.get("/locations")
+def location_facets(
+    company: str | None = None,
+    limit: int = Query(default=50, le=500),
+    db: Session = Depends(get_db),
+):
+    """Active job counts by country and city, and how many are remote."""
+    active = [JobPosting.removed_at.is_(None)]
+    if company:
+        active.append(JobPosting.company_id.in_(select(Company.id).where(Company.slug == company)))
+
+    def counts(column):
+        values = select(func.unnest(column).label("value")).where(*active).subquery()
+        return db.execute(
+            select(values.c.value, func.count())
+            .group_by(values.c.value)
+            .order_by(func.count().desc(), values.c.value)
+            .limit(limit)
+        ).all()
+
+    remote = db.execute(
+        select(func.count()).where(*active, JobPosting.location_remote.is_(True))
+    ).scalar()
+
+    return {
+        "countries": [
+            {"country": country, "jobs": jobs}
+            for country, jobs in counts(JobPosting.location_countries)
+        ],
+        "cities": [
+            {"city": city, "jobs": jobs} for city, jobs in counts(JobPosting.location_cities)
+        ],
+        "remote": remote,
+    }
+
+
 @router.get("/feed")
 def job_feed(
     days: int = Query(default=7, le=30),
@@ -7,10 +7,52 @@ class Settings(BaseSettings):
 
     # OpenAI
     openai_api_key: str = ""
+    openai_requests_per_minute: int = 5000  # Account rate limits for the normalization model
+    openai_tokens_per_minute: int = 4_000_000
+    openai_max_concurrency: int = 100
+    normalize_lease_seconds: int = 300  # Pending jobs held by a normalization worker
+    normalize_max_attempts: int = 3  # Failed normalizations before a job is left alone
+    normalize_description_tokens: int = 2000  # Per-request budget for the job description
+    normalize_pack_max_jobs: int = 1  # Above 1, short postings share one request
+    normalize_pack_job_tokens: int = 300  # Descriptions up to this long count as short
+    normalize_pack_tokens: int = 2000  # Description tokens per packed request
+    normalize_batch_transport: str = "openai"  # openai (Batch API) or local (direct calls)
+    normalize_batch_poll_seconds: float = 60.0
+    normalize_batch_max_tokens: int = 20_000_000  # Account's enqueued batch token limit
+    classifier_enabled: bool = True  # Skip the LLM for postings the local classifier is sure of
+    classifier_min_confidence: float = 0.9
+    classifier_min_training_jobs: int = 500
 
     # Admin API Key (required for admin endpoints)
     admin_api_key: str = ""
 
+    # Scraping
+    scrape_concurrency_per_host: int = 10  # Max in-flight requests per ATS host
+    scrape_timeout_seconds: float = 30.0
+    scrape_connect_timeout_seconds: float = 10.0
+    scrape_max_connections: int = 100  # Pooled connections shared by all ATS scrapers
+    scrape_keepalive_seconds: float = 60.0  # Idle time before a pooled connection is dropped
+    scrape_http2: bool = True
+    scrape_max_retries: int = 3  # Retries of a request after a 429, 5xx or transport error
+    scrape_retry_base_delay_seconds: float = 1.0
+    scrape_retry_max_delay_seconds: float = 30.0
+    scrape_breaker_failure_threshold: int = 10  # Consecutive failures that open a host's breaker
+    scrape_breaker_cooldown_seconds: float = 60.0
+    scrape_archive_dir: str = ""  # Archive raw ATS payloads here (disabled when empty)
+    scrape_replay: bool = False  # Serve scrapes from the archive instead of the ATS
+
+    # Adaptive scrape scheduling
+    schedule_min_interval_minutes: int = 30
+    schedule_max_interval_hours: int = 48
+    schedule_batch_size: int = 200  # Max boards scraped per scheduler round
+
+    # Background pipeline jobs (admin scrape-all, normalize-all, ...)
+    pipeline_workers: int = 2  # Worker threads started with the API; 0 to run them elsewhere
+    pipeline_poll_seconds: float = 2.0
+    pipeline_stale_minutes: int = 15  # A running job with no progress for this long is retried
+    pipeline_max_attempts: int = 3
+    last_seen_refresh_hours: int = 24  # Coarse refresh of JobPosting.last_seen_at
+
     # App
     environment: str = "development"
     debug: bool = True
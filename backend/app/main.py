@@ -1,14 +1,33 @@
 import os
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api import companies, jobs, admin, summaries
+from app.config import settings
+from app.services.ats.http import http_pool
+from app.services.pipeline import PipelineWorkerPool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Run queued admin pipeline jobs in the background of this process
+    pipeline_workers = PipelineWorkerPool(settings.pipeline_workers)
+    pipeline_workers.start()
+
+    yield
+
+    pipeline_workers.stop(timeout=5)
+    # Release the pooled ATS connections
+    http_pool.close()
+
 
 app = FastAPI(
     title="OpenRoles API",
     description="AI Sector Job Intelligence Platform",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # CORS middleware for frontend
@@ -2,6 +2,10 @@ from app.models.company import Company
 from app.models.job import JobPosting
 from app.models.summary import CompanyWeeklySummary, SectorWeeklySummary
 from app.models.scrape_run import ScrapeRun
+from app.models.pipeline_job import PipelineJob
+from app.models.normalization_cache import NormalizationCache
+from app.models.normalization_batch import NormalizationBatch
+from app.models.classifier_model import ClassifierModel
 
 __all__ = [
     "Company",
@@ -9,4 +13,8 @@ __all__ = [
     "CompanyWeeklySummary",
     "SectorWeeklySummary",
     "ScrapeRun",
+    "PipelineJob",
+    "NormalizationCache",
+    "NormalizationBatch",
+    "ClassifierModel",
 ]
@@ -0,0 +1,22 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, LargeBinary
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class ClassifierModel(Base):
+    """A trained normalization pre-classifier. The newest one is used."""
+
+    __tablename__ = "classifier_models"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    training_jobs: Mapped[int] = mapped_column(Integer, nullable=False)
+    report: Mapped[dict] = mapped_column(JSONB, nullable=False)  # Held-out accuracy
+    weights: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)  # PreClassifier.to_bytes
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
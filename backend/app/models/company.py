@@ -36,6 +36,12 @@ class Company(Base):
         DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
     )
     last_scraped_at: Mapped[datetime | None] = mapped_column(DateTime)
+    next_scrape_at: Mapped[datetime | None] = mapped_column(DateTime)  # None = due now
+
+    # Change detection - lets unchanged boards skip the scrape delta entirely
+    payload_hash: Mapped[str | None] = mapped_column(String(64))  # sha256 of parsed jobs
+    ats_etag: Mapped[str | None] = mapped_column(String(255))
+    ats_last_modified: Mapped[str | None] = mapped_column(String(64))
 
     # Relationships
     jobs: Mapped[list["JobPosting"]] = relationship(back_populates="company")
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, String, Text, Boolean, Integer, UniqueConstraint
+from sqlalchemy import DateTime, ForeignKey, String, Text, Boolean, Integer, UniqueConstraint, Index
 from sqlalchemy.dialects.postgresql import ARRAY, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -23,13 +23,35 @@ class JobPosting(Base):
     title_raw: Mapped[str] = mapped_column(String(500), nullable=False)
     description_html: Mapped[str | None] = mapped_column(Text)
     description_plain: Mapped[str | None] = mapped_column(Text)
+    # Description as compact text without company boilerplate (see services/preprocess)
+    description_text: Mapped[str | None] = mapped_column(Text)
+    # Keys of the description's blocks before stripping, so boilerplate can be
+    # re-found without converting unchanged postings again
+    description_blocks: Mapped[list[str] | None] = mapped_column(ARRAY(String(16)))
     department_raw: Mapped[str | None] = mapped_column(String(255))
     location_raw: Mapped[str | None] = mapped_column(String(255))
     job_url: Mapped[str | None] = mapped_column(String(1000))
     apply_url: Mapped[str | None] = mapped_column(String(1000))
     published_at: Mapped[datetime | None] = mapped_column(DateTime)
+    content_hash: Mapped[str | None] = mapped_column(String(64))  # sha256 of raw content fields
+    ats_updated_at: Mapped[datetime | None] = mapped_column(DateTime)  # ATS revision, if provided
 
-    # Lifecycle tracking
+    # Structured fields the ATS states outright. They take precedence over the
+    # normalizer's values, which are not extracted for them at all.
+    ats_remote_policy: Mapped[str | None] = mapped_column(String(50))  # remote, hybrid, onsite
+    ats_employment_type: Mapped[str | None] = mapped_column(String(50))
+    ats_salary_min: Mapped[int | None] = mapped_column(Integer)  # yearly
+    ats_salary_max: Mapped[int | None] = mapped_column(Integer)
+    ats_salary_currency: Mapped[str | None] = mapped_column(String(10))
+
+    # location_raw parsed against the bundled gazetteer (see services/locations).
+    # location_remote is NULL until the posting's location has been parsed.
+    location_cities: Mapped[list[str] | None] = mapped_column(ARRAY(String))
+    location_countries: Mapped[list[str] | None] = mapped_column(ARRAY(String(2)))  # ISO codes
+    location_remote: Mapped[bool | None] = mapped_column(Boolean)
+
+    # Lifecycle tracking. last_seen_at is only written on state transitions and at
+    # a coarse interval - use last_confirmed_at for the precise value.
     first_seen_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     last_seen_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     removed_at: Mapped[datetime | None] = mapped_column(DateTime)
@@ -49,12 +71,39 @@ class JobPosting(Base):
     salary_max: Mapped[int | None] = mapped_column(Integer)
     salary_currency: Mapped[str | None] = mapped_column(String(10))
     normalized_at: Mapped[datetime | None] = mapped_column(DateTime)
+    normalized_by: Mapped[str | None] = mapped_column(String(20))  # llm, classifier
+
+    # Normalization lease: the worker holding this posting and until when. An
+    # expired lease (crashed worker) makes the posting claimable again.
+    normalize_lease_owner: Mapped[str | None] = mapped_column(String(100))
+    normalize_leased_until: Mapped[datetime | None] = mapped_column(DateTime)
+    normalize_attempts: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    # Near-duplicate posting whose normalization was copied to this one, if any
+    duplicate_of: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("job_postings.id", ondelete="SET NULL")
+    )
 
     # Relationships
     company: Mapped["Company"] = relationship(back_populates="jobs")
 
+    @property
+    def last_confirmed_at(self) -> datetime | None:
+        """When this posting was last seen on its board.
+
+        An open posting was present in the company's latest successful scrape,
+        so that scrape's time is authoritative; a removed posting keeps the
+        last_seen_at settled when it was removed.
+        """
+        if self.removed_at is None and self.company.last_scraped_at:
+            return max(self.last_seen_at, self.company.last_scraped_at)
+        return self.last_seen_at
+
     __table_args__ = (
         UniqueConstraint("company_id", "external_id", name="uq_company_external_id"),
+        # Location filters and facets are array containment queries
+        Index("ix_job_postings_location_cities", "location_cities", postgresql_using="gin"),
+        Index("ix_job_postings_location_countries", "location_countries", postgresql_using="gin"),
+        Index("ix_job_postings_location_remote", "location_remote"),
     )
 
 
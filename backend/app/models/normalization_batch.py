@@ -0,0 +1,34 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String, Text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class NormalizationBatch(Base):
+    """A set of jobs submitted together to the provider's asynchronous batch API."""
+
+    __tablename__ = "normalization_batches"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    provider_batch_id: Mapped[str] = mapped_column(String(100), nullable=False)
+
+    # submitted, completed, failed. provider_status is the provider's last reported
+    # state (validating, in_progress, finalizing, completed, expired, ...)
+    status: Mapped[str] = mapped_column(String(20), default="submitted", index=True)
+    provider_status: Mapped[str | None] = mapped_column(String(20))
+
+    # Job id -> cache key of the request sent for it
+    requests: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    job_count: Mapped[int] = mapped_column(Integer, default=0)
+    succeeded: Mapped[int | None] = mapped_column(Integer)
+    failed: Mapped[int | None] = mapped_column(Integer)
+    error_message: Mapped[str | None] = mapped_column(Text)
+
+    submitted_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    completed_at: Mapped[datetime | None] = mapped_column(DateTime)
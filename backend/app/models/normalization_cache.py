@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class NormalizationCache(Base):
+    """LLM normalization results keyed by a hash of everything that went into the call.
+
+    Survives resets and repopulates, so reposted or re-scraped content is never
+    sent to OpenAI twice.
+    """
+
+    __tablename__ = "normalization_cache"
+
+    # sha256 of the model, prompt, output schema and job input (see normalizer._cache_key)
+    input_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    model: Mapped[str] = mapped_column(String(100), nullable=False)
+    result: Mapped[dict] = mapped_column(JSONB, nullable=False)  # NormalizedJob fields
+    hit_count: Mapped[int] = mapped_column(Integer, default=0)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    last_hit_at: Mapped[datetime | None] = mapped_column(DateTime)
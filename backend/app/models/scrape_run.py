@@ -20,11 +20,15 @@ class ScrapeRun(Base):
 
     started_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     completed_at: Mapped[datetime | None] = mapped_column(DateTime)
-    status: Mapped[str | None] = mapped_column(String(50))  # success, failed, partial
+    # success, unchanged, failed, partial, circuit_open
+    status: Mapped[str | None] = mapped_column(String(50))
     jobs_found: Mapped[int | None] = mapped_column(Integer)
     jobs_added: Mapped[int | None] = mapped_column(Integer)
     jobs_removed: Mapped[int | None] = mapped_column(Integer)
+    jobs_changed: Mapped[int | None] = mapped_column(Integer)  # existing postings edited
     error_message: Mapped[str | None] = mapped_column(Text)
+    payload_hash: Mapped[str | None] = mapped_column(String(64))
+    snapshot_hash: Mapped[str | None] = mapped_column(String(64))  # Raw payload in the archive
 
     # Relationships
     company: Mapped["Company"] = relationship(back_populates="scrape_runs")
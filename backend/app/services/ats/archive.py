@@ -0,0 +1,199 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from collections.abc import Iterator
+from dataclasses import replace
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import quote
+
+import httpx
+
+from app.services.ats.base import BaseScraper, FetchResult, KnownPosting, RawJob
+
+
+class PayloadArchive:
+    """Content-addressed store of compressed raw ATS board snapshots.
+
+    A snapshot is the gzipped JSON-lines list of the job objects an ATS
+    returned for one board, in the order it returned them, named by the
+    sha256 of its uncompressed content - so a board that has not changed
+    between scrapes is stored once. A per-board log records which snapshot
+    each scrape produced, newest last.
+
+    An incremental scrape only downloads the content of postings that
+    changed, so its snapshot carries the rest as bare listings with their
+    stored fingerprint. Such a snapshot is logged as listing-only: it can't
+    rebuild the board on its own, so replay skips it.
+
+    Layout:
+        {root}/snapshots/ab/abcdef....jsonl.gz
+        {root}/boards/{ats_type}/{identifier}.log
+    """
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+
+    def writer(self) -> "SnapshotWriter":
+        """Start a new snapshot."""
+        return SnapshotWriter(self)
+
+    def path(self, snapshot_hash: str) -> Path:
+        return self.root / "snapshots" / snapshot_hash[:2] / f"{snapshot_hash}.jsonl.gz"
+
+    def read(self, snapshot_hash: str) -> Iterator[dict]:
+        """Yield the archived entries of a snapshot, streaming from disk."""
+        with gzip.open(self.path(snapshot_hash), "rt", encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def latest(self, ats_type: str, identifier: str) -> str | None:
+        """Hash of the most recent full snapshot of a board, or None if there is none.
+
+        Listing-only snapshots are passed over, since they can't be replayed.
+        """
+        log = self._board_log(ats_type, identifier)
+        if not log.exists():
+            return None
+
+        for line in reversed(log.read_text().splitlines()):
+            fields = line.split()
+            if len(fields) == 2:
+                return fields[1]
+        return None
+
+    def record(
+        self, ats_type: str, identifier: str, snapshot_hash: str, listing_only: bool = False
+    ):
+        """Append a snapshot to a board's log."""
+        log = self._board_log(ats_type, identifier)
+        log.parent.mkdir(parents=True, exist_ok=True)
+        marker = " listing" if listing_only else ""
+        with log.open("a") as f:
+            f.write(f"{datetime.utcnow().isoformat()} {snapshot_hash}{marker}\n")
+
+    def _board_log(self, ats_type: str, identifier: str) -> Path:
+        return self.root / "boards" / ats_type / f"{quote(identifier, safe='')}.log"
+
+
+class SnapshotWriter:
+    """Streams one board's raw jobs into the archive as they are scraped.
+
+    Jobs are compressed to a temporary file while the board is hashed, so
+    memory does not grow with the board. commit() moves the file to its
+    content address; discard() drops it, and does nothing once committed.
+    """
+
+    def __init__(self, archive: PayloadArchive):
+        self.archive = archive
+        self.complete = True
+        # Set once a job is archived without its content (incremental scrape)
+        self.listing_only = False
+        self._closed = False
+        self._sha = hashlib.sha256()
+
+        tmp_dir = archive.root / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        fd, self._tmp_path = tempfile.mkstemp(dir=tmp_dir, suffix=".jsonl.gz")
+        self._file = gzip.open(os.fdopen(fd, "wb"), "wb")
+
+    def write(self, raw_job: RawJob):
+        """Add one job, as the ATS returned it."""
+        if raw_job.source is None:
+            # Not parsed from an ATS payload, so the board can't be replayed
+            self.complete = False
+            return
+
+        entry = {"job": raw_job.source}
+        if raw_job.content_hash:
+            # Content not downloaded this scrape - replay carries the fingerprint over
+            entry["content_hash"] = raw_job.content_hash
+            self.listing_only = True
+
+        line = json.dumps(entry, separators=(",", ":")).encode() + b"\n"
+        self._sha.update(line)
+        self._file.write(line)
+
+    def commit(self, ats_type: str, identifier: str) -> str | None:
+        """Store the snapshot and log it against the board.
+
+        Returns:
+            The snapshot hash, or None if some jobs had no raw source to archive
+        """
+        self._file.close()
+        self._closed = True
+        if not self.complete:
+            os.unlink(self._tmp_path)
+            return None
+
+        snapshot_hash = self._sha.hexdigest()
+        path = self.archive.path(snapshot_hash)
+        if path.exists():
+            os.unlink(self._tmp_path)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(self._tmp_path, path)
+
+        self.archive.record(ats_type, identifier, snapshot_hash, self.listing_only)
+        return snapshot_hash
+
+    def discard(self):
+        if self._closed:
+            return
+        self._file.close()
+        self._closed = True
+        os.unlink(self._tmp_path)
+
+
+class ReplayScraper(BaseScraper):
+    """Serves boards from the payload archive instead of the ATS.
+
+    Each board replays its latest full snapshot through the live scraper's
+    own parser, so parsing and the full scrape delta run offline at disk
+    speed. An explicitly given listing-only snapshot replays too, but only
+    against the database it was scraped into.
+    """
+
+    incremental = False
+
+    def __init__(
+        self,
+        scraper: BaseScraper,
+        archive: PayloadArchive,
+        ats_type: str,
+        snapshot_hash: str | None = None,
+    ):
+        self.scraper = scraper
+        self.archive = archive
+        self.ats_type = ats_type
+        self.snapshot_hash = snapshot_hash
+        self.host = scraper.host
+
+    def fetch_jobs(self, identifier: str) -> Iterator[RawJob]:
+        """Replay a board's archived snapshot.
+
+        Raises:
+            FileNotFoundError: If the board has no full snapshot archived
+        """
+        snapshot_hash = self.snapshot_hash or self.archive.latest(self.ats_type, identifier)
+        if snapshot_hash is None:
+            raise FileNotFoundError(f"No full archived snapshot for {self.ats_type}/{identifier}")
+
+        for entry in self.archive.read(snapshot_hash):
+            raw_job = self.scraper._load_job(entry["job"])
+            if entry.get("content_hash"):
+                raw_job = replace(raw_job, content_hash=entry["content_hash"])
+            yield raw_job
+
+    async def fetch_board(
+        self,
+        identifier: str,
+        client: httpx.AsyncClient,
+        etag: str | None = None,
+        last_modified: str | None = None,
+        known: dict[str, KnownPosting] | None = None,
+    ) -> FetchResult:
+        """Replay a board without touching the network; validators are ignored."""
+        return FetchResult(jobs=self.fetch_jobs(identifier))
@@ -1,16 +1,28 @@
+from collections.abc import Iterator
 from datetime import datetime
 
 import httpx
 
-from app.services.ats.base import BaseScraper, RawJob
+from app.services.ats.base import (
+    BaseScraper,
+    FetchResult,
+    KnownPosting,
+    RawJob,
+    parse_remote_policy,
+    parse_salary,
+)
 
 
 class AshbyScraper(BaseScraper):
     """Scraper for Ashby ATS."""
 
     BASE_URL = "https://api.ashbyhq.com/posting-api/job-board"
+    host = "api.ashbyhq.com"
 
-    def fetch_jobs(self, identifier: str) -> list[RawJob]:
+    # Compensation is only included on request
+    PARAMS = {"includeCompensation": "true"}
+
+    def fetch_jobs(self, identifier: str) -> Iterator[RawJob]:
         """Fetch all jobs from Ashby.
 
         Args:
@@ -18,38 +30,67 @@ class AshbyScraper(BaseScraper):
         """
         url = f"{self.BASE_URL}/{identifier}"
 
-        response = httpx.get(url, timeout=30.0)
-        response.raise_for_status()
-
-        data = response.json()
-        jobs = []
-
-        for job in data.get("jobs", []):
-            # Parse published_at datetime
-            published_at = None
-            if job.get("publishedAt"):
-                try:
-                    published_at = datetime.fromisoformat(
-                        job["publishedAt"].replace("Z", "+00:00")
-                    )
-                except (ValueError, TypeError):
-                    pass
-
-            # Department can be in 'department' or 'team' field
-            department = job.get("department") or job.get("team")
-
-            jobs.append(
-                RawJob(
-                    external_id=job["id"],
-                    title=job["title"],
-                    description_html=job.get("descriptionHtml"),
-                    description_plain=job.get("descriptionPlain"),
-                    department=department,
-                    location=job.get("location"),
-                    job_url=job.get("jobUrl"),
-                    apply_url=job.get("applyUrl"),
-                    published_at=published_at,
+        return self._iter_board(url, params=self.PARAMS)
+
+    async def fetch_board(
+        self,
+        identifier: str,
+        client: httpx.AsyncClient,
+        etag: str | None = None,
+        last_modified: str | None = None,
+        known: dict[str, KnownPosting] | None = None,
+    ) -> FetchResult:
+        """Fetch all jobs from Ashby using a shared async client."""
+        url = f"{self.BASE_URL}/{identifier}"
+
+        return await self._get_board(client, url, etag, last_modified, params=self.PARAMS)
+
+    def _parse_job(self, job: dict) -> RawJob:
+        """Convert one Ashby job into a RawJob."""
+        # Parse published_at datetime
+        published_at = None
+        if job.get("publishedAt"):
+            try:
+                published_at = datetime.fromisoformat(
+                    job["publishedAt"].replace("Z", "+00:00")
+                )
+            except (ValueError, TypeError):
+                pass
+
+        # Department can be in 'department' or 'team' field
+        department = job.get("department") or job.get("team")
+
+        remote_policy = parse_remote_policy(job.get("workplaceType"))
+        if remote_policy is None and job.get("isRemote") is True:
+            remote_policy = "remote"
+
+        # The yearly base salary, if the posting publishes one
+        salary_min = salary_max = salary_currency = None
+        components = (job.get("compensation") or {}).get("summaryComponents") or []
+        for component in components:
+            if (
+                component.get("compensationType") == "Salary"
+                and component.get("interval") == "1 YEAR"
+            ):
+                salary_min, salary_max = parse_salary(
+                    component.get("minValue"), component.get("maxValue")
                 )
-            )
+                salary_currency = component.get("currencyCode")
+                break
 
-        return jobs
+        return RawJob(
+            external_id=job["id"],
+            title=job["title"],
+            description_html=job.get("descriptionHtml"),
+            description_plain=job.get("descriptionPlain"),
+            department=department,
+            location=job.get("location"),
+            job_url=job.get("jobUrl"),
+            apply_url=job.get("applyUrl"),
+            published_at=published_at,
+            remote_policy=remote_policy,
+            employment_type=job.get("employmentType"),
+            salary_min=salary_min,
+            salary_max=salary_max,
+            salary_currency=salary_currency,
+        )
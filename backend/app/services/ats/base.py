@@ -1,9 +1,20 @@
+import asyncio
+import re
+import time
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from collections.abc import AsyncIterator, Iterable, Iterator
+from dataclasses import dataclass, field
 from datetime import datetime
 
+import httpx
 
-@dataclass
+from app.config import settings
+from app.services.ats.http import HttpPool, http_pool
+from app.services.ats.resilience import is_host_failure, is_retryable, retry_delay
+from app.services.ats.stream import JsonArrayStream
+
+
+@dataclass(slots=True)
 class RawJob:
     """Raw job data from ATS API."""
 
@@ -16,19 +27,272 @@ class RawJob:
     job_url: str | None
     apply_url: str | None
     published_at: datetime | None
+    updated_at: datetime | None = None  # ATS revision time (naive UTC), where provided
+    # Structured fields, where the ATS states them outright. The salary is yearly.
+    remote_policy: str | None = None  # remote, hybrid or onsite
+    employment_type: str | None = None  # as the ATS words it, e.g. FullTime, Intern
+    salary_min: int | None = None
+    salary_max: int | None = None
+    salary_currency: str | None = None
+    # Set instead of the content fields when the posting was known to be unchanged
+    # and its content was not downloaded again
+    content_hash: str | None = None
+    # The ATS's own job object, kept when scrapes are archived
+    source: dict | None = field(default=None, repr=False, compare=False)
+
+
+def parse_remote_policy(value) -> str | None:
+    """remote, hybrid or onsite from an ATS workplace value like "OnSite" or "on-site"."""
+    if not isinstance(value, str):
+        return None
+    value = re.sub(r"[^a-z]", "", value.lower())
+    if value in ("remote", "fullyremote", "remoteonly"):
+        return "remote"
+    if value == "hybrid":
+        return "hybrid"
+    if value in ("onsite", "inoffice", "inperson", "office"):
+        return "onsite"
+    return None
+
+
+def parse_salary(low, high) -> tuple[int | None, int | None]:
+    """Salary bounds as whole numbers, from the numbers or numeric strings ATSs send."""
+    bounds = []
+    for value in (low, high):
+        try:
+            bounds.append(int(float(value)) if value not in (None, "") else None)
+        except (TypeError, ValueError):
+            bounds.append(None)
+    return bounds[0], bounds[1]
+
+
+@dataclass
+class KnownPosting:
+    """What we already store for a posting, used to skip re-downloading it."""
+
+    updated_at: datetime | None
+    content_hash: str | None
+
+
+@dataclass
+class FetchResult:
+    """Outcome of fetching a job board, with HTTP cache validators.
+
+    jobs may be a plain iterable or an async iterator that streams jobs off
+    the still-open response; consumers should iterate it exactly once.
+    """
+
+    jobs: Iterable[RawJob] | AsyncIterator[RawJob]
+    etag: str | None = None
+    last_modified: str | None = None
+    not_modified: bool = False  # ATS answered 304 - board unchanged since last fetch
 
 
 class BaseScraper(ABC):
     """Base class for ATS scrapers."""
 
+    # ATS API host, used to cap concurrent requests per host during scrape-all
+    host: str = "default"
+
+    # Whether fetch_board can use known postings to skip unchanged content
+    incremental: bool = False
+
+    # Top-level key holding the jobs array in the board payload (None for a bare array)
+    PAYLOAD_KEY: str | None = "jobs"
+
+    def __init__(self, http: HttpPool | None = None):
+        self.http = http or http_pool
+
     @abstractmethod
-    def fetch_jobs(self, identifier: str) -> list[RawJob]:
+    def fetch_jobs(self, identifier: str) -> Iterable[RawJob]:
         """Fetch all jobs for a company.
 
         Args:
             identifier: Company identifier for this ATS (e.g., 'anthropic' for Greenhouse)
 
         Returns:
-            List of raw job data
+            Raw job data - HTTP scrapers yield jobs as the response is parsed
         """
         pass
+
+    async def fetch_board(
+        self,
+        identifier: str,
+        client: httpx.AsyncClient,
+        etag: str | None = None,
+        last_modified: str | None = None,
+        known: dict[str, KnownPosting] | None = None,
+    ) -> FetchResult:
+        """Fetch all jobs for a company without blocking the event loop.
+
+        Scrapers that talk HTTP override this to use the shared async client
+        and send conditional request headers. The default runs the blocking
+        fetch_jobs in a worker thread and ignores the validators.
+
+        Args:
+            identifier: Company identifier for this ATS
+            client: Shared async HTTP client
+            etag: ETag from the previous fetch of this board, if any
+            last_modified: Last-Modified from the previous fetch of this board, if any
+            known: Stored postings by external_id, for incremental scrapers
+
+        Returns:
+            FetchResult with the jobs, or not_modified set if the board is unchanged
+        """
+        jobs = await asyncio.to_thread(lambda: list(self.fetch_jobs(identifier)))
+        return FetchResult(jobs=jobs)
+
+    def _parse_job(self, job: dict) -> RawJob:
+        """Convert one decoded ATS job into a RawJob."""
+        raise NotImplementedError
+
+    def _load_job(self, job: dict) -> RawJob:
+        """Parse one decoded ATS job, keeping the original if scrapes are archived."""
+        raw_job = self._parse_job(job)
+        if settings.scrape_archive_dir:
+            raw_job.source = job
+        return raw_job
+
+    def _parse_jobs(self, data) -> list[RawJob]:
+        """Convert a fully decoded ATS payload into RawJob records."""
+        items = data if self.PAYLOAD_KEY is None else data.get(self.PAYLOAD_KEY, [])
+        return [self._load_job(job) for job in items]
+
+    def _iter_board(self, url: str, params: dict | None = None) -> Iterator[RawJob]:
+        """GET a board URL and yield jobs while the body is still downloading."""
+        request = self.http.client.build_request("GET", url, params=params)
+        with self._send_sync(request, stream=True) as response:
+            response.raise_for_status()
+
+            stream = JsonArrayStream(self.PAYLOAD_KEY)
+            for text in response.iter_text():
+                for item in stream.feed(text):
+                    yield self._load_job(item)
+            for item in stream.close():
+                yield self._load_job(item)
+
+    async def _get_board(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        etag: str | None,
+        last_modified: str | None,
+        params: dict | None = None,
+    ) -> FetchResult:
+        """GET a board URL conditionally, streaming its jobs unless the ATS says 304.
+
+        The response stays open until the returned jobs iterator is exhausted.
+        """
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        request = client.build_request("GET", url, params=params, headers=headers)
+        response = await self._send(client, request, stream=True)
+
+        if response.status_code == 304:
+            await response.aclose()
+            return FetchResult(
+                jobs=[], etag=etag, last_modified=last_modified, not_modified=True
+            )
+
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError:
+            await response.aclose()
+            raise
+
+        return FetchResult(
+            jobs=self._stream_jobs(response),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+
+    async def _stream_jobs(self, response: httpx.Response) -> AsyncIterator[RawJob]:
+        """Yield jobs from an open streaming response as its body is decoded."""
+        try:
+            stream = JsonArrayStream(self.PAYLOAD_KEY)
+            async for text in response.aiter_text():
+                for item in stream.feed(text):
+                    yield self._load_job(item)
+            for item in stream.close():
+                yield self._load_job(item)
+        finally:
+            await response.aclose()
+
+    async def _send(
+        self, client: httpx.AsyncClient, request: httpx.Request, stream: bool = False
+    ) -> httpx.Response:
+        """Send a request, retrying transient failures behind the host's circuit breaker.
+
+        429s, 5xxs and transport errors are retried up to scrape_max_retries
+        times with backoff; all but 429s count towards opening the breaker.
+        The last response is returned as-is if every attempt fails, so callers
+        still raise_for_status as usual.
+
+        Raises:
+            CircuitOpenError: If the host's breaker is open
+            httpx.TransportError: If the final attempt could not connect or timed out
+        """
+        breaker = self.http.breaker(self.host)
+
+        for attempt in range(settings.scrape_max_retries + 1):
+            last_attempt = attempt == settings.scrape_max_retries
+            trial = breaker.check()
+
+            try:
+                response = await client.send(request, stream=stream)
+            except httpx.TransportError:
+                breaker.record_failure()
+                if last_attempt:
+                    raise
+                await asyncio.sleep(retry_delay(attempt))
+                continue
+            finally:
+                # Also when the send is cancelled or fails some other way
+                if trial:
+                    breaker.release_trial()
+
+            if not is_retryable(response):
+                breaker.record_success()
+                return response
+
+            if is_host_failure(response):
+                breaker.record_failure()
+            if last_attempt:
+                return response
+            await response.aclose()
+            await asyncio.sleep(retry_delay(attempt, response))
+
+    def _send_sync(self, request: httpx.Request, stream: bool = False) -> httpx.Response:
+        """Blocking counterpart of _send, using the pool's sync client."""
+        breaker = self.http.breaker(self.host)
+
+        for attempt in range(settings.scrape_max_retries + 1):
+            last_attempt = attempt == settings.scrape_max_retries
+            trial = breaker.check()
+
+            try:
+                response = self.http.client.send(request, stream=stream)
+            except httpx.TransportError:
+                breaker.record_failure()
+                if last_attempt:
+                    raise
+                time.sleep(retry_delay(attempt))
+                continue
+            finally:
+                if trial:
+                    breaker.release_trial()
+
+            if not is_retryable(response):
+                breaker.record_success()
+                return response
+
+            if is_host_failure(response):
+                breaker.record_failure()
+            if last_attempt:
+                return response
+            response.close()
+            time.sleep(retry_delay(attempt, response))
@@ -1,16 +1,39 @@
-from datetime import datetime
+import asyncio
+import re
+from collections.abc import Iterator
+from dataclasses import replace
+from datetime import UTC, datetime
 
 import httpx
 
-from app.services.ats.base import BaseScraper, RawJob
+from app.services.ats.base import (
+    BaseScraper,
+    FetchResult,
+    KnownPosting,
+    RawJob,
+    parse_remote_policy,
+    parse_salary,
+)
+
+# Salary ranges in metadata below this are hourly or monthly, not yearly
+MIN_YEARLY_SALARY = 10_000
 
 
 class GreenhouseScraper(BaseScraper):
     """Scraper for Greenhouse ATS."""
 
     BASE_URL = "https://boards-api.greenhouse.io/v1/boards"
+    host = "boards-api.greenhouse.io"
+    incremental = True
+
+    # Concurrent per-job content requests during an incremental fetch
+    DETAIL_CONCURRENCY = 8
+
+    # If more than this share of the listing needs content, one content=true
+    # request is cheaper than fetching each job individually
+    FULL_FETCH_RATIO = 0.5
 
-    def fetch_jobs(self, identifier: str) -> list[RawJob]:
+    def fetch_jobs(self, identifier: str) -> Iterator[RawJob]:
         """Fetch all jobs from Greenhouse.
 
         Args:
@@ -18,40 +41,164 @@ class GreenhouseScraper(BaseScraper):
         """
         url = f"{self.BASE_URL}/{identifier}/jobs"
 
-        response = httpx.get(url, params={"content": "true"}, timeout=30.0)
-        response.raise_for_status()
+        return self._iter_board(url, params={"content": "true"})
+
+    async def fetch_board(
+        self,
+        identifier: str,
+        client: httpx.AsyncClient,
+        etag: str | None = None,
+        last_modified: str | None = None,
+        known: dict[str, KnownPosting] | None = None,
+    ) -> FetchResult:
+        """Fetch all jobs from Greenhouse using a shared async client.
+
+        With no known postings this is a single content=true request. Otherwise
+        the lightweight listing is fetched first, and full content is downloaded
+        only for jobs that are new or whose updated_at moved since we stored them.
+        """
+        url = f"{self.BASE_URL}/{identifier}/jobs"
+        content = {"content": "true"}
+
+        if not known:
+            return await self._get_board(client, url, etag, last_modified, params=content)
+
+        listing = await self._get_board(client, url, etag, last_modified)
+        if listing.not_modified:
+            return listing
+
+        # The listing carries no content, so it is small enough to hold in full
+        listed = [job async for job in listing.jobs]
+        stale_ids = [job.external_id for job in listed if not _is_current(job, known)]
+
+        if len(stale_ids) > len(listed) * self.FULL_FETCH_RATIO:
+            full = await self._get_board(client, url, None, None, params=content)
+            return replace(full, etag=listing.etag, last_modified=listing.last_modified)
+
+        semaphore = asyncio.Semaphore(self.DETAIL_CONCURRENCY)
+
+        async def fetch_detail(job_id: str) -> RawJob | None:
+            async with semaphore:
+                return await self._fetch_job(client, identifier, job_id)
+
+        details = await asyncio.gather(*(fetch_detail(job_id) for job_id in stale_ids))
+        fetched = {job.external_id: job for job in details if job is not None}
 
-        data = response.json()
         jobs = []
+        for job in listed:
+            if job.external_id in fetched:
+                jobs.append(fetched[job.external_id])
+            elif _is_current(job, known):
+                jobs.append(replace(job, content_hash=known[job.external_id].content_hash))
+            # Otherwise the job vanished between the listing and its detail request
+
+        return FetchResult(jobs=jobs, etag=listing.etag, last_modified=listing.last_modified)
+
+    async def _fetch_job(
+        self, client: httpx.AsyncClient, identifier: str, job_id: str
+    ) -> RawJob | None:
+        """Fetch a single job with content, or None if it has been taken down."""
+        url = f"{self.BASE_URL}/{identifier}/jobs/{job_id}"
 
-        for job in data.get("jobs", []):
-            # Parse published_at datetime
-            published_at = None
-            if job.get("first_published"):
-                try:
-                    published_at = datetime.fromisoformat(
-                        job["first_published"].replace("Z", "+00:00")
-                    )
-                except (ValueError, TypeError):
-                    pass
-
-            # Get department from first department in list
-            department = None
-            if job.get("departments") and len(job["departments"]) > 0:
-                department = job["departments"][0].get("name")
-
-            jobs.append(
-                RawJob(
-                    external_id=str(job["id"]),
-                    title=job["title"],
-                    description_html=job.get("content"),
-                    description_plain=None,  # Greenhouse doesn't provide plain text
-                    department=department,
-                    location=job.get("location", {}).get("name"),
-                    job_url=job.get("absolute_url"),
-                    apply_url=job.get("absolute_url"),  # Same as job_url for Greenhouse
-                    published_at=published_at,
+        response = await self._send(client, client.build_request("GET", url))
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+
+        return self._load_job(response.json())
+
+    def _parse_job(self, job: dict) -> RawJob:
+        """Convert one Greenhouse job into a RawJob.
+
+        Listing entries fetched without content=true have no content or
+        departments, so those fields come back as None.
+        """
+        # Parse published_at datetime
+        published_at = None
+        if job.get("first_published"):
+            try:
+                published_at = datetime.fromisoformat(
+                    job["first_published"].replace("Z", "+00:00")
+                )
+            except (ValueError, TypeError):
+                pass
+
+        # Normalize updated_at to naive UTC so it compares equal to what we stored
+        updated_at = None
+        if job.get("updated_at"):
+            try:
+                updated_at = (
+                    datetime.fromisoformat(job["updated_at"].replace("Z", "+00:00"))
+                    .astimezone(UTC)
+                    .replace(tzinfo=None)
                 )
-            )
+            except (ValueError, TypeError):
+                pass
+
+        # Get department from first department in list
+        department = None
+        if job.get("departments") and len(job["departments"]) > 0:
+            department = job["departments"][0].get("name")
+
+        return RawJob(
+            external_id=str(job["id"]),
+            title=job["title"],
+            description_html=job.get("content"),
+            description_plain=None,  # Greenhouse doesn't provide plain text
+            department=department,
+            location=(job.get("location") or {}).get("name"),
+            job_url=job.get("absolute_url"),
+            apply_url=job.get("absolute_url"),  # Same as job_url for Greenhouse
+            published_at=published_at,
+            updated_at=updated_at,
+            **_structured_fields(job),
+        )
+
+
+def _structured_fields(job: dict) -> dict:
+    """Remote policy and salary from a job's custom metadata fields and offices.
+
+    Metadata fields are defined per board, so they are recognized by name:
+    a workplace or remote field, and a currency range naming a salary or pay.
+    Ranges below MIN_YEARLY_SALARY are taken to be hourly and ignored. A job
+    whose offices are all remote is remote.
+    """
+    fields = {}
+    for entry in job.get("metadata") or []:
+        name = (entry.get("name") or "").lower()
+        value = entry.get("value")
+
+        if entry.get("value_type") == "currency_range" and isinstance(value, dict):
+            if re.search(r"salary|compensation|pay", name):
+                low, high = parse_salary(value.get("min_value"), value.get("max_value"))
+                if low is not None and low >= MIN_YEARLY_SALARY:
+                    fields.update(salary_min=low, salary_max=high)
+                    fields["salary_currency"] = value.get("unit")
+        elif re.search(r"workplace|remote|location type|work type", name):
+            if value is True and "remote" in name:
+                fields["remote_policy"] = "remote"
+            elif isinstance(value, list):
+                policies = {parse_remote_policy(v) for v in value}
+                if len(policies) == 1 and None not in policies:
+                    fields["remote_policy"] = policies.pop()
+            elif (policy := parse_remote_policy(value)) is not None:
+                fields["remote_policy"] = policy
+        elif re.search(r"employment type|job type|commitment", name) and isinstance(value, str):
+            fields["employment_type"] = value
+
+    offices = [office.get("name") or "" for office in job.get("offices") or []]
+    if "remote_policy" not in fields and offices and all("remote" in o.lower() for o in offices):
+        fields["remote_policy"] = "remote"
+
+    return fields
+
 
-        return jobs
+def _is_current(job: RawJob, known: dict[str, KnownPosting]) -> bool:
+    """Whether our stored copy of a listed job is up to date."""
+    stored = known.get(job.external_id)
+    return (
+        stored is not None
+        and stored.content_hash is not None
+        and job.updated_at is not None
+        and stored.updated_at == job.updated_at
+    )
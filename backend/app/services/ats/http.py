@@ -0,0 +1,95 @@
+import threading
+from collections.abc import Coroutine
+from typing import TypeVar
+
+import httpx
+
+from app.config import settings
+from app.services.ats.resilience import CircuitBreaker
+from app.services.loop import BackgroundLoop
+
+T = TypeVar("T")
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(
+        settings.scrape_timeout_seconds,
+        connect=settings.scrape_connect_timeout_seconds,
+    )
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.scrape_max_connections,
+        max_keepalive_connections=settings.scrape_max_connections,
+        keepalive_expiry=settings.scrape_keepalive_seconds,
+    )
+
+
+class HttpPool:
+    """Long-lived HTTP clients shared by every ATS scraper.
+
+    Connections to the ATS hosts stay warm between scrapes, so repeated
+    scrapes skip the TCP and TLS handshakes. HTTP/2 lets concurrent requests
+    to the same host share one connection.
+
+    httpx.AsyncClient is tied to the event loop it first runs on, so the async
+    client lives on a dedicated background loop; run() executes scrape
+    coroutines there and blocks the calling thread until they finish.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop = BackgroundLoop("ats-http")
+        self._async_client: httpx.AsyncClient | None = None
+        self._client: httpx.Client | None = None
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def run(self, coro: Coroutine[object, object, T]) -> T:
+        """Run a coroutine on the pool's event loop and return its result."""
+        return self._loop.run(coro)
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        """The shared async client. Only use it from coroutines passed to run()."""
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                http2=settings.scrape_http2, timeout=_timeout(), limits=_limits()
+            )
+        return self._async_client
+
+    @property
+    def client(self) -> httpx.Client:
+        """The shared blocking client, for synchronous fetch_jobs calls."""
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(
+                    http2=settings.scrape_http2, timeout=_timeout(), limits=_limits()
+                )
+            return self._client
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        """The circuit breaker for an ATS host, shared by every scrape."""
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(
+                    host,
+                    failure_threshold=settings.scrape_breaker_failure_threshold,
+                    cooldown=settings.scrape_breaker_cooldown_seconds,
+                )
+            return self._breakers[host]
+
+    def close(self):
+        """Close both clients and stop the background loop."""
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+            if self._async_client is not None:
+                self._loop.run(self._async_client.aclose())
+                self._async_client = None
+            self._loop.stop()
+
+
+http_pool = HttpPool()
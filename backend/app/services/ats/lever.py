@@ -1,62 +1,149 @@
+import asyncio
+from collections.abc import AsyncIterator, Iterator
 from datetime import datetime
 
 import httpx
 
-from app.services.ats.base import BaseScraper, RawJob
+from app.services.ats.base import (
+    BaseScraper,
+    FetchResult,
+    KnownPosting,
+    RawJob,
+    parse_remote_policy,
+    parse_salary,
+)
 
 
 class LeverScraper(BaseScraper):
     """Scraper for Lever ATS."""
 
     BASE_URL = "https://api.lever.co/v0/postings"
+    host = "api.lever.co"
 
-    def fetch_jobs(self, identifier: str) -> list[RawJob]:
-        """Fetch all jobs from Lever.
+    # Lever returns a flat array, not wrapped in an object
+    PAYLOAD_KEY = None
+
+    # Postings per page; boards are read with skip/limit pagination
+    PAGE_SIZE = 100
+
+    # Pages requested at once during an async fetch
+    PAGE_CONCURRENCY = 4
+
+    def fetch_jobs(self, identifier: str) -> Iterator[RawJob]:
+        """Fetch all jobs from Lever, one page at a time.
 
         Args:
             identifier: Company identifier (e.g., 'mistral')
         """
         url = f"{self.BASE_URL}/{identifier}"
+        skip = 0
+
+        while True:
+            request = self.http.client.build_request(
+                "GET", url, params=self._page_params(skip)
+            )
+            response = self._send_sync(request)
+            response.raise_for_status()
+            page = response.json()
+
+            for job in page:
+                yield self._load_job(job)
+            if len(page) < self.PAGE_SIZE:
+                return
+            skip += self.PAGE_SIZE
+
+    async def fetch_board(
+        self,
+        identifier: str,
+        client: httpx.AsyncClient,
+        etag: str | None = None,
+        last_modified: str | None = None,
+        known: dict[str, KnownPosting] | None = None,
+    ) -> FetchResult:
+        """Fetch all jobs from Lever using a shared async client.
+
+        The first page is fetched up front so request errors surface before any
+        jobs are written. Later pages are fetched PAGE_CONCURRENCY at a time and
+        streamed in order, stopping at the first short page.
+
+        Validators are not sent: a 304 on the first page says nothing about the
+        rest of the board. Unchanged boards are still caught by the payload hash.
+        """
+        url = f"{self.BASE_URL}/{identifier}"
 
-        response = httpx.get(url, timeout=30.0)
+        first = await self._get_page(client, url, 0)
+        return FetchResult(jobs=self._stream_pages(client, url, first))
+
+    async def _stream_pages(
+        self, client: httpx.AsyncClient, url: str, first: list[dict]
+    ) -> AsyncIterator[RawJob]:
+        """Yield jobs page by page, requesting the following pages concurrently."""
+        pages = [first]
+        skip = self.PAGE_SIZE
+
+        while True:
+            for page in pages:
+                for job in page:
+                    yield self._load_job(job)
+                if len(page) < self.PAGE_SIZE:
+                    return
+
+            skips = [skip + i * self.PAGE_SIZE for i in range(self.PAGE_CONCURRENCY)]
+            pages = await asyncio.gather(*(self._get_page(client, url, s) for s in skips))
+            skip += self.PAGE_CONCURRENCY * self.PAGE_SIZE
+
+    async def _get_page(self, client: httpx.AsyncClient, url: str, skip: int) -> list[dict]:
+        """Fetch one page of postings."""
+        request = client.build_request("GET", url, params=self._page_params(skip))
+        response = await self._send(client, request)
         response.raise_for_status()
 
-        # Lever returns a flat array, not wrapped in an object
-        data = response.json()
-        jobs = []
-
-        for job in data:
-            # Parse createdAt timestamp (milliseconds)
-            published_at = None
-            if job.get("createdAt"):
-                try:
-                    published_at = datetime.fromtimestamp(job["createdAt"] / 1000)
-                except (ValueError, TypeError):
-                    pass
-
-            # Get department from categories.team
-            department = None
-            categories = job.get("categories", {})
-            if categories:
-                department = categories.get("team")
-
-            # Get location from categories.location
-            location = None
-            if categories:
-                location = categories.get("location")
-
-            jobs.append(
-                RawJob(
-                    external_id=job["id"],
-                    title=job["text"],
-                    description_html=job.get("description"),
-                    description_plain=job.get("descriptionPlain"),
-                    department=department,
-                    location=location,
-                    job_url=job.get("hostedUrl"),
-                    apply_url=job.get("applyUrl"),
-                    published_at=published_at,
-                )
-            )
+        return response.json()
+
+    def _page_params(self, skip: int) -> dict:
+        return {"skip": skip, "limit": self.PAGE_SIZE}
+
+    def _parse_job(self, job: dict) -> RawJob:
+        """Convert one Lever posting into a RawJob."""
+        # Parse createdAt timestamp (milliseconds)
+        published_at = None
+        if job.get("createdAt"):
+            try:
+                published_at = datetime.fromtimestamp(job["createdAt"] / 1000)
+            except (ValueError, TypeError):
+                pass
+
+        # Get department from categories.team
+        department = None
+        categories = job.get("categories", {})
+        if categories:
+            department = categories.get("team")
+
+        # Get location from categories.location
+        location = None
+        if categories:
+            location = categories.get("location")
+
+        # Only yearly salary ranges; Lever also has hourly and monthly ones
+        salary_min = salary_max = salary_currency = None
+        salary_range = job.get("salaryRange") or {}
+        if salary_range.get("interval") == "per-year-salary":
+            salary_min, salary_max = parse_salary(salary_range.get("min"), salary_range.get("max"))
+            salary_currency = salary_range.get("currency")
 
-        return jobs
+        return RawJob(
+            external_id=job["id"],
+            title=job["text"],
+            description_html=job.get("description"),
+            description_plain=job.get("descriptionPlain"),
+            department=department,
+            location=location,
+            job_url=job.get("hostedUrl"),
+            apply_url=job.get("applyUrl"),
+            published_at=published_at,
+            remote_policy=parse_remote_policy(job.get("workplaceType")),
+            employment_type=(categories or {}).get("commitment"),
+            salary_min=salary_min,
+            salary_max=salary_max,
+            salary_currency=salary_currency,
+        )
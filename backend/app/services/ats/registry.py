@@ -0,0 +1,32 @@
+from app.services.ats.ashby import AshbyScraper
+from app.services.ats.base import BaseScraper
+from app.services.ats.greenhouse import GreenhouseScraper
+from app.services.ats.http import HttpPool, http_pool
+from app.services.ats.lever import LeverScraper
+
+
+class ScraperRegistry:
+    """Long-lived scraper instances, one per ATS type, sharing one HTTP pool."""
+
+    def __init__(self, http: HttpPool):
+        self.http = http
+        self._scrapers: dict[str, BaseScraper] = {
+            "greenhouse": GreenhouseScraper(http),
+            "ashby": AshbyScraper(http),
+            "lever": LeverScraper(http),
+        }
+
+    def get(self, ats_type: str) -> BaseScraper:
+        """Get the scraper for an ATS type.
+
+        Raises:
+            ValueError: If the ATS type is not supported
+        """
+        scraper = self._scrapers.get(ats_type)
+        if not scraper:
+            raise ValueError(f"Unknown ATS type: {ats_type}")
+
+        return scraper
+
+
+registry = ScraperRegistry(http_pool)
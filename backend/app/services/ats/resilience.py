@@ -0,0 +1,126 @@
+import random
+import threading
+import time
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+from app.config import settings
+
+# Responses that mean the ATS is struggling rather than that the request is wrong
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Of those, the ones that count towards opening the breaker. A 429 only means we
+# are going too fast; the retry backoff (and Retry-After) deals with that.
+BREAKER_STATUSES = RETRY_STATUSES - {429}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request to an ATS host that keeps failing."""
+
+    def __init__(self, host: str):
+        self.host = host
+        super().__init__(f"Circuit open for {host}: too many recent failures")
+
+
+class CircuitBreaker:
+    """Per-host breaker that stops requests to an ATS host after repeated failures.
+
+    Closed: requests flow and consecutive failures are counted. After
+    failure_threshold of them the breaker opens and every request fails fast
+    with CircuitOpenError. Once cooldown seconds have passed a single trial
+    request is let through; success closes the breaker, failure reopens it.
+    The caller releases the trial slot however its request ends (see
+    release_trial), so a cancelled trial does not hold the breaker open.
+    """
+
+    def __init__(self, host: str, failure_threshold: int, cooldown: float):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def check(self) -> bool:
+        """Allow a request through, or raise CircuitOpenError.
+
+        Returns:
+            True if the request is the trial of an open breaker
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return False
+            if self._trial_in_flight or time.monotonic() - self.opened_at < self.cooldown:
+                raise CircuitOpenError(self.host)
+            self._trial_in_flight = True
+            return True
+
+    def release_trial(self):
+        """Let another trial through once the cooldown allows, if this one ended unrecorded."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+def is_retryable(response: httpx.Response) -> bool:
+    return response.status_code in RETRY_STATUSES
+
+
+def is_host_failure(response: httpx.Response) -> bool:
+    return response.status_code in BREAKER_STATUSES
+
+
+def retry_delay(attempt: int, response: httpx.Response | None = None) -> float:
+    """Seconds to wait before retry number attempt + 1.
+
+    Honors Retry-After when the ATS sends one, otherwise backs off
+    exponentially with jitter so concurrent scrapes don't retry in lockstep.
+    Either way the wait is capped at scrape_retry_max_delay_seconds.
+    """
+    cap = settings.scrape_retry_max_delay_seconds
+
+    retry_after = _retry_after(response) if response is not None else None
+    if retry_after is not None:
+        return min(retry_after, cap)
+
+    delay = min(settings.scrape_retry_base_delay_seconds * 2**attempt, cap)
+    return random.uniform(delay / 2, delay)
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    """Parse a Retry-After header given as seconds or as an HTTP date."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=UTC)
+    return max((retry_at - datetime.now(UTC)).total_seconds(), 0.0)
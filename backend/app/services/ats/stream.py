@@ -0,0 +1,150 @@
+import json
+
+_WHITESPACE = " \t\n\r"
+
+
+class JsonArrayStream:
+    """Incremental parser that yields the items of one JSON array as text arrives.
+
+    Handles a top-level array (key=None, as Lever returns) or an array stored
+    under a top-level object key (key="jobs", as Greenhouse and Ashby return).
+    Other top-level values are decoded and discarded. Only the item currently
+    being decoded is buffered, so memory is bounded by the largest single
+    item rather than the size of the payload.
+
+    Usage:
+        stream = JsonArrayStream(key="jobs")
+        for chunk in response.iter_text():
+            for item in stream.feed(chunk):
+                ...
+        stream.close()
+    """
+
+    def __init__(self, key: str | None = None):
+        self.key = key
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._closed = False
+        # start -> (object_key -> object_colon -> object_value -> object_next)* / items -> done
+        self._state = "start"
+        self._current_key: str | None = None
+
+    def feed(self, text: str) -> list:
+        """Add more of the document and return any array items completed by it."""
+        self._buf = self._buf[self._pos :] + text
+        self._pos = 0
+        return self._drain()
+
+    def close(self) -> list:
+        """Signal end of input and return any final items.
+
+        Raises:
+            ValueError: If the document ended before the array was complete
+        """
+        self._closed = True
+        items = self._drain()
+        if self._state != "done":
+            raise ValueError("Truncated JSON document: array not terminated")
+        return items
+
+    def _drain(self) -> list:
+        items = []
+
+        while True:
+            self._skip_whitespace()
+            if self._pos >= len(self._buf):
+                return items
+
+            char = self._buf[self._pos]
+            state = self._state
+
+            if state == "start":
+                if self.key is None and char == "[":
+                    self._state = "items_first"
+                elif self.key is not None and char == "{":
+                    self._state = "object_key_first"
+                else:
+                    raise ValueError(f"Unexpected {char!r} at start of JSON document")
+                self._pos += 1
+
+            elif state in ("object_key", "object_key_first"):
+                if char == "}" and state == "object_key_first":
+                    self._pos += 1
+                    self._state = "done"
+                    continue
+                key = self._decode()
+                if key is _INCOMPLETE:
+                    return items
+                self._current_key = key
+                self._state = "object_colon"
+
+            elif state == "object_colon":
+                self._expect(char, ":")
+                self._state = "object_value"
+
+            elif state == "object_value":
+                if self._current_key == self.key and char == "[":
+                    self._pos += 1
+                    self._state = "items_first"
+                    continue
+                if self._decode() is _INCOMPLETE:
+                    return items
+                self._state = "object_next"
+
+            elif state == "object_next":
+                if char == "}":
+                    self._pos += 1
+                    self._state = "done"
+                else:
+                    self._expect(char, ",")
+                    self._state = "object_key"
+
+            elif state in ("items", "items_first"):
+                if char == "]":
+                    self._pos += 1
+                    self._state = "done" if self.key is None else "object_next"
+                    continue
+                if state == "items":
+                    self._expect(char, ",")
+                    self._state = "item"
+                    continue
+                self._state = "item"
+
+            elif state == "item":
+                item = self._decode()
+                if item is _INCOMPLETE:
+                    return items
+                items.append(item)
+                self._state = "items"
+
+            elif state == "done":
+                raise ValueError(f"Unexpected {char!r} after end of JSON document")
+
+    def _skip_whitespace(self):
+        while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+            self._pos += 1
+
+    def _expect(self, char: str, expected: str):
+        if char != expected:
+            raise ValueError(f"Expected {expected!r} but found {char!r}")
+        self._pos += 1
+
+    def _decode(self):
+        """Decode one value at the cursor, or return _INCOMPLETE to wait for more text."""
+        try:
+            value, end = self._decoder.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            if self._closed:
+                raise
+            return _INCOMPLETE
+
+        # A number running to the end of the buffer may continue in the next chunk
+        if end == len(self._buf) and not self._closed:
+            return _INCOMPLETE
+
+        self._pos = end
+        return value
+
+
+_INCOMPLETE = object()
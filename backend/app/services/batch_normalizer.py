@@ -0,0 +1,335 @@
+import json
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Protocol
+
+from openai import OpenAI
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import NormalizationBatch
+from app.services.classifier import load_classifier
+from app.services.normalizer import (
+    NORMALIZE_MODEL,
+    build_input,
+    estimate_tokens,
+    get_client,
+    lease_pending_jobs,
+    parse_output,
+    record_result,
+    release_leases,
+    serve_from_cache,
+    serve_from_classifier,
+    text_format,
+)
+
+BATCH_ENDPOINT = "/v1/responses"
+
+# The provider's per-batch limits: requests, and the size of the JSONL input file
+# (200 MB, less headroom). Enqueued tokens are capped per account, see
+# settings.normalize_batch_max_tokens.
+MAX_BATCH_REQUESTS = 50_000
+MAX_BATCH_BYTES = 190 * 1024 * 1024
+
+# Jobs stay leased for the 24h completion window plus some slack, so streaming
+# workers leave them alone while the batch is out
+BATCH_LEASE_SECONDS = 26 * 3600
+
+# Provider batch states after which no more results will arrive
+FINISHED_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+@dataclass
+class BatchStatus:
+    """A provider batch's state, with its result lines once it has finished."""
+
+    status: str
+    results: list[dict] = field(default_factory=list)
+    error: str | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+
+class BatchTransport(Protocol):
+    """Submits request lines to a batch service and collects their results.
+
+    Request and result lines use the OpenAI Batch API's JSONL format.
+    """
+
+    def submit(self, requests: list[dict]) -> str:
+        """Submit request lines and return the provider's batch id."""
+        ...
+
+    def poll(self, batch_id: str) -> BatchStatus:
+        ...
+
+
+class OpenAIBatchTransport:
+    """The OpenAI Batch API: half the price of direct calls, results within 24h."""
+
+    def __init__(self, client: OpenAI | None = None):
+        self.client = client or get_client()
+
+    def submit(self, requests: list[dict]) -> str:
+        content = "\n".join(json.dumps(request) for request in requests).encode()
+        input_file = self.client.files.create(
+            file=("normalize.jsonl", content), purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h",
+        )
+        return batch.id
+
+    def poll(self, batch_id: str) -> BatchStatus:
+        batch = self.client.batches.retrieve(batch_id)
+        if batch.status not in FINISHED_STATUSES:
+            return BatchStatus(batch.status)
+
+        # Expired and cancelled batches still return whatever did complete
+        results = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                text = self.client.files.content(file_id).text
+                results += [json.loads(line) for line in text.splitlines() if line]
+
+        error = None
+        if batch.errors and batch.errors.data:
+            error = "; ".join(e.message or e.code or "" for e in batch.errors.data)
+
+        return BatchStatus(batch.status, results, error)
+
+
+class LocalBatchTransport:
+    """Runs each batch request immediately in-process, as a stand-in for a batch service.
+
+    respond receives a request body and returns a response body. By default it
+    calls the Responses API directly, which is useful for exercising the batch
+    path locally without waiting on the provider.
+    """
+
+    def __init__(self, respond: Callable[[dict], dict] | None = None):
+        self.respond = respond or _respond_directly
+        self.batches: dict[str, list[dict]] = {}
+
+    def submit(self, requests: list[dict]) -> str:
+        batch_id = f"local-{uuid.uuid4()}"
+        self.batches[batch_id] = [self._answer(request) for request in requests]
+        return batch_id
+
+    def poll(self, batch_id: str) -> BatchStatus:
+        return BatchStatus("completed", self.batches.pop(batch_id, []))
+
+    def _answer(self, request: dict) -> dict:
+        try:
+            body = self.respond(request["body"])
+        except Exception as e:
+            return {
+                "custom_id": request["custom_id"],
+                "response": None,
+                "error": {"message": str(e)},
+            }
+        return {
+            "custom_id": request["custom_id"],
+            "response": {"status_code": 200, "body": body},
+            "error": None,
+        }
+
+
+def get_batch_transport() -> BatchTransport:
+    """The transport selected by settings.normalize_batch_transport."""
+    if settings.normalize_batch_transport == "local":
+        return LocalBatchTransport()
+    if settings.normalize_batch_transport == "openai":
+        return OpenAIBatchTransport()
+    raise ValueError(f"Unknown batch transport: {settings.normalize_batch_transport}")
+
+
+def submit_normalization_batch(
+    db: Session, transport: BatchTransport, limit: int = MAX_BATCH_REQUESTS
+) -> dict | None:
+    """Lease up to limit pending jobs and submit them as one batch.
+
+    The batch is cut short where its input file or estimated tokens would go
+    over the provider's limits; the jobs past that are left for the next one.
+
+    Jobs whose input is already in the normalization cache, or that the
+    pre-classifier is confident about, are answered immediately and left out
+    of the batch.
+
+    Returns:
+        Dict with the batch id and counts, or None if no jobs were pending
+    """
+    batch_id = uuid.uuid4()
+    lease_owner = _lease_owner(batch_id)
+    leased = lease_pending_jobs(db, lease_owner, limit, BATCH_LEASE_SECONDS)
+    if not leased:
+        return None
+
+    answered = {"total": 0, "success": 0, "cached": 0, "classified": 0, "failed": 0, "errors": []}
+    misses = serve_from_cache(db, lease_owner, leased, answered)
+    if settings.classifier_enabled:
+        misses = serve_from_classifier(load_classifier(db), db, lease_owner, misses, answered)
+
+    # Cut the batch at the provider's input file size and enqueued token limits;
+    # jobs past the cut are released for the next batch
+    requests, batch_bytes, batch_tokens = [], 0, 0
+    for job_data in misses:
+        messages = build_input(job_data)
+        text = text_format(tuple(job_data.get("known") or ()))
+        request = {
+            "custom_id": job_data["id"],
+            "method": "POST",
+            "url": BATCH_ENDPOINT,
+            # The same request responses.parse would send, known fields left out
+            "body": {"model": NORMALIZE_MODEL, "input": messages, "text": text},
+        }
+        request_bytes = len(json.dumps(request).encode()) + 1  # One JSONL line
+        request_tokens = estimate_tokens(messages)
+        if requests and (
+            batch_bytes + request_bytes > MAX_BATCH_BYTES
+            or batch_tokens + request_tokens > settings.normalize_batch_max_tokens
+        ):
+            break
+        requests.append(request)
+        batch_bytes += request_bytes
+        batch_tokens += request_tokens
+
+    overflow = [job_data["id"] for job_data in misses[len(requests):]]
+    if overflow:
+        release_leases(db, lease_owner, overflow)
+    misses = misses[:len(requests)]
+    db.commit()
+
+    summary = {
+        "batch_id": None,
+        "jobs": len(misses),
+        "cached": answered["cached"],
+        "classified": answered["classified"],
+    }
+    if not misses:
+        return summary
+
+    try:
+        provider_batch_id = transport.submit(requests)
+    except Exception:
+        release_leases(db, lease_owner, [job_data["id"] for job_data in misses])
+        db.commit()
+        raise
+
+    db.add(NormalizationBatch(
+        id=batch_id,
+        provider_batch_id=provider_batch_id,
+        status="submitted",
+        requests={job_data["id"]: job_data["cache_key"] for job_data in misses},
+        job_count=len(misses),
+    ))
+    db.commit()
+
+    summary["batch_id"] = str(batch_id)
+    return summary
+
+
+def poll_normalization_batches(db: Session, transport: BatchTransport) -> dict:
+    """Check every open batch once and apply the results of those that finished.
+
+    Returns:
+        Dict with the number of batches still open and totals applied
+    """
+    totals = {"open": 0, "applied": 0, "success": 0, "failed": 0}
+    batches = (
+        db.query(NormalizationBatch)
+        .filter(NormalizationBatch.status == "submitted")
+        .order_by(NormalizationBatch.submitted_at)
+        .all()
+    )
+
+    for batch in batches:
+        status = transport.poll(batch.provider_batch_id)
+        batch.provider_status = status.status
+
+        if not status.finished:
+            totals["open"] += 1
+            db.commit()
+            continue
+
+        results = apply_batch_results(db, batch, status)
+        totals["applied"] += 1
+        totals["success"] += results["success"]
+        totals["failed"] += results["failed"]
+
+    return totals
+
+
+def apply_batch_results(db: Session, batch: NormalizationBatch, status: BatchStatus) -> dict:
+    """Bulk-apply a finished batch's results and release jobs it never answered.
+
+    Results for jobs whose batch lease ran out before the batch finished are
+    dropped (see record_result).
+    """
+    results = {"total": 0, "success": 0, "cached": 0, "failed": 0, "errors": []}
+    answered = set()
+
+    for line in status.results:
+        job_id = line.get("custom_id")
+        if job_id not in batch.requests or job_id in answered:
+            continue
+        answered.add(job_id)
+        record_result(
+            db,
+            _lease_owner(batch.id),
+            _parse_result(line),
+            results,
+            {"cache_key": batch.requests[job_id]},
+        )
+
+    unanswered = [job_id for job_id in batch.requests if job_id not in answered]
+    if unanswered:
+        release_leases(db, _lease_owner(batch.id), unanswered)
+
+    batch.status = "completed" if status.status == "completed" else "failed"
+    batch.succeeded = results["success"]
+    batch.failed = results["failed"]
+    batch.error_message = status.error
+    batch.completed_at = datetime.utcnow()
+    db.commit()
+
+    return results
+
+
+def _lease_owner(batch_id: uuid.UUID) -> str:
+    """The lease owner a batch's jobs are held under."""
+    return f"batch:{batch_id}"
+
+
+def _parse_result(line: dict) -> dict:
+    """Turn one batch result line into the normalizer's per-job result."""
+    job_id = line["custom_id"]
+    response = line.get("response") or {}
+
+    if line.get("error") or response.get("status_code") != 200:
+        error = line.get("error") or response.get("body", {}).get("error") or {}
+        return {"job_id": job_id, "status": "failed", "error": error.get("message", str(error))}
+
+    try:
+        text = next(
+            content["text"]
+            for item in response["body"].get("output", [])
+            if item.get("type") == "message"
+            for content in item.get("content", [])
+            if content.get("type") == "output_text"
+        )
+        data = parse_output(text)
+    except Exception as e:
+        return {"job_id": job_id, "status": "failed", "error": f"Unparseable response: {e}"}
+
+    return {"job_id": job_id, "status": "success", "data": data}
+
+
+def _respond_directly(body: dict) -> dict:
+    return get_client().responses.create(**body).model_dump(mode="json")
@@ -0,0 +1,483 @@
+import io
+import json
+import random
+import re
+from collections import Counter
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import ClassifierModel, Company, JobPosting
+from app.services.preprocess import posting_text
+from app.services.prompt_budget import split_sections
+
+# NormalizedJob fields the classifier predicts. A posting skips the LLM only when
+# every one of them is predicted with at least settings.classifier_min_confidence.
+CLASSIFIED_FIELDS = ("seniority", "function", "is_leadership", "remote_policy")
+
+# Vocabulary: terms must appear in this many training postings, and only the most
+# common are kept. Only the start of each description is used; the title,
+# department and location carry most of the signal.
+MIN_TERM_POSTINGS = 2
+MAX_FEATURES = 20_000
+DESCRIPTION_WORDS = 150
+
+# Softmax regression, trained full-batch with Adam
+TRAIN_EPOCHS = 150
+LEARNING_RATE = 0.1
+L2_PENALTY = 1e-4
+
+# Held out from training: a slice to calibrate confidences on, and a slice to
+# report accuracy on
+CALIBRATION_FRACTION = 0.1
+HOLDOUT_FRACTION = 0.2
+
+# tech_stack and keywords labels the LLM has given at least this often are
+# recognized in the text of classified postings
+MIN_TERM_LABELS = 3
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+_YEARS = re.compile(r"(\d{1,2})\+?\s*(?:years|yrs)", re.IGNORECASE)
+
+# The newest trained model, reloaded when a newer one is saved
+_loaded: tuple[object, "PreClassifier"] | None = None
+
+
+def tokens(job_data: dict) -> list[str]:
+    """Features of a posting: words of each field, prefixed by where they came from."""
+    title = _WORD.findall((job_data.get("title") or "").lower())
+    features = [f"t:{word}" for word in title]
+    features += [f"t:{a}_{b}" for a, b in zip(title, title[1:])]
+    features += [f"d:{word}" for word in _WORD.findall((job_data.get("department") or "").lower())]
+    features += [f"l:{word}" for word in _WORD.findall((job_data.get("location") or "").lower())]
+    description = _WORD.findall((job_data.get("description") or "").lower())
+    features += [f"x:{word}" for word in description[:DESCRIPTION_WORDS]]
+    return features
+
+
+class SparseRows:
+    """Rows of a sparse matrix in CSR form, with the two products training needs."""
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, data: np.ndarray, width: int):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.width = width
+        self.rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    def dot(self, weights: np.ndarray) -> np.ndarray:
+        """self @ weights, for dense weights of shape (width, k)."""
+        products = self.data[:, None] * weights[self.indices]
+        return np.stack(
+            [np.bincount(self.rows, products[:, k], len(self)) for k in range(weights.shape[1])],
+            axis=1,
+        )
+
+    def transpose_dot(self, grad: np.ndarray) -> np.ndarray:
+        """self.T @ grad, for dense grad of shape (len(self), k)."""
+        weighted = self.data[:, None] * grad[self.rows]
+        return np.stack(
+            [np.bincount(self.indices, weighted[:, k], self.width) for k in range(grad.shape[1])],
+            axis=1,
+        )
+
+    def take(self, row_ids: np.ndarray) -> "SparseRows":
+        starts, ends = self.indptr[row_ids], self.indptr[row_ids + 1]
+        spans = [np.arange(s, e) for s, e in zip(starts, ends)]
+        picked = np.concatenate(spans) if spans else np.array([], dtype=int)
+        indptr = np.concatenate([[0], np.cumsum(ends - starts)])
+        return SparseRows(indptr, self.indices[picked], self.data[picked], self.width)
+
+
+class TfidfVectorizer:
+    """Sublinear TF-IDF over posting tokens, L2-normalized per posting."""
+
+    def __init__(self, vocabulary: dict[str, int], idf: np.ndarray):
+        self.vocabulary = vocabulary
+        self.idf = idf
+
+    @classmethod
+    def fit(cls, documents: list[list[str]]) -> "TfidfVectorizer":
+        postings = Counter(term for doc in documents for term in set(doc))
+        terms = [t for t, n in postings.most_common(MAX_FEATURES) if n >= MIN_TERM_POSTINGS]
+        vocabulary = {term: i for i, term in enumerate(sorted(terms))}
+        counts = np.array([postings[term] for term in sorted(terms)], dtype=float)
+        idf = np.log((1 + len(documents)) / (1 + counts)) + 1
+        return cls(vocabulary, idf)
+
+    def transform(self, documents: list[list[str]]) -> SparseRows:
+        indptr, indices, data = [0], [], []
+        for doc in documents:
+            counts = Counter(self.vocabulary[t] for t in doc if t in self.vocabulary)
+            ids = np.fromiter(counts.keys(), dtype=int, count=len(counts))
+            values = (1 + np.log(np.fromiter(counts.values(), dtype=float, count=len(counts))))
+            values *= self.idf[ids]
+            norm = np.linalg.norm(values)
+            indices.extend(ids)
+            data.extend(values / norm if norm else values)
+            indptr.append(len(indices))
+
+        return SparseRows(
+            np.array(indptr), np.array(indices, dtype=int), np.array(data), len(self.vocabulary)
+        )
+
+
+class SoftmaxClassifier:
+    """Multinomial logistic regression with a temperature for calibrated confidences."""
+
+    def __init__(
+        self, labels: list, weights: np.ndarray, bias: np.ndarray, temperature: float = 1.0
+    ):
+        self.labels = labels
+        self.weights = weights
+        self.bias = bias
+        self.temperature = temperature
+
+    @classmethod
+    def fit(cls, x: SparseRows, y: list) -> "SoftmaxClassifier":
+        labels = sorted(set(y), key=str)
+        targets = np.zeros((len(y), len(labels)))
+        targets[np.arange(len(y)), [labels.index(label) for label in y]] = 1
+
+        model = cls(labels, np.zeros((x.width, len(labels))), np.zeros(len(labels)))
+        params = [model.weights, model.bias]
+        moments = [(np.zeros_like(p), np.zeros_like(p)) for p in params]
+
+        for step in range(1, TRAIN_EPOCHS + 1):
+            error = (model._softmax(x.dot(model.weights) + model.bias) - targets) / len(y)
+            grads = [x.transpose_dot(error) + L2_PENALTY * model.weights, error.sum(axis=0)]
+
+            # Adam
+            for param, grad, (m, v) in zip(params, grads, moments):
+                m *= 0.9
+                m += 0.1 * grad
+                v *= 0.999
+                v += 0.001 * grad**2
+                param -= LEARNING_RATE * (m / (1 - 0.9**step)) / (
+                    np.sqrt(v / (1 - 0.999**step)) + 1e-8
+                )
+
+        return model
+
+    def calibrate(self, x: SparseRows, y: list):
+        """Pick the temperature that minimizes log loss on held-out postings."""
+        known = [i for i, label in enumerate(y) if label in self.labels]
+        if not known:
+            return
+
+        logits = x.take(np.array(known)).dot(self.weights) + self.bias
+        truth = np.array([self.labels.index(y[i]) for i in known])
+        best = None
+        for temperature in np.exp(np.linspace(np.log(0.25), np.log(4), 41)):
+            probs = self._softmax(logits / temperature)
+            loss = -np.log(probs[np.arange(len(truth)), truth] + 1e-12).mean()
+            if best is None or loss < best[0]:
+                best = (loss, temperature)
+        self.temperature = float(best[1])
+
+    def predict(self, x: SparseRows) -> tuple[list, np.ndarray]:
+        """Most likely label and its calibrated probability, per row."""
+        probs = self._softmax((x.dot(self.weights) + self.bias) / self.temperature)
+        best = probs.argmax(axis=1)
+        return [self.labels[i] for i in best], probs[np.arange(len(best)), best]
+
+    @staticmethod
+    def _softmax(logits: np.ndarray) -> np.ndarray:
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return exp / exp.sum(axis=1, keepdims=True)
+
+
+class PreClassifier:
+    """Predicts the easy NormalizedJob fields locally, so confident postings skip the LLM.
+
+    The remaining fields of a classified posting are filled without a model:
+    the title minus its location, tech stack and keywords the LLM has used
+    before that appear in the text, and years of experience when stated.
+    Team area and notable signals are left unknown. Salary only comes from
+    the ATS, so a posting whose description states one the ATS does not
+    supply still goes to the LLM, however confident the classifier is.
+    """
+
+    def __init__(
+        self,
+        vectorizer: TfidfVectorizer,
+        models: dict[str, SoftmaxClassifier],
+        tech_terms: list[str],
+        keyword_terms: list[str],
+    ):
+        self.vectorizer = vectorizer
+        self.models = models
+        self.tech_terms = tech_terms
+        self.keyword_terms = keyword_terms
+        self._tech = _term_pattern(tech_terms)
+        self._keywords = _term_pattern(keyword_terms)
+
+    def predict(self, jobs: list[dict]) -> list[tuple[dict, float]]:
+        """Classified fields and the lowest of their confidences, per job."""
+        x = self.vectorizer.transform([tokens(job) for job in jobs])
+        predictions = {field: self.models[field].predict(x) for field in CLASSIFIED_FIELDS}
+
+        return [
+            (
+                {field: predictions[field][0][i] for field in CLASSIFIED_FIELDS},
+                float(min(predictions[field][1][i] for field in CLASSIFIED_FIELDS)),
+            )
+            for i in range(len(jobs))
+        ]
+
+    def normalize(self, jobs: list[dict], min_confidence: float) -> list[dict | None]:
+        """Full NormalizedJob data for each job that can skip the LLM (None for the rest)."""
+        results = []
+        for job, (fields, confidence) in zip(jobs, self.predict(jobs)):
+            if confidence < min_confidence or _states_salary(job):
+                results.append(None)
+                continue
+
+            text = f"{job['title']}\n{job.get('description') or ''}"
+            years = _YEARS.search(job.get("description") or "")
+            results.append({
+                "normalized_title": _clean_title(job["title"], job.get("location")),
+                **fields,
+                "team_area": "unknown",
+                "experience_years_min": int(years.group(1)) if years else None,
+                "tech_stack": _find_terms(self._tech, self.tech_terms, text),
+                "keywords": _find_terms(self._keywords, self.keyword_terms, text),
+                "notable_signals": [],
+                "salary_min": None,
+                "salary_max": None,
+                "salary_currency": None,
+            })
+        return results
+
+    def to_bytes(self) -> bytes:
+        arrays = {"idf": self.vectorizer.idf}
+        meta = {
+            "vocabulary": self.vectorizer.vocabulary,
+            "tech_terms": self.tech_terms,
+            "keyword_terms": self.keyword_terms,
+            "models": {},
+        }
+        for field, model in self.models.items():
+            arrays[f"{field}.weights"] = model.weights
+            arrays[f"{field}.bias"] = model.bias
+            meta["models"][field] = {"labels": model.labels, "temperature": model.temperature}
+
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, meta=np.array(json.dumps(meta)), **arrays)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "PreClassifier":
+        arrays = np.load(io.BytesIO(blob))
+        meta = json.loads(str(arrays["meta"]))
+        models = {
+            field: SoftmaxClassifier(
+                spec["labels"],
+                arrays[f"{field}.weights"],
+                arrays[f"{field}.bias"],
+                spec["temperature"],
+            )
+            for field, spec in meta["models"].items()
+        }
+        return cls(
+            TfidfVectorizer(meta["vocabulary"], arrays["idf"]),
+            models,
+            meta["tech_terms"],
+            meta["keyword_terms"],
+        )
+
+
+def train_classifier(db: Session, min_confidence: float | None = None) -> dict:
+    """Train on LLM-normalized postings, report held-out accuracy and save the model.
+
+    Only postings the LLM normalized are used, never ones the classifier
+    filled in itself. A fixed share is held out: part calibrates the
+    confidences, the rest measures accuracy.
+
+    Returns:
+        Dict with the accuracy report
+    """
+    min_confidence = min_confidence or settings.classifier_min_confidence
+    jobs = _labeled_jobs(db)
+    if len(jobs) < settings.classifier_min_training_jobs:
+        return {
+            "status": "skipped",
+            "reason": f"Only {len(jobs)} LLM-normalized postings to train on",
+        }
+
+    random.Random(0).shuffle(jobs)
+    n_holdout = int(len(jobs) * HOLDOUT_FRACTION)
+    n_calibration = int(len(jobs) * CALIBRATION_FRACTION)
+    holdout = jobs[:n_holdout]
+    calibration = jobs[n_holdout:n_holdout + n_calibration]
+    train = jobs[n_holdout + n_calibration:]
+
+    train_tokens = [tokens(job) for job in train]
+    vectorizer = TfidfVectorizer.fit(train_tokens)
+    x_train = vectorizer.transform(train_tokens)
+    x_calibration = vectorizer.transform([tokens(job) for job in calibration])
+
+    models = {}
+    for field in CLASSIFIED_FIELDS:
+        models[field] = SoftmaxClassifier.fit(x_train, [job[field] for job in train])
+        models[field].calibrate(x_calibration, [job[field] for job in calibration])
+
+    classifier = PreClassifier(
+        vectorizer,
+        models,
+        _common_terms(train, "tech_stack"),
+        _common_terms(train, "keywords"),
+    )
+    report = accuracy_report(classifier, holdout, min_confidence)
+    report["trained_on"] = len(train)
+
+    db.add(ClassifierModel(
+        training_jobs=len(train),
+        report=report,
+        weights=classifier.to_bytes(),
+    ))
+    db.commit()
+
+    return {"status": "trained", **report}
+
+
+def accuracy_report(classifier: PreClassifier, jobs: list[dict], min_confidence: float) -> dict:
+    """Accuracy against LLM labels, overall and on the postings confident enough to skip it.
+
+    Coverage counts confidence alone; postings stating a salary the ATS does
+    not supply go to the LLM anyway.
+    """
+    predictions = classifier.predict(jobs)
+    confident = [i for i, (_, confidence) in enumerate(predictions) if confidence >= min_confidence]
+
+    def accuracy(field: str, rows: list[int]) -> float | None:
+        if not rows:
+            return None
+        correct = sum(predictions[i][0][field] == jobs[i][field] for i in rows)
+        return round(correct / len(rows), 4)
+
+    everyone = list(range(len(jobs)))
+    return {
+        "holdout": len(jobs),
+        "min_confidence": min_confidence,
+        "coverage": round(len(confident) / len(jobs), 4) if jobs else 0.0,
+        "fields": {
+            field: {
+                "accuracy": accuracy(field, everyone),
+                "confident_accuracy": accuracy(field, confident),
+            }
+            for field in CLASSIFIED_FIELDS
+        },
+        "confident_all_correct": (
+            round(
+                sum(
+                    all(predictions[i][0][f] == jobs[i][f] for f in CLASSIFIED_FIELDS)
+                    for i in confident
+                ) / len(confident),
+                4,
+            )
+            if confident
+            else None
+        ),
+    }
+
+
+def load_classifier(db: Session) -> PreClassifier | None:
+    """The newest trained classifier, or None if none has been trained."""
+    global _loaded
+    latest_id = (
+        db.query(ClassifierModel.id).order_by(ClassifierModel.created_at.desc()).limit(1).scalar()
+    )
+    if latest_id is None:
+        return None
+
+    if _loaded is None or _loaded[0] != latest_id:
+        weights = db.query(ClassifierModel.weights).filter(ClassifierModel.id == latest_id).scalar()
+        _loaded = (latest_id, PreClassifier.from_bytes(weights))
+    return _loaded[1]
+
+
+def _labeled_jobs(db: Session) -> list[dict]:
+    rows = (
+        db.query(
+            Company.name,
+            JobPosting.title_raw,
+            JobPosting.department_raw,
+            JobPosting.location_raw,
+            JobPosting.description_html,
+            JobPosting.description_plain,
+            JobPosting.description_text,
+            *(getattr(JobPosting, field) for field in CLASSIFIED_FIELDS),
+            JobPosting.tech_stack,
+            JobPosting.keywords,
+        )
+        .join(Company, Company.id == JobPosting.company_id)
+        .filter(
+            JobPosting.normalized_at.isnot(None),
+            JobPosting.normalized_by.is_distinct_from("classifier"),
+            *(getattr(JobPosting, field).isnot(None) for field in CLASSIFIED_FIELDS),
+        )
+        .order_by(JobPosting.id)
+        .all()
+    )
+
+    return [
+        {
+            "company_name": row.name,
+            "title": row.title_raw,
+            "department": row.department_raw,
+            "location": row.location_raw,
+            "description": row.description_text
+            or posting_text(row.description_html, row.description_plain),
+            **{field: getattr(row, field) for field in CLASSIFIED_FIELDS},
+            "tech_stack": row.tech_stack or [],
+            "keywords": row.keywords or [],
+        }
+        for row in rows
+    ]
+
+
+def _common_terms(jobs: list[dict], field: str) -> list[str]:
+    counts = Counter(term.strip() for job in jobs for term in job[field] if term.strip())
+    return sorted(term for term, n in counts.items() if n >= MIN_TERM_LABELS)
+
+
+def _term_pattern(terms: list[str]) -> re.Pattern | None:
+    if not terms:
+        return None
+    # Longest first, so "PyTorch Lightning" wins over "PyTorch"
+    alternation = "|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True))
+    return re.compile(rf"(?<![\w+#])(?:{alternation})(?![\w+#])", re.IGNORECASE)
+
+
+def _find_terms(pattern: re.Pattern | None, terms: list[str], text: str) -> list[str]:
+    if pattern is None:
+        return []
+    canonical = {term.lower(): term for term in terms}
+    found = {canonical[m.group(0).lower()] for m in pattern.finditer(text)}
+    return sorted(found)
+
+
+def _clean_title(title: str, location: str | None) -> str:
+    """The title without a trailing location, e.g. "Engineer - New York" -> "Engineer"."""
+    location_words = set(_WORD.findall((location or "").lower()))
+    cleaned = title.strip()
+
+    while True:
+        suffix = re.search(r"(?:\s+[-–|]\s+|,\s*|\s*\()([^-–|,(]*?)\)?$", cleaned)
+        words = set(_WORD.findall(suffix.group(1).lower())) if suffix else set()
+        if not words or not words <= location_words:
+            return cleaned[:255]
+        cleaned = cleaned[:suffix.start()].strip()
+
+
+def _states_salary(job: dict) -> bool:
+    """Whether the description has a pay section the ATS has not supplied the salary of."""
+    if "salary_min" in (job.get("known") or ()):
+        return False
+    sections = split_sections(job.get("description") or "")
+    return any(section.kind == "compensation" for section in sections)
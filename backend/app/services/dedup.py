@@ -0,0 +1,98 @@
+import hashlib
+import random
+import re
+from collections import defaultdict
+from collections.abc import Hashable
+
+# MinHash signature length, split into BANDS bands of ROWS for LSH. Two documents
+# share a band (and get compared) with probability ~1 - (1 - J^ROWS)^BANDS, which
+# is >99% at the Jaccard similarity we treat as a duplicate.
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+# Word shingle size, and the estimated Jaccard similarity above which two
+# descriptions count as the same posting
+SHINGLE_SIZE = 5
+SIMILARITY_THRESHOLD = 0.8
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)
+]
+_WORD = re.compile(r"\w+")
+
+Signature = tuple[int, ...]
+
+
+def shingles(text: str) -> set[str]:
+    """Lowercased word n-grams of text (the whole text if it is shorter than one)."""
+    words = _WORD.findall(text.lower())
+    if len(words) <= SHINGLE_SIZE:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text: str) -> Signature:
+    """MinHash signature of text's shingles."""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big")
+        for s in shingles(text)
+    ]
+    return tuple(min([(a * h + b) % _PRIME for h in hashes]) for a, b in _PERMUTATIONS)
+
+
+def similarity(a: Signature, b: Signature) -> float:
+    """Estimated Jaccard similarity of the documents behind two signatures."""
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+class NearDuplicateIndex:
+    """In-process MinHash LSH index for finding near-duplicate documents.
+
+    Documents are partitioned by an exact group key (e.g. company and title),
+    and only documents in the same group are ever matched.
+
+    Usage:
+        index = NearDuplicateIndex()
+        signature = minhash(description)
+        original = index.query(group, signature)
+        if original is None:
+            index.add(job_id, group, signature)
+    """
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self._buckets: dict[tuple, list[str]] = defaultdict(list)
+        self._entries: dict[str, tuple[Hashable, Signature]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, key: str, group: Hashable, signature: Signature):
+        self._entries[key] = (group, signature)
+        for band in _bands(signature):
+            self._buckets[(group, band)].append(key)
+
+    def remove(self, key: str):
+        group, signature = self._entries.pop(key)
+        for band in _bands(signature):
+            self._buckets[(group, band)].remove(key)
+
+    def query(self, group: Hashable, signature: Signature) -> str | None:
+        """The most similar indexed document at or above the threshold, if any."""
+        best, best_similarity = None, self.threshold
+        candidates = {
+            key for band in _bands(signature) for key in self._buckets.get((group, band), ())
+        }
+
+        for key in sorted(candidates):
+            score = similarity(signature, self._entries[key][1])
+            if score >= best_similarity:
+                best, best_similarity = key, score
+        return best
+
+
+def _bands(signature: Signature) -> list[tuple]:
+    return [(i, signature[i * ROWS:(i + 1) * ROWS]) for i in range(BANDS)]
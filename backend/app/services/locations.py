@@ -0,0 +1,236 @@
+import csv
+import re
+import unicodedata
+from collections import defaultdict
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from pathlib import Path
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.models import JobPosting
+
+# Cities, regions and countries location strings are resolved against: one row
+# per place, with its ISO country code, and "|"-separated aliases
+GAZETTEER_PATH = Path(__file__).resolve().parent.parent / "data" / "gazetteer.csv"
+
+# Words that make a location remote rather than name a place
+REMOTE_WORDS = frozenset({"remote", "anywhere", "distributed", "wfh", "virtual"})
+
+# Separate locations, e.g. "San Francisco, CA | New York, NY" or "SF or NYC"
+_SEGMENT = re.compile(r"[|;/\n•·+]|\s(?:or|and|&)\s|&")
+# Separate the parts of one location, e.g. "Remote - US" or "Hybrid (London)"
+_PART = re.compile(r"[,()\[\]:–—]|\s-|-\s")
+_WORD = re.compile(r"[a-z0-9]+")
+_WORK_FROM_HOME = re.compile(r"work(ing)? from home")
+
+# When a name is also a code ("CA", "IN"), a lone code is read as a country
+_NAME_PREFERENCE = {"city": 0, "region": 1, "country": 2}
+_CODE_PREFERENCE = {"country": 0, "region": 1}
+
+
+@dataclass(frozen=True)
+class Place:
+    kind: str  # city, region, country
+    name: str
+    code: str  # ISO code of a country, postal code of a region
+    country: str
+    region: str
+
+
+@dataclass(frozen=True)
+class ParsedLocation:
+    cities: tuple[str, ...] = ()
+    countries: tuple[str, ...] = ()  # ISO 3166 alpha-2
+    remote: bool = False
+
+
+@dataclass
+class _Gazetteer:
+    names: dict[str, list[Place]]  # place names and aliases
+    codes: dict[str, list[Place]]  # region and country codes
+    max_words: int
+
+
+@lru_cache(maxsize=1)
+def _gazetteer() -> _Gazetteer:
+    names: dict[str, list[Place]] = defaultdict(list)
+    codes: dict[str, list[Place]] = defaultdict(list)
+    with open(GAZETTEER_PATH, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            place = Place(row["kind"], row["name"], row["code"], row["country"], row["region"])
+            for alias in [row["name"], *filter(None, row["aliases"].split("|"))]:
+                names[_key(alias)].append(place)
+            if place.code:
+                codes[_key(place.code)].append(place)
+
+    for places in names.values():
+        places.sort(key=lambda p: _NAME_PREFERENCE[p.kind])
+    for places in codes.values():
+        places.sort(key=lambda p: _CODE_PREFERENCE[p.kind])
+    return _Gazetteer(dict(names), dict(codes), max(len(key.split()) for key in names))
+
+
+@lru_cache(maxsize=4096)
+def parse_location(raw: str | None) -> ParsedLocation:
+    """Cities, countries and remote flag of a free-text ATS location.
+
+    Handles multi-location strings ("San Francisco, CA | New York City, NY |
+    Remote"). A region or country following a city qualifies it rather than
+    adding a location, which is also how ambiguous cities are told apart
+    ("Cambridge, MA" vs "Cambridge, UK"); unqualified, the gazetteer's first
+    entry wins. A region following a city the gazetteer doesn't list there
+    places the city in that region ("Dublin, CA" is Dublin, US - see
+    _region_for); any other code that doesn't qualify the city is dropped, as
+    are words that match no place.
+
+    The last 4096 distinct strings parsed are cached - a company lists the
+    same few locations on most of its postings.
+    """
+    if not raw:
+        return ParsedLocation()
+
+    text = unicodedata.normalize("NFKD", raw).encode("ascii", "ignore").decode().lower()
+    text = _WORK_FROM_HOME.sub("remote", text.replace(".", ""))
+
+    places: list[Place] = []
+    remote = False
+    for segment in _SEGMENT.split(text):
+        # Candidates for the last city named, until something other than a qualifier follows
+        pending: list[Place] = []
+        for part in _PART.split(segment):
+            words = _WORD.findall(part)
+            if REMOTE_WORDS.intersection(words):
+                remote = True
+                words = [w for w in words if w not in REMOTE_WORDS]
+
+            for candidates, by_code in _match(words):
+                qualified = _qualified(pending, candidates)
+                if qualified:
+                    pending = qualified
+                    continue
+                region = _region_for(pending, candidates) if pending else None
+                if region is not None:
+                    pending = [replace(pending[0], country=region.country, region=region.code)]
+                    continue
+                if pending and by_code:
+                    continue
+                if pending:
+                    places.append(pending[0])
+                if candidates[0].kind == "city":
+                    pending = [p for p in candidates if p.kind == "city"]
+                else:
+                    pending = []
+                    places.append(candidates[0])
+        if pending:
+            places.append(pending[0])
+
+    cities = [p.name for p in places if p.kind == "city"]
+    countries = [p.code if p.kind == "country" else p.country for p in places]
+    return ParsedLocation(tuple(dict.fromkeys(cities)), tuple(dict.fromkeys(countries)), remote)
+
+
+def location_columns(raw: str | None) -> dict:
+    """JobPosting's parsed location columns for a location_raw."""
+    parsed = parse_location(raw)
+    return {
+        "location_cities": list(parsed.cities),
+        "location_countries": list(parsed.countries),
+        "location_remote": parsed.remote,
+    }
+
+
+def parse_pending_locations(db: Session, reparse: bool = False) -> dict:
+    """Fill in the parsed location of postings stored without one.
+
+    New and edited postings are parsed as they are scraped; this covers those
+    scraped before, and with reparse=True re-parses every posting after the
+    gazetteer has changed. Each distinct location string is parsed once.
+
+    Returns:
+        Dict with distinct location strings and postings updated
+    """
+    query = select(JobPosting.id, JobPosting.location_raw)
+    if not reparse:
+        query = query.where(JobPosting.location_remote.is_(None))
+
+    ids_by_location: dict[str | None, list] = defaultdict(list)
+    for job_id, location_raw in db.execute(query):
+        ids_by_location[location_raw].append(job_id)
+
+    for location_raw, ids in ids_by_location.items():
+        db.execute(
+            update(JobPosting)
+            .where(JobPosting.id.in_(ids))
+            .values(**location_columns(location_raw)),
+            execution_options={"synchronize_session": False},
+        )
+    db.commit()
+
+    return {
+        "locations": len(ids_by_location),
+        "updated": sum(len(ids) for ids in ids_by_location.values()),
+    }
+
+
+def _match(words: list[str]) -> list[tuple[list[Place], bool]]:
+    """Candidate places for each place named in words, longest name first.
+
+    Each comes with whether it was matched by its code. A region or country
+    code only counts as one when it makes up the whole part or directly
+    follows a city, so "in" or "or" in running text is not read as India or
+    Oregon.
+    """
+    gazetteer = _gazetteer()
+    matches = []
+    after_city = False
+    i = 0
+    while i < len(words):
+        for length in range(min(gazetteer.max_words, len(words) - i), 0, -1):
+            key = " ".join(words[i:i + length])
+            candidates = gazetteer.names.get(key)
+            by_code = candidates is None
+            if by_code and length == 1 and (len(words) == 1 or after_city):
+                candidates = gazetteer.codes.get(key)
+            if candidates:
+                matches.append((candidates, by_code))
+                after_city = candidates[0].kind == "city"
+                i += length
+                break
+        else:
+            after_city = False
+            i += 1
+    return matches
+
+
+def _qualified(cities: list[Place], candidates: list[Place]) -> list[Place]:
+    """The cities that candidates name the region or country of."""
+    return [
+        city for city in cities
+        if any(
+            (p.kind == "region" and (p.code, p.country) == (city.region, city.country))
+            or (p.kind == "country" and p.code == city.country)
+            for p in candidates
+        )
+    ]
+
+
+def _region_for(cities: list[Place], candidates: list[Place]) -> Place | None:
+    """The region candidates name for cities the gazetteer doesn't list in it, if any.
+
+    A region in a country one of the cities is in comes first ("Sydney, WA"
+    stays in Australia). Then US states, read ahead of the city's own
+    country: a two-letter state code is by far the most common qualifier in
+    ATS locations, so "Dublin, CA" is in California, not Ireland or Canada.
+    """
+    regions = [p for p in candidates if p.kind == "region"]
+    if not regions:
+        return None
+    countries = {city.country for city in cities}
+    return min(regions, key=lambda p: (p.country not in countries, p.country != "US"))
+
+
+def _key(name: str) -> str:
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode().lower()
+    return " ".join(_WORD.findall(name.replace(".", "")))
@@ -0,0 +1,72 @@
+import hashlib
+import uuid
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+# Keeps company scrape locks apart from any other advisory locks on the database
+SCRAPE_LOCK_NAMESPACE = "openroles.scrape"
+
+
+def company_lock_key(company_id: uuid.UUID) -> int:
+    """Stable signed 64-bit advisory lock key for a company."""
+    digest = hashlib.sha256(f"{SCRAPE_LOCK_NAMESPACE}:{company_id}".encode()).digest()
+    return int.from_bytes(digest[:8], "big", signed=True)
+
+
+class CompanyLocks:
+    """Postgres advisory locks that give one process exclusive claim to scrape a company.
+
+    Locks are session-level and taken on a dedicated autocommit connection,
+    so the scrape's own session can commit freely and no transaction sits
+    idle while the scrape runs. release() unlocks each one before the
+    connection goes back to the pool; if that fails the connection is
+    discarded instead, which releases them too - nothing can leak into the
+    pool. The process dying ends the connection and its locks with it.
+
+    Usage:
+        with CompanyLocks(db) as locks:
+            if locks.try_acquire(company.id):
+                ...  # scrape company
+    """
+
+    def __init__(self, db: Session):
+        self._engine = db.get_bind().engine
+        self._conn = None
+        self.held: set[uuid.UUID] = set()
+
+    def __enter__(self) -> "CompanyLocks":
+        self._conn = self._engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def try_acquire(self, company_id: uuid.UUID) -> bool:
+        """Claim a company without waiting; False if another process holds it."""
+        if company_id in self.held:
+            return True
+
+        acquired = self._conn.execute(
+            select(func.pg_try_advisory_lock(company_lock_key(company_id)))
+        ).scalar()
+        if acquired:
+            self.held.add(company_id)
+        return acquired
+
+    def release(self):
+        """Release every lock held."""
+        if self._conn is not None:
+            try:
+                for company_id in self.held:
+                    self._conn.execute(
+                        select(func.pg_advisory_unlock(company_lock_key(company_id)))
+                    )
+            except Exception:
+                # Locks still held must not reach the pool with the connection
+                self._conn.invalidate()
+                raise
+            finally:
+                self._conn.close()
+                self._conn = None
+                self.held.clear()
@@ -0,0 +1,43 @@
+import asyncio
+import threading
+from collections.abc import Coroutine
+from concurrent.futures import Future
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+class BackgroundLoop:
+    """An asyncio event loop running forever in a daemon thread.
+
+    Long-lived async clients (httpx, OpenAI) are bound to the loop they first
+    run on, so they live on one of these and sync code submits coroutines to
+    it with run(), instead of starting a fresh loop per call with asyncio.run.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def run(self, coro: Coroutine[object, object, T]) -> T:
+        """Run a coroutine on the loop and block until it returns."""
+        return self.submit(coro).result()
+
+    def submit(self, coro: Coroutine[object, object, T]) -> Future[T]:
+        """Start a coroutine on the loop without waiting for it."""
+        return asyncio.run_coroutine_threadsafe(coro, self._get_loop())
+
+    def stop(self):
+        with self._lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop = None
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name=self.name, daemon=True).start()
+                self._loop = loop
+            return self._loop
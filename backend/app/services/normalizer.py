@@ -1,15 +1,65 @@
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
-from datetime import datetime
+import hashlib
+import json
+import os
+import random
+import re
+import socket
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from datetime import datetime, timedelta
 from enum import Enum
+from functools import lru_cache
 from typing import Literal
 
-from openai import OpenAI
-from pydantic import BaseModel, Field
+import openai
+from openai import AsyncOpenAI, OpenAI
+from openai.lib._parsing._responses import type_to_text_format_param
+from pydantic import BaseModel, Field, create_model
+from sqlalchemy import case, func, or_, select, true, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from app.config import settings
-from app.models import Company, JobPosting
+from app.models import Company, JobPosting, NormalizationCache
+from app.services.classifier import PreClassifier, load_classifier
+from app.services.dedup import NearDuplicateIndex, minhash
+from app.services.loop import BackgroundLoop
+from app.services.preprocess import posting_text, preprocess_pending
+from app.services.prompt_budget import count_tokens, fit_description
+from app.services.ratelimit import RateLimiter
+
+NORMALIZE_MODEL = "gpt-4.1-mini-2025-04-14"
+
+# Retries of one job after a 429, timeout or 5xx before it is reported failed
+NORMALIZE_MAX_RETRIES = 4
+
+# Rough output size of one NormalizedJob, for the tokens/min estimate
+ESTIMATED_OUTPUT_TOKENS = 400
+
+# Fields that may differ between near-duplicate postings in different locations
+SALARY_FIELDS = ("salary_min", "salary_max", "salary_currency")
+
+# Description sections left out of the prompt when the ATS supplies the fields
+# they would be read for
+KNOWN_FIELD_SECTIONS = {"remote_policy": "location", "salary_min": "compensation"}
+
+# NormalizedJob fields left out of the output schema when the ATS supplies them
+KNOWN_FIELDS = ("remote_policy", *SALARY_FIELDS)
+
+# How often normalize_stream reports progress, and how many errors it keeps
+PROGRESS_SECONDS = 2.0
+MAX_REPORTED_ERRORS = 50
+
+# One OpenAI client per process, plus one async client and rate limiter living on
+# a background loop, so every batch shares connections and the account's budget
+_client: OpenAI | None = None
+_async_client: AsyncOpenAI | None = None
+_limiter: RateLimiter | None = None
+_loop = BackgroundLoop("openai")
 
 
 # Structured output models
@@ -70,6 +120,16 @@ class NormalizedJob(BaseModel):
     salary_currency: str | None = Field(description="Salary currency (USD, EUR, GBP, etc.)")
 
 
+class PackedJob(NormalizedJob):
+    job_id: str = Field(description="The id from the job's header")
+
+
+class PackedNormalization(BaseModel):
+    """Structured output of a packed request: one NormalizedJob per job, by id."""
+
+    jobs: list[PackedJob]
+
+
 SYSTEM_PROMPT = """You are normalizing job postings for AI companies into structured data.
 
 IMPORTANT CONTEXT:
@@ -86,247 +146,870 @@ RULES:
 - Notable signals: unusual patterns like "first hire in area", "domain expert", "founding team"
 - Be concise - don't over-extract"""
 
+# Appended to SYSTEM_PROMPT for requests that pack several postings
+PACKED_PROMPT = """
+
+You will be given several job postings, each under a "### Job <id>" header. Normalize
+each one on its own, as if it were the only posting, and return exactly one entry per
+job with its id as job_id."""
+
+# Changes whenever the model, prompts or output schema do, invalidating cached results
+PROMPT_FINGERPRINT = hashlib.sha256(
+    json.dumps([
+        NORMALIZE_MODEL,
+        SYSTEM_PROMPT,
+        PACKED_PROMPT,
+        NormalizedJob.model_json_schema(),
+    ]).encode()
+).hexdigest()
+
+# Structured output format of packed requests, which are validated item by item
+# (for jobs with known fields, see _packed_text_format)
+PACKED_TEXT_FORMAT = {"format": type_to_text_format_param(PackedNormalization)}
+
+
+def normalize_pending_jobs(db: Session, company_slug: str | None = None, limit: int = 100) -> dict:
+    """Normalize jobs that haven't been normalized yet.
 
-def normalize_job(db: Session, job: JobPosting) -> dict:
-    """Normalize a job posting using OpenAI structured outputs.
+    Jobs are leased like any other normalize_stream, so this never works on
+    postings a normalize worker holds. Newly scraped postings are
+    preprocessed first.
 
     Args:
         db: Database session
-        job: JobPosting to normalize
+        company_slug: Optional filter by company
+        limit: Max jobs to normalize
 
     Returns:
-        Dict with normalization results
+        Dict with results summary
     """
-    if not settings.openai_api_key:
-        return {"status": "skipped", "reason": "OpenAI API key not configured"}
+    company_id = None
+    if company_slug:
+        company_id = db.execute(select(Company.id).where(Company.slug == company_slug)).scalar()
+        if company_id is None:
+            return {"total": 0, "success": 0, "failed": 0, "errors": []}
 
-    client = OpenAI(api_key=settings.openai_api_key)
+    preprocess_pending(db, company_id)
+    return normalize_stream(db, limit=limit, company_id=company_id)
 
-    # Get description (prefer plain text, fall back to HTML)
-    description = job.description_plain or job.description_html or ""
 
-    # Truncate description if too long
-    if len(description) > 10000:
-        description = description[:10000] + "..."
+def build_input(job_data: dict) -> list[dict]:
+    """Build the normalization prompt for one job."""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"Normalize this job posting:\n\n{_job_content(job_data)}"},
+    ]
+
 
-    user_content = f"""Normalize this job posting:
+def _build_packed_input(jobs: list[dict]) -> list[dict]:
+    """Build one prompt for several jobs, headed by their 1-based positions as ids."""
+    postings = "\n\n".join(
+        f"### Job {key}\n\n{_job_content(job_data)}" for key, job_data in enumerate(jobs, 1)
+    )
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT + PACKED_PROMPT},
+        {
+            "role": "user",
+            "content": f"Normalize each of these {len(jobs)} job postings:\n\n{postings}",
+        },
+    ]
 
-Company: {job.company.name}
-Title: {job.title_raw}
-Department/Team: {job.department_raw or "unknown"}
-Location: {job.location_raw or "unknown"}
+
+def _job_content(job_data: dict) -> str:
+    known = job_data.get("known") or ()
+    description = fit_description(
+        job_data.get("description") or "",
+        settings.normalize_description_tokens,
+        skip=[section for field, section in KNOWN_FIELD_SECTIONS.items() if field in known],
+    )
+    employment_type = ""
+    if job_data.get("employment_type"):
+        employment_type = f"\nEmployment type: {job_data['employment_type']}"
+
+    return f"""Company: {job_data["company_name"]}
+Title: {job_data["title"]}
+Department/Team: {job_data.get("department") or "unknown"}
+Location: {job_data.get("location") or "unknown"}{employment_type}
 
 Description:
 {description}"""
 
-    try:
-        response = client.responses.parse(
-            model="gpt-4.1-mini-2025-04-14",
-            input=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": user_content},
-            ],
-            text_format=NormalizedJob,
-        )
 
-        data = response.output_parsed
+def _known_fields(remote_policy: str | None, salary_min: int | None, salary_max: int | None):
+    """NormalizedJob fields the ATS supplies for a posting, which are not extracted."""
+    known = []
+    if remote_policy is not None:
+        known.append("remote_policy")
+    if salary_min is not None or salary_max is not None:
+        known += SALARY_FIELDS
+    return known
+
+
+@lru_cache(maxsize=16)
+def _output_model(known: tuple[str, ...] = ()) -> type[BaseModel]:
+    """NormalizedJob without the known fields, so the model is not asked for them."""
+    if not known:
+        return NormalizedJob
+    return create_model(
+        "NormalizedJob",
+        **{
+            name: (info.annotation, info)
+            for name, info in NormalizedJob.model_fields.items()
+            if name not in known
+        },
+    )
 
-        # Update job with normalized data
-        job.normalized_title = data.normalized_title
-        job.seniority = data.seniority.value
-        job.function = data.function.value
-        job.team_area = data.team_area
-        job.is_leadership = data.is_leadership
-        job.experience_years_min = data.experience_years_min
-        job.remote_policy = data.remote_policy.value
-        job.tech_stack = data.tech_stack
-        job.keywords = data.keywords
-        job.notable_signals = data.notable_signals
-        job.salary_min = data.salary_min
-        job.salary_max = data.salary_max
-        job.salary_currency = data.salary_currency
-        job.normalized_at = datetime.utcnow()
 
-        db.commit()
+@lru_cache(maxsize=16)
+def text_format(known: tuple[str, ...] = ()) -> dict:
+    """The Responses API text param for one job's output, without the known fields."""
+    return {"format": type_to_text_format_param(_output_model(known))}
 
-        return {"status": "success", "data": data.model_dump()}
 
-    except Exception as e:
-        return {"status": "failed", "error": str(e)}
+@lru_cache(maxsize=16)
+def _packed_text_format(known: tuple[str, ...] = ()) -> dict:
+    """PACKED_TEXT_FORMAT for a pack of jobs that share these known fields."""
+    if not known:
+        return PACKED_TEXT_FORMAT
+    job = create_model(
+        "PackedJob",
+        __base__=_output_model(known),
+        job_id=(str, PackedJob.model_fields["job_id"]),
+    )
+    packed = create_model("PackedNormalization", jobs=(list[job], ...))
+    return {"format": type_to_text_format_param(packed)}
 
 
-def normalize_pending_jobs(db: Session, company_slug: str | None = None, limit: int = 100) -> dict:
-    """Normalize jobs that haven't been normalized yet.
+def parse_output(text: str) -> dict:
+    """Validate one job's structured output, whichever schema it was asked for.
+
+    Known fields are left out of the schema (see _output_model), so those
+    missing from the output are taken to be the ones the ATS supplied.
+    """
+    data = json.loads(text)
+    known = ()
+    if isinstance(data, dict):
+        known = tuple(field for field in KNOWN_FIELDS if field not in data)
+    return _output_model(known).model_validate(data).model_dump(mode="json")
+
+
+def estimate_tokens(messages: list[dict]) -> int:
+    """Estimate a request's token cost: its prompt tokens plus the expected output."""
+    return sum(count_tokens(m["content"]) for m in messages) + ESTIMATED_OUTPUT_TOKENS
+
+
+async def _call_normalize_api(
+    client: AsyncOpenAI, limiter: RateLimiter, job_data: dict
+) -> dict:
+    """Call OpenAI to normalize one job (no DB operations), paced by the rate limiter.
 
     Args:
-        db: Database session
-        company_slug: Optional filter by company
-        limit: Max jobs to normalize
+        client: Shared async OpenAI client
+        limiter: Shared requests/min and tokens/min limiter
+        job_data: Dict with job info for normalization
 
     Returns:
-        Dict with results summary
+        Dict with job_id and either normalized data or error
     """
-    query = (
-        db.query(JobPosting)
-        .join(Company)
-        .filter(
-            JobPosting.normalized_at.is_(None),
-            JobPosting.removed_at.is_(None),
+    messages = build_input(job_data)
+
+    try:
+        response = await _request(
+            client.responses.parse,
+            limiter,
+            estimate_tokens(messages),
+            model=NORMALIZE_MODEL,
+            input=messages,
+            text_format=_output_model(tuple(job_data.get("known") or ())),
         )
-    )
+    except Exception as e:
+        return {"job_id": job_data["id"], "status": "failed", "error": str(e)}
 
-    if company_slug:
-        query = query.filter(Company.slug == company_slug)
+    return {
+        "job_id": job_data["id"],
+        "status": "success",
+        "data": response.output_parsed.model_dump(mode="json"),
+    }
 
-    jobs = query.limit(limit).all()
 
-    results = {"total": len(jobs), "success": 0, "failed": 0, "errors": []}
+async def _call_packed_api(
+    client: AsyncOpenAI, limiter: RateLimiter, jobs: list[dict]
+) -> list[dict]:
+    """Normalize several jobs in one call, then retry any it didn't answer one by one.
 
-    for job in jobs:
-        result = normalize_job(db, job)
-        if result["status"] == "success":
-            results["success"] += 1
-        else:
-            results["failed"] += 1
-            results["errors"].append({"job_id": str(job.id), "error": result.get("error")})
+    Each returned item is validated on its own, so one malformed or missing
+    entry costs a single-job call rather than the whole pack. The jobs share
+    their known fields (see _pack), which are left out of the schema.
 
-    return results
+    Returns:
+        One result dict per job, in the order given, each marked "packed"
+        if it came from the packed call
+    """
+    messages = _build_packed_input(jobs)
+    known = tuple(jobs[0].get("known") or ())
+    estimated_tokens = estimate_tokens(messages) + ESTIMATED_OUTPUT_TOKENS * (len(jobs) - 1)
 
+    try:
+        response = await _request(
+            client.responses.create,
+            limiter,
+            estimated_tokens,
+            model=NORMALIZE_MODEL,
+            input=messages,
+            text=_packed_text_format(known),
+        )
+        items = json.loads(response.output_text)["jobs"]
+    except Exception:
+        items = []
+
+    answered: dict[int, dict] = {}
+    for item in items if isinstance(items, list) else []:
+        try:
+            key = int(item["job_id"])
+            data = _output_model(known).model_validate(item).model_dump(mode="json")
+        except (KeyError, TypeError, ValueError):
+            continue
+        if 1 <= key <= len(jobs) and key not in answered:
+            answered[key] = {
+                "job_id": jobs[key - 1]["id"],
+                "status": "success",
+                "data": data,
+                "packed": True,
+            }
+
+    missing = [key for key in range(1, len(jobs) + 1) if key not in answered]
+    retried = await asyncio.gather(
+        *(_call_normalize_api(client, limiter, jobs[key - 1]) for key in missing)
+    )
+    answered.update(zip(missing, retried))
 
-def _call_normalize_api(job_data: dict) -> dict:
-    """Call OpenAI API to normalize a job (no DB operations).
+    return [answered[key] for key in range(1, len(jobs) + 1)]
 
-    Args:
-        job_data: Dict with job info for normalization
 
-    Returns:
-        Dict with job_id and either normalized data or error
+async def _request(
+    create: Callable, limiter: RateLimiter, estimated_tokens: int, **request
+):
+    """Make one Responses API call, paced by the limiter and retried on 429s and 5xxs.
+
+    Raises:
+        The last error once NORMALIZE_MAX_RETRIES retries are used up, or any
+        other error straight away
     """
-    if not settings.openai_api_key:
-        return {"job_id": job_data["id"], "status": "skipped", "reason": "No API key"}
+    for attempt in range(NORMALIZE_MAX_RETRIES + 1):
+        async with limiter.request(estimated_tokens) as ticket:
+            try:
+                response = await create(**request)
+            except openai.RateLimitError as e:
+                ticket.throttled = True
+                ticket.retry_after = _retry_after(e)
+                error = e
+            except (openai.APIConnectionError, openai.InternalServerError) as e:
+                error = e
+            else:
+                usage = getattr(response, "usage", None)
+                ticket.used_tokens = getattr(usage, "total_tokens", None)
+                return response
+
+        if attempt < NORMALIZE_MAX_RETRIES and not ticket.throttled:
+            # Throttled requests already wait out the limiter's pause
+            await asyncio.sleep(random.uniform(0.5, 1.0) * 2**attempt)
+
+    raise error
+
+
+def _retry_after(error: openai.APIStatusError) -> float | None:
+    """Seconds the API asked us to wait, from a 429's Retry-After header."""
+    value = error.response.headers.get("retry-after") if error.response is not None else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
 
-    client = OpenAI(api_key=settings.openai_api_key)
 
-    description = job_data.get("description") or ""
-    if len(description) > 10000:
-        description = description[:10000] + "..."
+async def _normalize_jobs(jobs: list[dict]) -> list[dict]:
+    if len(jobs) == 1:
+        return [await _call_normalize_api(_get_async_client(), _get_limiter(), jobs[0])]
+    return await _call_packed_api(_get_async_client(), _get_limiter(), jobs)
 
-    user_content = f"""Normalize this job posting:
 
-Company: {job_data["company_name"]}
-Title: {job_data["title"]}
-Department/Team: {job_data.get("department") or "unknown"}
-Location: {job_data.get("location") or "unknown"}
+def get_client() -> OpenAI:
+    global _client
+    if _client is None:
+        _client = OpenAI(api_key=settings.openai_api_key)
+    return _client
 
-Description:
-{description}"""
 
-    try:
-        response = client.responses.parse(
-            model="gpt-4.1-mini-2025-04-14",
-            input=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": user_content},
-            ],
-            text_format=NormalizedJob,
+def _get_async_client() -> AsyncOpenAI:
+    """The shared async client. Only call from coroutines run on _loop."""
+    global _async_client
+    if _async_client is None:
+        # Retries are ours, so every 429 reaches the rate limiter
+        _async_client = AsyncOpenAI(api_key=settings.openai_api_key, max_retries=0)
+    return _async_client
+
+
+def _get_limiter() -> RateLimiter:
+    global _limiter
+    if _limiter is None:
+        _limiter = RateLimiter(
+            requests_per_minute=settings.openai_requests_per_minute,
+            tokens_per_minute=settings.openai_tokens_per_minute,
+            max_concurrency=settings.openai_max_concurrency,
         )
+    return _limiter
 
-        return {
-            "job_id": job_data["id"],
-            "status": "success",
-            "data": response.output_parsed.model_dump(),
-        }
-    except Exception as e:
-        return {
-            "job_id": job_data["id"],
-            "status": "failed",
-            "error": str(e),
-        }
 
+def normalize_jobs_parallel(db: Session, limit: int = 200, max_workers: int = 50) -> dict:
+    """Normalize up to limit pending jobs, with max_workers API calls in flight.
+
+    Newly scraped postings are preprocessed first.
 
-def normalize_jobs_parallel(
+    Args:
+        db: Database session
+        limit: Max jobs to normalize
+        max_workers: Concurrent API calls (default 50)
+
+    Returns:
+        Dict with results summary
+    """
+    preprocess_pending(db)
+    return normalize_stream(db, window=max_workers, limit=limit)
+
+
+def normalize_stream(
     db: Session,
-    limit: int = 100,
-    max_workers: int = 50,
+    window: int = 50,
+    limit: int | None = None,
+    worker_id: str | None = None,
+    on_progress: Callable[[dict], None] | None = None,
+    company_id: uuid.UUID | None = None,
 ) -> dict:
-    """Normalize jobs in parallel using thread pool.
+    """Normalize pending jobs as a stream until none are left (or limit is reached).
+
+    Keeps a sliding window of API calls in flight: as each call completes its
+    result is committed and the freed slot is refilled from newly leased jobs,
+    so one slow call never holds up the rest. Jobs are leased (see
+    lease_pending_jobs) only as window slots open, so any number of workers
+    can drain the queue side by side and a crash loses at most the window,
+    whose leases expire and are picked up again.
 
-    With tier 3 rate limits (5000 RPM), we can safely run 50+ concurrent requests.
+    Requests are paced to the account's requests/min and tokens/min limits
+    (settings.openai_*), and concurrency adapts to 429s and latency.
 
     Args:
         db: Database session
-        limit: Max jobs to normalize
-        max_workers: Number of concurrent API calls (default 50)
+        window: Max API calls in flight
+        limit: Max jobs to lease in total (None = until the queue is empty)
+        worker_id: Lease owner, for diagnostics (default: host, pid and thread)
+        on_progress: Called with the running totals every few seconds
+        company_id: Only normalize this company's jobs
 
     Returns:
         Dict with results summary
     """
-    # Get pending jobs
-    jobs = (
-        db.query(JobPosting)
-        .join(Company)
-        .filter(
+    if not settings.openai_api_key:
+        return {
+            "total": 0,
+            "success": 0,
+            "failed": 0,
+            "status": "skipped",
+            "reason": "OpenAI API key not configured",
+        }
+
+    stream = _NormalizeStream(
+        db, worker_id or f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+    )
+    leased_total = 0
+    drained = False
+    reported_at = time.monotonic()
+
+    try:
+        while True:
+            # Lease in small batches rather than one row per freed slot
+            room = window - len(stream.in_flight)
+            if limit is not None:
+                room = min(room, limit - leased_total)
+            if not drained and room > 0 and (not stream.in_flight or room >= max(1, window // 4)):
+                leased = lease_pending_jobs(db, stream.worker_id, room, company_id=company_id)
+                leased_total += len(leased)
+                drained = len(leased) < room
+                stream.add(leased)
+                db.commit()
+
+            if stream.in_flight:
+                done, _ = wait(stream.in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stream.complete(future)
+                db.commit()
+            elif drained or room <= 0:
+                break
+
+            if on_progress and time.monotonic() - reported_at >= PROGRESS_SECONDS:
+                on_progress(stream.results)
+                reported_at = time.monotonic()
+    finally:
+        stream.abandon()
+
+    return stream.results
+
+
+class _NormalizeStream:
+    """Leased jobs of one normalize_stream call, from lease to result.
+
+    Each leased job is answered in the cheapest way available:
+
+    1. from the normalization cache, if its exact input was normalized before;
+    2. by the local pre-classifier, if it is confident about the posting;
+    3. by copying from a near-duplicate already leased in this stream (same
+       company and title, nearly the same description - typically one req
+       listed per location), once that representative is normalized;
+    4. otherwise with an API call, becoming the representative for any
+       near-duplicates leased after it. Short postings share packed calls
+       when settings.normalize_pack_max_jobs allows (see _pack).
+    """
+
+    def __init__(self, db: Session, worker_id: str):
+        self.db = db
+        self.worker_id = worker_id
+        self.results = {
+            "total": 0,
+            "success": 0,
+            "cached": 0,
+            "classified": 0,
+            "duplicates": 0,
+            "packed": 0,
+            "failed": 0,
+            "errors": [],
+        }
+        self.classifier = load_classifier(db) if settings.classifier_enabled else None
+        self.in_flight: dict[Future, list[dict]] = {}  # one API call each
+        self.index = NearDuplicateIndex()
+        self.representatives: dict[str, dict] = {}  # id -> job data (with "data" once done)
+        self.followers: dict[str, list[dict]] = {}  # representative id -> jobs waiting on it
+
+    def add(self, leased: list[dict]):
+        """Answer newly leased jobs from the cache, classifier or a duplicate, or call the API."""
+        calls = []
+        misses = serve_from_cache(self.db, self.worker_id, leased, self.results)
+        misses = serve_from_classifier(
+            self.classifier, self.db, self.worker_id, misses, self.results
+        )
+        for job_data in misses:
+            job_data["group"] = (job_data["company_name"], _title_key(job_data))
+            job_data["signature"] = minhash(job_data["description"])
+            original_id = self.index.query(job_data["group"], job_data["signature"])
+
+            if original_id is None:
+                self._represent(job_data)
+                calls.append(job_data)
+            elif "data" in self.representatives[original_id]:
+                self._copy(self.representatives[original_id], job_data)
+            else:
+                self.followers[original_id].append(job_data)
+
+        for jobs in _pack(calls):
+            self.in_flight[_loop.submit(_normalize_jobs(jobs))] = jobs
+
+    def complete(self, future: Future):
+        """Record a finished API call's jobs, and the near-duplicates waiting on them."""
+        jobs = self.in_flight.pop(future)
+        for job_data, api_result in zip(jobs, future.result()):
+            self._finish(job_data, api_result)
+
+    def abandon(self):
+        """Release the leases of jobs not yet answered, so other workers can take them now."""
+        for future in self.in_flight:
+            future.cancel()
+
+        unfinished = [job_data["id"] for jobs in self.in_flight.values() for job_data in jobs]
+        unfinished += [job["id"] for waiting in self.followers.values() for job in waiting]
+        if unfinished:
+            self.db.rollback()
+            release_leases(self.db, self.worker_id, unfinished)
+            self.db.commit()
+
+    def _finish(self, job_data: dict, api_result: dict):
+        if record_result(self.db, self.worker_id, api_result, self.results, job_data):
+            self.results["packed"] += bool(api_result.get("packed"))
+        followers = self.followers.pop(job_data["id"])
+
+        if api_result["status"] == "success":
+            job_data["data"] = api_result["data"]
+            for follower in followers:
+                self._copy(job_data, follower)
+            return
+
+        # The next duplicate in line takes over as representative
+        self.index.remove(job_data["id"])
+        del self.representatives[job_data["id"]]
+        if followers:
+            successor, *rest = followers
+            self._represent(successor)
+            self.followers[successor["id"]] = rest
+            self.in_flight[_loop.submit(_normalize_jobs([successor]))] = [successor]
+
+    def _represent(self, job_data: dict):
+        self.index.add(job_data["id"], job_data["group"], job_data["signature"])
+        self.representatives[job_data["id"]] = job_data
+        self.followers[job_data["id"]] = []
+
+    def _copy(self, representative: dict, job_data: dict):
+        data = _duplicate_result(representative, representative["data"], job_data)
+        result = {"job_id": job_data["id"], "status": "success", "data": data}
+        if record_result(
+            self.db, self.worker_id, result, self.results, duplicate_of=representative["id"]
+        ):
+            self.results["duplicates"] += 1
+
+
+def lease_pending_jobs(
+    db: Session,
+    worker_id: str,
+    limit: int,
+    lease_seconds: int | None = None,
+    company_id: uuid.UUID | None = None,
+) -> list[dict]:
+    """Lease up to limit pending jobs to worker_id and return their prompt data.
+
+    Candidates are locked FOR UPDATE SKIP LOCKED while the lease is written, so
+    concurrent workers never lease the same job or wait on each other. The
+    lease is committed before returning; it expires after lease_seconds
+    (default settings.normalize_lease_seconds), and jobs that have failed
+    settings.normalize_max_attempts times are no longer leased.
+
+    Company names are joined in the same round trip, so no ORM objects (or
+    lazy loads) are involved. company_id restricts the lease to one company's jobs.
+    """
+    now = datetime.utcnow()
+    claimed = (
+        select(JobPosting.id)
+        .where(
+            JobPosting.company_id == company_id if company_id else true(),
             JobPosting.normalized_at.is_(None),
             JobPosting.removed_at.is_(None),
+            JobPosting.normalize_attempts < settings.normalize_max_attempts,
+            or_(
+                JobPosting.normalize_leased_until.is_(None),
+                JobPosting.normalize_leased_until < now,
+            ),
         )
+        .order_by(JobPosting.first_seen_at, JobPosting.id)
         .limit(limit)
-        .all()
+        .with_for_update(skip_locked=True)
+        # Selected once: as an IN (subquery), Postgres may rescan the LIMIT
+        # subquery per row and lease more than limit jobs
+        .cte("claimed")
+        .prefix_with("MATERIALIZED")
     )
+    leased = (
+        update(JobPosting)
+        .where(JobPosting.id == claimed.c.id)
+        .values(
+            normalize_lease_owner=worker_id,
+            normalize_leased_until=now + timedelta(
+                seconds=lease_seconds or settings.normalize_lease_seconds
+            ),
+        )
+        .returning(JobPosting.id)
+        .cte("leased")
+    )
+    rows = db.execute(
+        select(
+            JobPosting.id,
+            Company.name,
+            JobPosting.title_raw,
+            JobPosting.department_raw,
+            JobPosting.location_raw,
+            JobPosting.description_html,
+            JobPosting.description_plain,
+            JobPosting.description_text,
+            JobPosting.ats_remote_policy,
+            JobPosting.ats_employment_type,
+            JobPosting.ats_salary_min,
+            JobPosting.ats_salary_max,
+        )
+        .join(Company, Company.id == JobPosting.company_id)
+        .join(leased, leased.c.id == JobPosting.id)
+        .order_by(JobPosting.first_seen_at)
+    ).all()
+    db.commit()
 
-    if not jobs:
-        return {"total": 0, "success": 0, "failed": 0}
-
-    # Prepare job data for parallel processing (avoid passing ORM objects to threads)
-    job_data_list = [
+    return [
         {
-            "id": str(job.id),
-            "company_name": job.company.name,
-            "title": job.title_raw,
-            "department": job.department_raw,
-            "location": job.location_raw,
-            "description": job.description_plain or job.description_html or "",
+            "id": str(row.id),
+            "company_name": row.name,
+            "title": row.title_raw,
+            "department": row.department_raw,
+            "location": row.location_raw,
+            # Postings scraped before preprocessing existed are converted on the fly
+            "description": row.description_text
+            or posting_text(row.description_html, row.description_plain),
+            "employment_type": row.ats_employment_type,
+            "known": _known_fields(row.ats_remote_policy, row.ats_salary_min, row.ats_salary_max),
         }
-        for job in jobs
+        for row in rows
     ]
 
-    # Create a mapping of job_id to job object for DB updates
-    job_map = {str(job.id): job for job in jobs}
 
-    results = {"total": len(jobs), "success": 0, "failed": 0, "errors": []}
+def serve_from_cache(
+    db: Session, worker_id: str, leased: list[dict], results: dict
+) -> list[dict]:
+    """Record cached results for leased jobs and return the ones that need an API call."""
+    for job_data in leased:
+        job_data["cache_key"] = _cache_key(job_data)
+    cached = _cached_results(db, [job_data["cache_key"] for job_data in leased])
 
-    # Run API calls in parallel
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        api_results = list(executor.map(_call_normalize_api, job_data_list))
+    misses = []
+    for job_data in leased:
+        data = cached.get(job_data["cache_key"])
+        if data is None:
+            misses.append(job_data)
+            continue
+        result = {"job_id": job_data["id"], "status": "success", "data": data}
+        if record_result(db, worker_id, result, results):
+            results["cached"] += 1
+    return misses
 
-    # Update database with results (sequential to avoid DB conflicts)
-    for api_result in api_results:
-        job = job_map.get(api_result["job_id"])
-        if not job:
+
+def serve_from_classifier(
+    classifier: PreClassifier | None,
+    db: Session,
+    worker_id: str,
+    jobs: list[dict],
+    results: dict,
+) -> list[dict]:
+    """Record classifier results for jobs that can skip the LLM; return the rest."""
+    if classifier is None or not jobs:
+        return jobs
+
+    misses = []
+    predictions = classifier.normalize(jobs, settings.classifier_min_confidence)
+    for job_data, data in zip(jobs, predictions):
+        if data is None:
+            misses.append(job_data)
             continue
+        result = {"job_id": job_data["id"], "status": "success", "data": data}
+        if record_result(db, worker_id, result, results, source="classifier"):
+            results["classified"] += 1
+    return misses
 
-        if api_result["status"] == "success":
-            data = api_result["data"]
-            job.normalized_title = data.get("normalized_title")
-            job.seniority = data.get("seniority")
-            job.function = data.get("function")
-            job.team_area = data.get("team_area")
-            job.is_leadership = data.get("is_leadership")
-            job.experience_years_min = data.get("experience_years_min")
-            job.remote_policy = data.get("remote_policy")
-            job.tech_stack = data.get("tech_stack")
-            job.keywords = data.get("keywords")
-            job.notable_signals = data.get("notable_signals")
-            job.salary_min = data.get("salary_min")
-            job.salary_max = data.get("salary_max")
-            job.salary_currency = data.get("salary_currency")
-            job.normalized_at = datetime.utcnow()
-            results["success"] += 1
-        else:
-            results["failed"] += 1
+
+def record_result(
+    db: Session,
+    worker_id: str,
+    api_result: dict,
+    results: dict,
+    job_data: dict | None = None,
+    duplicate_of: str | None = None,
+    source: str = "llm",
+) -> bool:
+    """Write one result to its job and release the lease (caller commits).
+
+    Only written while worker_id still holds an unexpired lease on the job:
+    once the lease has run out another worker may have leased the job again,
+    and its result is the one that counts. Such late results are dropped
+    and left out of results.
+
+    Successful API results (job_data given) are also added to the cache.
+    Results copied from a near-duplicate record which job they came from, and
+    every result records its source (llm or classifier).
+
+    Returns:
+        Whether the result was written
+    """
+    job_id = uuid.UUID(api_result["job_id"])
+    leased = (
+        (JobPosting.id == job_id)
+        & (JobPosting.normalize_lease_owner == worker_id)
+        & (JobPosting.normalize_leased_until > datetime.utcnow())
+    )
+    released = {"normalize_lease_owner": None, "normalize_leased_until": None}
+
+    if api_result["status"] == "success":
+        data = api_result["data"]
+        if job_data is not None:
+            # Still a valid answer for its input, even if it arrived too late here
+            _store_result(db, job_data["cache_key"], data)
+        written = db.execute(
+            update(JobPosting)
+            .where(leased)
+            .values(
+                **_with_ats_fields({f: data.get(f) for f in NormalizedJob.model_fields}),
+                normalized_at=datetime.utcnow(),
+                normalized_by=source,
+                duplicate_of=uuid.UUID(duplicate_of) if duplicate_of else None,
+                **released,
+            ),
+            # The lease columns of loaded postings may be stale, so match in SQL
+            execution_options={"synchronize_session": "fetch"},
+        ).rowcount
+        if not written:
+            return False
+        results["total"] += 1
+        results["success"] += 1
+    else:
+        written = db.execute(
+            update(JobPosting)
+            .where(leased)
+            .values(normalize_attempts=JobPosting.normalize_attempts + 1, **released),
+            execution_options={"synchronize_session": "fetch"},
+        ).rowcount
+        if not written:
+            return False
+        results["total"] += 1
+        results["failed"] += 1
+        if len(results["errors"]) < MAX_REPORTED_ERRORS:
             results["errors"].append({
                 "job_id": api_result["job_id"],
                 "error": api_result.get("error"),
             })
+    return True
 
-    db.commit()
-    return results
+
+def _with_ats_fields(values: dict) -> dict:
+    """Column values for a normalization, with the ATS's own fields taking precedence.
+
+    Applied in SQL, so it holds however the result was produced - LLM,
+    cache, classifier, near-duplicate or batch.
+    """
+    has_salary = or_(JobPosting.ats_salary_min.isnot(None), JobPosting.ats_salary_max.isnot(None))
+    return {
+        **values,
+        "remote_policy": func.coalesce(JobPosting.ats_remote_policy, values["remote_policy"]),
+        **{
+            field: case((has_salary, getattr(JobPosting, f"ats_{field}")), else_=values[field])
+            for field in SALARY_FIELDS
+        },
+    }
+
+
+def _pack(jobs: list[dict]) -> list[list[dict]]:
+    """Group jobs into API calls: short postings together, the rest one per call.
+
+    A posting is short if its description is at most
+    settings.normalize_pack_job_tokens. Packs hold up to
+    settings.normalize_pack_max_jobs postings and
+    settings.normalize_pack_tokens description tokens between them. Only
+    postings with the same known fields share a pack, since they share its
+    output schema.
+    """
+    if settings.normalize_pack_max_jobs <= 1:
+        return [[job_data] for job_data in jobs]
+
+    packs = []
+    open_packs: dict[tuple[str, ...], tuple[list[dict], int]] = {}
+    for job_data in jobs:
+        tokens = count_tokens(job_data["description"])
+        if tokens > settings.normalize_pack_job_tokens:
+            packs.append([job_data])
+            continue
+
+        known = tuple(job_data.get("known") or ())
+        pack, pack_tokens = open_packs.get(known, ([], 0))
+        if pack and (
+            len(pack) >= settings.normalize_pack_max_jobs
+            or pack_tokens + tokens > settings.normalize_pack_tokens
+        ):
+            packs.append(pack)
+            pack, pack_tokens = [], 0
+        pack.append(job_data)
+        open_packs[known] = (pack, pack_tokens + tokens)
+
+    packs.extend(pack for pack, _ in open_packs.values())
+    return packs
+
+
+def _duplicate_result(representative: dict, data: dict, job_data: dict) -> dict:
+    """A near-duplicate's normalization, derived from its representative's.
+
+    Role fields carry over as they are. Location-dependent fields are only
+    kept where the duplicate's own input supports them: the remote policy
+    follows the duplicate's location when that names one (and is unknown if
+    only the representative's location did), and salary ranges, which often
+    vary by location, are only copied when the descriptions are identical.
+    """
+    data = dict(data)
+
+    own_policy = _location_policy(job_data["location"])
+    if own_policy is not None:
+        data["remote_policy"] = own_policy
+    elif _location_policy(representative["location"]) is not None:
+        data["remote_policy"] = RemotePolicy.unknown.value
+
+    if job_data["description"] != representative["description"]:
+        for field in SALARY_FIELDS:
+            data[field] = None
+
+    return data
+
+
+def _location_policy(location: str | None) -> str | None:
+    """The remote policy a location string states outright, if any."""
+    location = (location or "").lower()
+    if "hybrid" in location:
+        return RemotePolicy.hybrid.value
+    if "remote" in location:
+        return RemotePolicy.remote.value
+    return None
+
+
+def _title_key(job_data: dict) -> str:
+    """Title with location words and punctuation stripped, e.g. "Engineer - NYC" -> "engineer".
+
+    Near-duplicates must match on this exactly, so postings that only differ
+    in seniority or specialty are never merged, whatever their descriptions.
+    """
+    location_words = set(re.findall(r"\w+", (job_data["location"] or "").lower()))
+    words = re.findall(r"\w+", job_data["title"].lower())
+    return " ".join(word for word in words if word not in location_words)
+
+
+def release_leases(db: Session, worker_id: str, job_ids: list[str]):
+    """Give up worker_id's leases on jobs, leaving any another worker has taken since."""
+    db.execute(
+        update(JobPosting)
+        .where(
+            JobPosting.id.in_([uuid.UUID(job_id) for job_id in job_ids]),
+            JobPosting.normalize_lease_owner == worker_id,
+        )
+        .values(normalize_lease_owner=None, normalize_leased_until=None)
+    )
+
+
+def _cache_key(job_data: dict) -> str:
+    """Hash of everything that determines a normalization result.
+
+    Covers the exact prompt sent for this job plus the model, system prompt
+    and output schema, so changing any of them invalidates the cache, and
+    the fields left out of the schema because the ATS supplies them.
+    """
+    record = [PROMPT_FINGERPRINT, build_input(job_data)[1]["content"]]
+    if job_data.get("known"):
+        record.append(sorted(job_data["known"]))
+    payload = json.dumps(record)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _cached_results(db: Session, keys: list[str]) -> dict[str, dict]:
+    """Look up cached results by key, counting the hits (caller commits)."""
+    if not keys:
+        return {}
+
+    rows = db.execute(
+        update(NormalizationCache)
+        .where(NormalizationCache.input_hash.in_(keys))
+        .values(
+            hit_count=NormalizationCache.hit_count + 1,
+            last_hit_at=datetime.utcnow(),
+        )
+        .returning(NormalizationCache.input_hash, NormalizationCache.result)
+    ).all()
+    return {key: result for key, result in rows}
+
+
+def _store_result(db: Session, key: str, data: dict):
+    db.execute(
+        pg_insert(NormalizationCache)
+        .values(input_hash=key, model=NORMALIZE_MODEL, result=data)
+        .on_conflict_do_nothing(index_elements=[NormalizationCache.input_hash])
+    )
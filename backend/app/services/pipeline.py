@@ -0,0 +1,572 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import (
+    Company,
+    CompanyWeeklySummary,
+    JobPosting,
+    PipelineJob,
+    ScrapeRun,
+    SectorWeeklySummary,
+)
+from app.services.batch_normalizer import (
+    get_batch_transport,
+    poll_normalization_batches,
+    submit_normalization_batch,
+)
+from app.services.classifier import train_classifier as train_pre_classifier
+from app.services.locations import parse_pending_locations
+from app.services.normalizer import normalize_pending_jobs, normalize_stream
+from app.services.preprocess import preprocess_pending
+from app.services.scheduler import reschedule_scraped
+from app.services.scraper import scrape_companies
+from app.services.synthesizer import get_week_start, run_weekly_synthesis
+
+logger = logging.getLogger(__name__)
+
+# How often a running job's heartbeat is refreshed, well within the stale window
+HEARTBEAT_SECONDS = settings.pipeline_stale_minutes * 60 / 5
+
+# Jobs that are failed rather than retried when their worker goes quiet. A
+# repopulate starts by wiping the postings, so running it twice over would
+# wipe what the first run already scraped.
+NOT_RETRIED = ("repopulate",)
+
+
+class JobLostError(Exception):
+    """Raised when a running job turns out to have been reclaimed from its worker."""
+
+    def __init__(self, job_id: uuid.UUID):
+        self.job_id = job_id
+        super().__init__(f"Pipeline job {job_id} was reclaimed by another worker")
+
+
+class JobProgress:
+    """Reports a running pipeline job's progress back to its row.
+
+    Each report commits, so GET /api/admin/jobs/{id} sees it immediately, and
+    doubles as the job's heartbeat. Reports only land while this worker still
+    owns the job; once another worker has reclaimed it, the next report
+    raises JobLostError so the task stops.
+
+    Usage:
+        with progress.stage("scrape"):
+            ...
+            progress.update(companies=12)
+    """
+
+    def __init__(self, db: Session, job: PipelineJob):
+        self.db = db
+        self.job = job
+        self.owned = _owned_by(job)
+        self.progress = dict(job.progress or {})
+        self.stages = list(job.stages or [])
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time one stage of the pipeline and record it in job.stages."""
+        started_at = datetime.utcnow()
+        self.update(stage=name)
+
+        try:
+            yield
+        finally:
+            completed_at = datetime.utcnow()
+            self.stages.append({
+                "name": name,
+                "started_at": started_at.isoformat(),
+                "completed_at": completed_at.isoformat(),
+                "seconds": round((completed_at - started_at).total_seconds(), 3),
+            })
+            self._commit(stages=list(self.stages))
+
+    def update(self, **fields):
+        """Merge fields into the job's progress (e.g. normalized=400, remaining=1200)."""
+        self.progress.update(fields)
+        self._commit(progress=dict(self.progress))
+
+    def _commit(self, **values):
+        reported = self.db.execute(
+            update(PipelineJob)
+            .where(self.owned)
+            .values(**values, heartbeat_at=datetime.utcnow())
+        )
+        self.db.commit()
+        if reported.rowcount == 0:
+            raise JobLostError(self.job.id)
+
+
+def enqueue_job(db: Session, kind: str, **params) -> PipelineJob:
+    """Queue a pipeline job for the background workers.
+
+    Raises:
+        ValueError: If the job kind is unknown
+    """
+    if kind not in TASKS:
+        raise ValueError(f"Unknown pipeline job: {kind}")
+
+    job = PipelineJob(kind=kind, params=_to_json(params), status="queued")
+    db.add(job)
+    db.commit()
+    return job
+
+
+def claim_next_job(db: Session, worker_id: str) -> PipelineJob | None:
+    """Claim the oldest queued job, or a running one whose worker has gone quiet.
+
+    A quiet job that has already been tried settings.pipeline_max_attempts
+    times, or whose kind is NOT_RETRIED, is marked failed instead. Its old
+    worker may still be alive, so results are only recorded by the worker
+    that holds the current claim (see run_job).
+
+    Rows are locked with FOR UPDATE SKIP LOCKED, so concurrent workers never
+    claim the same job and never wait on each other.
+    """
+    now = datetime.utcnow()
+    stale_before = now - timedelta(minutes=settings.pipeline_stale_minutes)
+
+    # Stale jobs that have used up their attempts will not be retried again
+    db.execute(
+        update(PipelineJob)
+        .where(
+            PipelineJob.status == "running",
+            PipelineJob.heartbeat_at < stale_before,
+            PipelineJob.attempts >= settings.pipeline_max_attempts,
+        )
+        .values(
+            status="failed",
+            error_message=(
+                f"Worker stopped responding (gave up after {settings.pipeline_max_attempts} "
+                "attempts)"
+            ),
+            completed_at=now,
+        ),
+        execution_options={"synchronize_session": False},
+    )
+    db.execute(
+        update(PipelineJob)
+        .where(
+            PipelineJob.status == "running",
+            PipelineJob.heartbeat_at < stale_before,
+            PipelineJob.kind.in_(NOT_RETRIED),
+        )
+        .values(
+            status="failed",
+            error_message="Worker stopped responding (this kind of job is not retried)",
+            completed_at=now,
+        ),
+        execution_options={"synchronize_session": False},
+    )
+    db.commit()
+
+    job = db.execute(
+        select(PipelineJob)
+        .where(
+            or_(
+                PipelineJob.status == "queued",
+                (PipelineJob.status == "running")
+                & (PipelineJob.heartbeat_at < stale_before)
+                & (PipelineJob.attempts < settings.pipeline_max_attempts)
+                & PipelineJob.kind.notin_(NOT_RETRIED),
+            )
+        )
+        .order_by(PipelineJob.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    ).scalar_one_or_none()
+
+    if job is None:
+        return None
+
+    job.status = "running"
+    job.worker_id = worker_id
+    job.attempts += 1
+    job.started_at = job.heartbeat_at = datetime.utcnow()
+    job.progress = None
+    job.stages = None
+    db.commit()
+    return job
+
+
+def run_job(db: Session, job: PipelineJob):
+    """Execute a claimed job and record its result or error.
+
+    Nothing is recorded if the job was reclaimed by another worker meanwhile:
+    that worker's run is the one that counts.
+    """
+    job_id, kind, params = job.id, job.kind, job.params
+    progress = JobProgress(db, job)
+
+    try:
+        with _heartbeat(job_id, job.worker_id, job.attempts):
+            result = TASKS[kind](db, progress, **params)
+    except JobLostError:
+        logger.warning("Pipeline job %s (%s) was reclaimed; dropping this run", job_id, kind)
+        db.rollback()
+        return
+    except Exception as e:
+        logger.exception("Pipeline job %s (%s) failed", job_id, kind)
+        db.rollback()
+        values = {"status": "failed", "error_message": str(e)}
+    else:
+        values = {"status": "succeeded", "result": _to_json(result)}
+
+    recorded = db.execute(
+        update(PipelineJob)
+        .where(progress.owned)
+        .values(**values, completed_at=datetime.utcnow())
+    )
+    db.commit()
+    if recorded.rowcount == 0:
+        logger.warning("Pipeline job %s (%s) was reclaimed; dropping its result", job_id, kind)
+
+
+def _owned_by(job: PipelineJob):
+    """Condition that the job is still running under the claim it has now.
+
+    The attempt count goes up with every claim, so it tells this claim apart
+    from a later one by the same worker id.
+    """
+    return (
+        (PipelineJob.id == job.id)
+        & (PipelineJob.worker_id == job.worker_id)
+        & (PipelineJob.attempts == job.attempts)
+        & (PipelineJob.status == "running")
+    )
+
+
+@contextmanager
+def _heartbeat(job_id: uuid.UUID, worker_id: str | None, attempts: int):
+    """Keep a job's heartbeat fresh while it runs, however long a stage goes without progress.
+
+    Beats come from a thread with its own session, every HEARTBEAT_SECONDS.
+    """
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(HEARTBEAT_SECONDS):
+            try:
+                _send_heartbeat(job_id, worker_id, attempts)
+            except Exception:
+                logger.exception("Heartbeat of pipeline job %s failed", job_id)
+
+    thread = threading.Thread(target=beat, name=f"heartbeat-{job_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _send_heartbeat(job_id: uuid.UUID, worker_id: str | None, attempts: int):
+    db = SessionLocal()
+    try:
+        # Only while this worker still holds the job, under the same claim
+        db.execute(
+            update(PipelineJob)
+            .where(
+                PipelineJob.id == job_id,
+                PipelineJob.worker_id == worker_id,
+                PipelineJob.attempts == attempts,
+                PipelineJob.status == "running",
+            )
+            .values(heartbeat_at=datetime.utcnow())
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def run_next_job(db: Session, worker_id: str) -> PipelineJob | None:
+    """Claim and run one job. Returns the job, or None if the queue was empty."""
+    job = claim_next_job(db, worker_id)
+    if job is not None:
+        run_job(db, job)
+    return job
+
+
+class PipelineWorkerPool:
+    """Threads that poll the pipeline_jobs table and run jobs as they arrive.
+
+    Any number of pools, in any number of processes, can share the table.
+    """
+
+    def __init__(self, workers: int, poll_seconds: float | None = None):
+        self.workers = workers
+        self.poll_seconds = poll_seconds or settings.pipeline_poll_seconds
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def start(self):
+        for i in range(self.workers):
+            worker_id = f"{socket.gethostname()}:{os.getpid()}:{i}"
+            thread = threading.Thread(
+                target=self._work, args=(worker_id,), name=f"pipeline-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float | None = None):
+        """Stop polling. Jobs already running are left to finish (or go stale)."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads.clear()
+
+    def _work(self, worker_id: str):
+        while not self._stop.is_set():
+            db = SessionLocal()
+            try:
+                job = run_next_job(db, worker_id)
+            except Exception:
+                logger.exception("Pipeline worker %s failed to claim a job", worker_id)
+                job = None
+            finally:
+                db.close()
+
+            if job is None:
+                self._stop.wait(self.poll_seconds)
+
+
+# Pipeline tasks. Each takes (db, progress, **params) and returns a JSON-able result.
+
+
+def scrape_all(db: Session, progress: JobProgress, normalize: bool = True) -> dict:
+    """Scrape all active companies, then normalize new jobs.
+
+    Postings scraped before locations were parsed get theirs filled in too.
+    """
+    with progress.stage("scrape"):
+        companies = db.query(Company).filter(Company.is_active.is_(True)).all()
+        progress.update(companies=len(companies))
+        scrape_results = scrape_companies(db, companies)
+        reschedule_scraped(db, companies, scrape_results)
+        total_added = sum(r.get("jobs_added", 0) for r in scrape_results)
+        locations = parse_pending_locations(db)
+
+    result = {
+        "scrape": {
+            "results": scrape_results,
+            "total_jobs_added": total_added,
+            "locations": locations,
+        }
+    }
+
+    # Auto-normalize if enabled and there are new jobs
+    if normalize and total_added > 0:
+        with progress.stage("normalize"):
+            result["normalize"] = normalize_pending_jobs(db, limit=total_added + 50)
+
+    return result
+
+
+def normalize_all(db: Session, progress: JobProgress, max_workers: int = 50) -> dict:
+    """Normalize ALL pending jobs, max_workers API calls in flight.
+
+    Postings scraped before descriptions were preprocessed are converted
+    first, so their boilerplate is stripped before it reaches the prompt.
+    """
+    with progress.stage("preprocess"):
+        preprocessed = preprocess_pending(db)
+
+    with progress.stage("normalize"):
+        result = _normalize_all(db, progress, max_workers)
+
+    return {"status": "complete", "preprocess": preprocessed, **result}
+
+
+def normalize_batch(db: Session, progress: JobProgress) -> dict:
+    """Normalize ALL pending jobs through the provider's batch API.
+
+    Submits every pending job, then polls until the batches finish (which can
+    take hours) and applies their results. Batches are recorded as they are
+    submitted, so a job that is picked up again after a crash carries on
+    polling them rather than resubmitting.
+    """
+    transport = get_batch_transport()
+    submitted = {"batches": 0, "jobs": 0, "cached": 0, "classified": 0}
+
+    with progress.stage("preprocess"):
+        preprocess_pending(db)
+
+    with progress.stage("submit"):
+        while (batch := submit_normalization_batch(db, transport)) is not None:
+            submitted["batches"] += batch["batch_id"] is not None
+            submitted["jobs"] += batch["jobs"]
+            submitted["cached"] += batch["cached"]
+            submitted["classified"] += batch["classified"]
+            progress.update(**submitted)
+
+    applied = {"batches": 0, "success": 0, "failed": 0}
+    with progress.stage("wait"):
+        while True:
+            totals = poll_normalization_batches(db, transport)
+            applied["batches"] += totals["applied"]
+            applied["success"] += totals["success"]
+            applied["failed"] += totals["failed"]
+            progress.update(
+                open_batches=totals["open"],
+                applied_batches=applied["batches"],
+                normalized=applied["success"],
+                failed=applied["failed"],
+            )
+
+            if totals["open"] == 0:
+                break
+            time.sleep(settings.normalize_batch_poll_seconds)
+
+    return {"status": "complete", "submitted": submitted, "applied": applied}
+
+
+def train_classifier(db: Session, progress: JobProgress) -> dict:
+    """Retrain the normalization pre-classifier on LLM-labeled postings."""
+    with progress.stage("train"):
+        return train_pre_classifier(db)
+
+
+def synthesize_all(
+    db: Session, progress: JobProgress, week: str | None = None, force: bool = False
+) -> dict:
+    """Run full weekly synthesis - all companies then sector.
+
+    When week is not specified, analyzes the PREVIOUS week (since this typically
+    runs Monday morning after the week ends).
+    """
+    # Calculate the target week - same logic as run_weekly_synthesis
+    if week is None:
+        week_start = get_week_start() - timedelta(days=7)  # Previous week
+    else:
+        week_start = get_week_start(date.fromisoformat(week))
+
+    if force:
+        # Delete existing summaries for this week
+        db.query(CompanyWeeklySummary).filter(
+            CompanyWeeklySummary.week_start == week_start
+        ).delete()
+        db.query(SectorWeeklySummary).filter(
+            SectorWeeklySummary.week_start == week_start
+        ).delete()
+        db.commit()
+
+    with progress.stage("synthesize"):
+        return run_weekly_synthesis(db, week_start)
+
+
+def repopulate(db: Session, progress: JobProgress) -> dict:
+    """Full pipeline: wipe data, scrape all companies, normalize ALL, synthesize."""
+    results = {
+        "reset": None,
+        "scrape": None,
+        "normalize": None,
+        "synthesize": None,
+    }
+
+    # 1. Reset (keeping companies)
+    with progress.stage("reset"):
+        sector_deleted = db.query(SectorWeeklySummary).delete()
+        company_summaries_deleted = db.query(CompanyWeeklySummary).delete()
+        jobs_deleted = db.query(JobPosting).delete()
+        db.query(ScrapeRun).delete()
+        db.query(Company).update({
+            "last_scraped_at": None,
+            "payload_hash": None,
+            "ats_etag": None,
+            "ats_last_modified": None,
+            "next_scrape_at": None,
+        })
+        db.commit()
+
+    results["reset"] = {
+        "jobs_deleted": jobs_deleted,
+        "summaries_deleted": company_summaries_deleted + sector_deleted,
+    }
+
+    # 2. Scrape all companies
+    with progress.stage("scrape"):
+        companies = db.query(Company).filter(Company.is_active.is_(True)).all()
+        progress.update(companies=len(companies))
+        scrape_results = scrape_companies(db, companies)
+        reschedule_scraped(db, companies, scrape_results)
+        total_added = sum(r.get("jobs_added", 0) for r in scrape_results)
+
+    results["scrape"] = {"companies": len(scrape_results), "total_jobs": total_added}
+
+    # 3. Normalize ALL jobs (50 API calls in flight)
+    with progress.stage("normalize"):
+        normalized = _normalize_all(db, progress, max_workers=50)
+
+    results["normalize"] = {
+        "total": normalized["total_processed"],
+        "success": normalized["success"],
+        "failed": normalized["failed"],
+    }
+
+    # 4. Run synthesis
+    with progress.stage("synthesize"):
+        synthesis_result = run_weekly_synthesis(db)
+
+    results["synthesize"] = {
+        "companies_synthesized": len(synthesis_result.get("companies", {})),
+        "sector_status": synthesis_result.get("sector", {}).get("status"),
+    }
+
+    return results
+
+
+def _normalize_all(db: Session, progress: JobProgress, max_workers: int):
+    """Stream pending jobs through the normalizer until none are left."""
+    pending = (
+        db.query(JobPosting)
+        .filter(
+            JobPosting.normalized_at.is_(None),
+            JobPosting.removed_at.is_(None),
+        )
+        .count()
+    )
+    progress.update(normalized=0, failed=0, remaining=pending)
+
+    def report(totals: dict):
+        progress.update(
+            normalized=totals["success"],
+            failed=totals["failed"],
+            remaining=max(pending - totals["total"], 0),
+        )
+
+    result = normalize_stream(db, window=max_workers, on_progress=report)
+    report(result)
+
+    return {
+        "total_processed": result["total"],
+        "success": result["success"],
+        "failed": result["failed"],
+        "errors": result.get("errors", []),
+    }
+
+
+def _to_json(value):
+    """Coerce dates, UUIDs and the like to strings so the value fits in JSONB."""
+    return json.loads(json.dumps(value, default=str))
+
+
+TASKS: dict[str, Callable[..., dict]] = {
+    "scrape_all": scrape_all,
+    "normalize_all": normalize_all,
+    "normalize_batch": normalize_batch,
+    "train_classifier": train_classifier,
+    "synthesize_all": synthesize_all,
+    "repopulate": repopulate,
+}
@@ -0,0 +1,209 @@
+import hashlib
+import html
+import re
+import uuid
+from collections import Counter
+
+import html2text
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.models import JobPosting
+
+# A block (paragraph, list or heading) counts as company boilerplate - EEO
+# statements, benefits blurbs, "about us" - when it appears under at least
+# BOILERPLATE_MIN_ROLES distinct titles and BOILERPLATE_MIN_SHARE of the company's
+# distinct titles. Counting titles rather than postings keeps the shared
+# requirements of one role listed in many locations from looking like boilerplate.
+BOILERPLATE_MIN_ROLES = 3
+BOILERPLATE_MIN_SHARE = 0.5
+
+# Shorter blocks (mostly headings) are only stripped along with the boilerplate
+# block that follows them
+BOILERPLATE_MIN_WORDS = 8
+
+_WORD = re.compile(r"\w+")
+_BLANK_LINES = re.compile(r"\n\s*\n")
+_LIST_ITEM = re.compile(r"^\s*[*+-]\s+", re.MULTILINE)
+
+
+def html_to_text(description_html: str) -> str:
+    """Compact text of an HTML description: paragraphs, "- " lists and "#" headings.
+
+    Greenhouse sends its HTML entity-escaped ("&lt;p&gt;..."), so that is
+    unescaped first.
+    """
+    if "<" not in description_html and "&lt;" in description_html:
+        description_html = html.unescape(description_html)
+
+    converter = html2text.HTML2Text()
+    converter.body_width = 0
+    converter.ignore_links = True
+    converter.ignore_images = True
+    converter.ignore_emphasis = True
+    converter.unicode_snob = True
+    return _compact(converter.handle(description_html))
+
+
+def posting_text(description_html: str | None, description_plain: str | None) -> str:
+    """A posting's description as compact text, without boilerplate stripping.
+
+    HTML is preferred when the ATS sends both, since it keeps list and
+    section structure that the plain text versions flatten.
+    """
+    if description_html:
+        return html_to_text(description_html)
+    return _compact(description_plain or "")
+
+
+def find_boilerplate(postings: list[tuple[str, str]]) -> set[str]:
+    """Keys of the blocks that recur across a company's roles.
+
+    Args:
+        postings: (title, text) of each of the company's open postings
+    """
+    return _find_boilerplate([(title, block_keys(text)) for title, text in postings])
+
+
+def block_keys(text: str) -> list[str]:
+    """Keys of a posting's blocks, as stored in JobPosting.description_blocks."""
+    return [_block_key(block) for block in _blocks(text)]
+
+
+def _find_boilerplate(postings: list[tuple[str, list[str]]]) -> set[str]:
+    titles_by_block: dict[str, set[str]] = {}
+    titles = set()
+    for title, keys in postings:
+        title = title.strip().lower()
+        titles.add(title)
+        for key in keys:
+            titles_by_block.setdefault(key, set()).add(title)
+
+    needed = max(BOILERPLATE_MIN_ROLES, BOILERPLATE_MIN_SHARE * len(titles))
+    return {key for key, seen in titles_by_block.items() if len(seen) >= needed}
+
+
+def strip_boilerplate(text: str, boilerplate: set[str]) -> str:
+    """text without its boilerplate blocks (unchanged if nothing else would be left)."""
+    blocks = _blocks(text)
+    kept = []
+    stripping = False
+    # Walk backwards so a recurring heading can go with the block under it
+    for block in reversed(blocks):
+        is_boilerplate = _block_key(block) in boilerplate
+        if is_boilerplate and (stripping or len(_words(block)) >= BOILERPLATE_MIN_WORDS):
+            stripping = True
+            continue
+        stripping = False
+        kept.append(block)
+
+    if not kept:
+        return text
+    return "\n\n".join(reversed(kept))
+
+
+def preprocess_company(db: Session, company_id: uuid.UUID) -> dict:
+    """Convert a company's new and edited postings to text and strip its boilerplate.
+
+    The result is stored in JobPosting.description_text, which is what the
+    normalizer sends to the LLM. Only open postings without one are written -
+    the scraper clears it when a posting's content changes. Boilerplate is
+    still found across all open postings, since a block counts as boilerplate
+    by how many roles share it, but unchanged postings contribute their stored
+    description_blocks rather than being converted again.
+
+    Returns:
+        Dict with posting and boilerplate block counts, and characters before and after
+    """
+    rows = db.execute(
+        select(
+            JobPosting.id,
+            JobPosting.title_raw,
+            JobPosting.description_blocks,
+            JobPosting.description_text.is_(None).label("pending"),
+        ).where(JobPosting.company_id == company_id, JobPosting.removed_at.is_(None))
+    ).all()
+
+    # Converted: postings without text yet, and older ones stored before block keys
+    convert = [row.id for row in rows if row.pending or row.description_blocks is None]
+    texts = {}
+    raw_chars = {}
+    if convert:
+        for row in db.execute(
+            select(
+                JobPosting.id, JobPosting.description_html, JobPosting.description_plain
+            ).where(JobPosting.id.in_(convert))
+        ):
+            texts[row.id] = posting_text(row.description_html, row.description_plain)
+            raw_chars[row.id] = len(row.description_html or row.description_plain or "")
+
+    keys = {
+        row.id: block_keys(texts[row.id]) if row.id in texts else row.description_blocks
+        for row in rows
+    }
+    boilerplate = _find_boilerplate([(row.title_raw, keys[row.id]) for row in rows])
+    pending = [row for row in rows if row.pending]
+
+    result = {
+        "postings": len(pending),
+        "boilerplate_blocks": len(boilerplate),
+        "raw_chars": 0,
+        "text_chars": 0,
+        "updated": 0,
+    }
+    for row in rows:
+        if row.id not in texts:
+            continue
+
+        values = {"description_blocks": keys[row.id]}
+        if row.pending:
+            text = strip_boilerplate(texts[row.id], boilerplate)
+            values["description_text"] = text
+            result["raw_chars"] += raw_chars[row.id]
+            result["text_chars"] += len(text)
+            result["updated"] += 1
+        db.execute(
+            update(JobPosting).where(JobPosting.id == row.id).values(**values),
+            execution_options={"synchronize_session": False},
+        )
+
+    db.commit()
+    return result
+
+
+def preprocess_pending(db: Session, company_id: uuid.UUID | None = None) -> dict:
+    """Preprocess every company with open postings that have no description_text yet.
+
+    Run ahead of normalization, so it stays out of the scrape.
+    """
+    query = select(JobPosting.company_id).where(
+        JobPosting.removed_at.is_(None), JobPosting.description_text.is_(None)
+    )
+    if company_id is not None:
+        query = query.where(JobPosting.company_id == company_id)
+    company_ids = db.execute(query.distinct()).scalars().all()
+
+    totals = Counter()
+    for company_id in company_ids:
+        totals.update(preprocess_company(db, company_id))
+    return {"companies": len(company_ids), **totals}
+
+
+def _compact(text: str) -> str:
+    text = text.replace("\xa0", " ").replace("\r\n", "\n")
+    text = _LIST_ITEM.sub("- ", text)
+    lines = [line.strip() for line in text.split("\n")]
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+
+def _blocks(text: str) -> list[str]:
+    return [block for block in text.split("\n\n") if block.strip()]
+
+
+def _words(block: str) -> list[str]:
+    return _WORD.findall(block.lower())
+
+
+def _block_key(block: str) -> str:
+    """Short digest of a block's words, ignoring case, punctuation and spacing."""
+    return hashlib.blake2b(" ".join(_words(block)).encode(), digest_size=8).hexdigest()
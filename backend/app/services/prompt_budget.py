@@ -0,0 +1,205 @@
+import logging
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+import tiktoken
+
+logger = logging.getLogger(__name__)
+
+# Tokenizer of the gpt-4o and gpt-4.1 model families
+ENCODING = "o200k_base"
+
+# Used when the tokenizer files cannot be loaded (they are downloaded on first use)
+CHARS_PER_TOKEN = 4
+
+# Sections in the order they are kept when a description is over budget. The
+# fields that are hardest to infer from the title - salary, experience,
+# remote policy - come from the first three.
+SECTION_PRIORITY = (
+    "compensation",
+    "requirements",
+    "location",
+    "responsibilities",
+    "other",
+    "benefits",
+    "about",
+)
+
+# A block that does not fit is cut down to the remaining budget only if at least
+# this many tokens of it would be kept
+MIN_PARTIAL_TOKENS = 40
+
+_HEADINGS = {
+    "compensation": re.compile(
+        r"salary|compensation|\bpay\b|pay range|base range|\bequity\b|\bota\b", re.IGNORECASE
+    ),
+    "benefits": re.compile(r"benefit|perks|what we offer|why join", re.IGNORECASE),
+    "about": re.compile(
+        r"about (us|the company|the team)|who we are|our (mission|story|values)"
+        r"|^about (?!(you|the (role|job|position|opportunity))\b)",
+        re.IGNORECASE,
+    ),
+    "location": re.compile(
+        r"location|remote|hybrid|\boffice\b|where you|relocation|visa|work arrangement",
+        re.IGNORECASE,
+    ),
+    "requirements": re.compile(
+        r"requirement|qualification|you (have|bring|might be|may be)|you'?ll need|looking for"
+        r"|about you|who you are|skills|experience|ideal candidate|must.have|nice.to.have"
+        r"|preferred|strong candidate",
+        re.IGNORECASE,
+    ),
+    "responsibilities": re.compile(
+        r"responsibilit|you('?ll| will)|the role|about the (role|job|position)|day.to.day"
+        r"|what you|your (impact|work)|job description|overview|mission of the role",
+        re.IGNORECASE,
+    ),
+}
+
+# Blocks whose content marks them as a particular section, wherever they sit
+_SALARY = re.compile(
+    r"[$€£]\s?\d|\b\d{2,3}[,.]?\d{3}\s?(usd|eur|gbp)\b|\b(usd|eur|gbp)\s?\d"
+    r"|salary|compensation range|pay range",
+    re.IGNORECASE,
+)
+_YEARS = re.compile(r"\d+\+?\s*(years|yrs)", re.IGNORECASE)
+_WORK_MODE = re.compile(r"\b(remote|hybrid|on-?site|in[- ]office|in[- ]person)\b", re.IGNORECASE)
+
+_MARKDOWN_HEADING = re.compile(r"^#{1,6}\s+(.*)$")
+
+
+@dataclass
+class Section:
+    kind: str
+    heading: str | None = None
+    blocks: list[str] = field(default_factory=list)
+
+
+@lru_cache(maxsize=1)
+def _encoding() -> tiktoken.Encoding | None:
+    try:
+        return tiktoken.get_encoding(ENCODING)
+    except Exception as e:
+        logger.warning("Tokenizer %s unavailable, estimating token counts: %s", ENCODING, e)
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Tokens text takes up in a prompt for the normalization model."""
+    encoding = _encoding()
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """The longest prefix of text that fits in max_tokens."""
+    encoding = _encoding()
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+
+
+def split_sections(text: str) -> list[Section]:
+    """Split a preprocessed description into sections by its headings.
+
+    A heading is a markdown heading, or a short line of its own ending in a
+    colon. Untitled blocks that state a salary, years of experience or a
+    work mode are split off into their own section, so they are prioritized
+    even when they sit under a generic heading.
+    """
+    sections = [Section("other")]
+    base_kind = "other"
+    for block in (b.strip() for b in text.split("\n\n")):
+        if not block:
+            continue
+
+        heading = _heading(block)
+        if heading is not None:
+            base_kind = _classify_heading(heading)
+            sections.append(Section(base_kind, block))
+            continue
+
+        kind = base_kind
+        if base_kind in ("other", "about", "benefits"):
+            kind = _classify_block(block) or base_kind
+        if kind != sections[-1].kind:
+            sections.append(Section(kind))
+        sections[-1].blocks.append(block)
+
+    return [s for s in sections if s.heading or s.blocks]
+
+
+def fit_description(text: str, budget: int, skip: Iterable[str] = ()) -> str:
+    """text if it fits in budget tokens, else its most valuable sections that do.
+
+    Sections are taken in SECTION_PRIORITY order, block by block, and put back
+    in their original order. A block that does not fit is skipped, so smaller
+    ones after it can still be kept; the last one to be considered with enough
+    room left is cut short instead. Sections of the kinds in skip are always
+    left out.
+    """
+    skip = set(skip)
+    if skip:
+        sections = [s for s in split_sections(text) if s.kind not in skip]
+        text = "\n\n".join(
+            "\n\n".join(([s.heading] if s.heading else []) + s.blocks) for s in sections
+        )
+    if count_tokens(text) <= budget:
+        return text
+
+    sections = split_sections(text)
+    kept: dict[int, list[str]] = {}
+    remaining = budget
+    order = sorted(range(len(sections)), key=lambda i: SECTION_PRIORITY.index(sections[i].kind))
+
+    for i in order:
+        section = sections[i]
+        heading_cost = count_tokens(section.heading) + 1 if section.heading else 0
+        for block in section.blocks:
+            # Blocks are joined by a blank line, about one token
+            overhead = 1 + (heading_cost if i not in kept else 0)
+            cost = count_tokens(block) + overhead
+            if cost <= remaining:
+                kept.setdefault(i, []).append(block)
+                remaining -= cost
+            elif remaining - overhead - 1 >= MIN_PARTIAL_TOKENS:
+                room = remaining - overhead - 1
+                kept.setdefault(i, []).append(truncate_tokens(block, room) + "...")
+                remaining = 0
+
+    parts = []
+    for i, section in enumerate(sections):
+        if i in kept:
+            parts += ([section.heading] if section.heading else []) + kept[i]
+    return "\n\n".join(parts)
+
+
+def _heading(block: str) -> str | None:
+    if "\n" in block:
+        return None
+    match = _MARKDOWN_HEADING.match(block)
+    if match:
+        return match.group(1)
+    if block.endswith(":") and len(block) <= 80:
+        return block[:-1]
+    return None
+
+
+def _classify_heading(heading: str) -> str:
+    for kind, pattern in _HEADINGS.items():
+        if pattern.search(heading):
+            return kind
+    return "other"
+
+
+def _classify_block(block: str) -> str | None:
+    if _SALARY.search(block):
+        return "compensation"
+    if _YEARS.search(block):
+        return "requirements"
+    if _WORK_MODE.search(block):
+        return "location"
+    return None
@@ -0,0 +1,166 @@
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+# Seconds of budget a bucket may bank while idle. Small, so a burst after a quiet
+# spell can't overshoot the per-minute limit the provider is enforcing.
+BURST_SECONDS = 5.0
+
+# Concurrency is cut by this factor when the provider throttles us
+THROTTLE_BACKOFF = 0.5
+
+# Concurrency only grows while smoothed latency stays within this multiple of
+# the fastest latency seen; beyond it, requests are queuing provider-side
+LATENCY_TOLERANCE = 2.0
+
+
+class TokenBucket:
+    """Continuous-refill token bucket measured in units per minute."""
+
+    def __init__(self, per_minute: float, clock=time.monotonic):
+        self.rate = per_minute / 60
+        self.capacity = max(self.rate * BURST_SECONDS, 1.0)
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount can be taken (0 if it can be taken now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, amount: float):
+        """Return (positive) or charge (negative) tokens after the fact."""
+        self._refill()
+        self.tokens = min(self.tokens + amount, self.capacity)
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.tokens + (now - self._updated) * self.rate, self.capacity)
+        self._updated = now
+
+
+@dataclass
+class RequestTicket:
+    """One admitted request. The caller reports what actually happened on it."""
+
+    estimated_tokens: int
+    used_tokens: int | None = None
+    throttled: bool = False
+    retry_after: float | None = None
+
+
+class RateLimiter:
+    """Paces API calls to a requests/min and tokens/min budget with adaptive concurrency.
+
+    Every request waits for a slot under the current concurrency limit and
+    for room in both buckets, charged with its estimated token count; the
+    estimate is corrected from the reported usage when it completes.
+
+    The concurrency limit is adjusted AIMD-style: it creeps up by about one
+    per round of successful requests while latency holds steady, is cut
+    sharply on a 429 (which also pauses all requests for the Retry-After),
+    and eases off when latency climbs as the provider starts queuing us.
+
+    Usage:
+        async with limiter.request(estimated_tokens=1500) as ticket:
+            response = await client.call(...)
+            ticket.used_tokens = response.usage.total_tokens
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        max_concurrency: int,
+        initial_concurrency: int | None = None,
+        clock=time.monotonic,
+    ):
+        self.requests = TokenBucket(requests_per_minute, clock)
+        self.tokens = TokenBucket(tokens_per_minute, clock)
+        self.max_concurrency = max_concurrency
+        self.concurrency = float(initial_concurrency or max(1, max_concurrency // 4))
+        self.in_flight = 0
+        self.min_latency: float | None = None
+        self.avg_latency: float | None = None
+        self._paused_until = 0.0
+        self._clock = clock
+        self._slots: asyncio.Condition | None = None
+
+    @asynccontextmanager
+    async def request(self, estimated_tokens: int) -> AsyncIterator[RequestTicket]:
+        """Admit one request, waiting for a concurrency slot and rate budget."""
+        ticket = RequestTicket(estimated_tokens)
+        await self._acquire_slot()
+
+        try:
+            await self._acquire_budget(estimated_tokens)
+            started = self._clock()
+            yield ticket
+            latency = self._clock() - started
+        except BaseException:
+            latency = None
+            raise
+        finally:
+            self._settle(ticket, latency)
+            await self._release_slot()
+
+    async def _acquire_slot(self):
+        if self._slots is None:
+            self._slots = asyncio.Condition()
+
+        async with self._slots:
+            await self._slots.wait_for(lambda: self.in_flight < int(self.concurrency))
+            self.in_flight += 1
+
+    async def _release_slot(self):
+        async with self._slots:
+            self.in_flight -= 1
+            self._slots.notify_all()
+
+    async def _acquire_budget(self, estimated_tokens: int):
+        while True:
+            wait = max(
+                self._paused_until - self._clock(),
+                self.requests.wait_time(1),
+                self.tokens.wait_time(estimated_tokens),
+            )
+            if wait <= 0:
+                self.requests.take(1)
+                self.tokens.take(estimated_tokens)
+                return
+            await asyncio.sleep(wait)
+
+    def _settle(self, ticket: RequestTicket, latency: float | None):
+        if ticket.used_tokens is not None:
+            self.tokens.adjust(ticket.estimated_tokens - ticket.used_tokens)
+
+        if ticket.throttled:
+            self.concurrency = max(1.0, self.concurrency * THROTTLE_BACKOFF)
+            pause = ticket.retry_after if ticket.retry_after is not None else 1.0
+            self._paused_until = max(self._paused_until, self._clock() + pause)
+            return
+
+        if latency is None:
+            return
+
+        self.min_latency = latency if self.min_latency is None else min(self.min_latency, latency)
+        self.avg_latency = (
+            latency if self.avg_latency is None else 0.8 * self.avg_latency + 0.2 * latency
+        )
+
+        if self.avg_latency <= self.min_latency * LATENCY_TOLERANCE:
+            self.concurrency = min(
+                float(self.max_concurrency), self.concurrency + 1 / self.concurrency
+            )
+        else:
+            self.concurrency = max(1.0, self.concurrency - 1 / self.concurrency)
@@ -0,0 +1,227 @@
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func, nulls_first, or_, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import Company, ScrapeRun
+from app.services.locks import CompanyLocks
+from app.services.scraper import scrape_companies
+
+# Completed runs per company used to estimate how often its board changes
+SCHEDULE_HISTORY_RUNS = 20
+
+# Aim to scrape a board about this many times per change we expect it to make
+SCRAPES_PER_CHANGE = 2.0
+
+# Prior for a board with little history: one change per this many hours. Keeps a
+# new or freshly quiet board from being dropped straight to the max interval.
+PRIOR_HOURS_PER_CHANGE = 24.0
+
+# Random spread applied to every interval so boards don't fall due in lockstep
+SCHEDULE_JITTER = 0.1
+
+# Interval multiplier and dispatch order by tier. Higher-priority tiers are
+# polled more often and claim the scrape budget first when many boards are due.
+TIER_INTERVAL_FACTOR = {"tier1": 0.5, "tier2": 1.0, "tier3": 2.0}
+TIER_PRIORITY = {"tier1": 0, "tier2": 1, "tier3": 2}
+
+
+@dataclass
+class ChurnStats:
+    """A company's recent scrape history, summarized."""
+
+    runs: int = 0
+    changed_runs: int = 0  # runs where the board differed from the previous scrape
+    postings_churned: int = 0  # postings added, removed or edited across those runs
+    span_hours: float = 0.0  # from the oldest run in the window until now
+
+    @property
+    def change_rate(self) -> float:
+        """Estimated board changes per hour, smoothed toward the prior."""
+        return (self.changed_runs + 1) / (self.span_hours + PRIOR_HOURS_PER_CHANGE)
+
+
+def load_churn_stats(
+    db: Session, companies: list[Company], now: datetime | None = None
+) -> dict:
+    """Summarize the last SCHEDULE_HISTORY_RUNS completed scrapes of each company.
+
+    Failed runs say nothing about how often a board changes, so only success
+    (board changed) and unchanged runs are counted.
+
+    Returns:
+        Dict of company_id -> ChurnStats, for every company given
+    """
+    now = now or datetime.utcnow()
+    stats = {company.id: ChurnStats() for company in companies}
+    if not companies:
+        return stats
+
+    ranked = (
+        select(
+            ScrapeRun.company_id,
+            ScrapeRun.started_at,
+            ScrapeRun.status,
+            (
+                func.coalesce(ScrapeRun.jobs_added, 0)
+                + func.coalesce(ScrapeRun.jobs_removed, 0)
+                + func.coalesce(ScrapeRun.jobs_changed, 0)
+            ).label("churn"),
+            func.row_number()
+            .over(partition_by=ScrapeRun.company_id, order_by=ScrapeRun.started_at.desc())
+            .label("rank"),
+        )
+        .where(
+            ScrapeRun.company_id.in_(list(stats)),
+            ScrapeRun.status.in_(("success", "unchanged")),
+        )
+        .subquery()
+    )
+    rows = db.execute(
+        select(ranked.c.company_id, ranked.c.started_at, ranked.c.status, ranked.c.churn)
+        .where(ranked.c.rank <= SCHEDULE_HISTORY_RUNS)
+    )
+
+    for company_id, started_at, status, churn in rows:
+        entry = stats[company_id]
+        entry.runs += 1
+        # A "success" run means the payload fingerprint moved; the first ever
+        # scrape of a board also lands here but adds every posting, which is
+        # still the best evidence we have that the board is active
+        if status == "success" and churn:
+            entry.changed_runs += 1
+            entry.postings_churned += churn
+        entry.span_hours = max(entry.span_hours, (now - started_at).total_seconds() / 3600)
+
+    return stats
+
+
+def scrape_interval(company: Company, stats: ChurnStats) -> timedelta:
+    """How long to wait before scraping a company again.
+
+    The interval targets SCRAPES_PER_CHANGE scrapes per expected board change,
+    scaled by tier, clamped to the configured bounds and jittered.
+    """
+    hours = 1 / (stats.change_rate * SCRAPES_PER_CHANGE)
+    hours *= TIER_INTERVAL_FACTOR.get(company.tier, 1.0)
+
+    min_hours = settings.schedule_min_interval_minutes / 60
+    hours = min(max(hours, min_hours), settings.schedule_max_interval_hours)
+    hours *= random.uniform(1 - SCHEDULE_JITTER, 1 + SCHEDULE_JITTER)
+
+    return timedelta(hours=hours)
+
+
+def reschedule(db: Session, companies: list[Company], now: datetime | None = None):
+    """Set next_scrape_at for companies from their scrape history."""
+    now = now or datetime.utcnow()
+    stats = load_churn_stats(db, companies, now)
+
+    for company in companies:
+        company.next_scrape_at = now + scrape_interval(company, stats[company.id])
+
+    db.commit()
+
+
+def reschedule_scraped(db: Session, companies: list[Company], results: list[dict]):
+    """Reschedule the companies a scrape_companies call actually scraped.
+
+    Companies it skipped keep their schedule: another worker holding the
+    lock reschedules them itself once its scrape is done.
+    """
+    scraped = {r["company"] for r in results if r["status"] != "skipped"}
+    reschedule(db, [company for company in companies if company.slug in scraped])
+
+
+def due_companies(db: Session, limit: int | None = None, now: datetime | None = None):
+    """Active companies whose next scrape is due, highest priority first.
+
+    Never-scheduled companies are due immediately. Within a tier, the most
+    overdue come first.
+    """
+    now = now or datetime.utcnow()
+    tier_rank = case(TIER_PRIORITY, value=Company.tier, else_=len(TIER_PRIORITY))
+
+    return (
+        db.query(Company)
+        .filter(
+            Company.is_active.is_(True),
+            Company.ats_type.isnot(None),
+            or_(Company.next_scrape_at.is_(None), Company.next_scrape_at <= now),
+        )
+        .order_by(tier_rank, nulls_first(Company.next_scrape_at.asc()))
+        .limit(limit)
+        .all()
+    )
+
+
+def run_due_scrapes(db: Session, limit: int | None = None) -> dict:
+    """Claim the companies that are due, scrape them and schedule their next scrape.
+
+    Safe to run from many processes at once: each company is claimed with an
+    advisory lock, and re-checked once held in case another worker scraped
+    and rescheduled it in the meantime. Workers skip past each other's claims,
+    so adding workers adds throughput.
+
+    Args:
+        db: Database session
+        limit: Max boards to scrape this round (the request budget); defaults
+            to settings.schedule_batch_size
+
+    Returns:
+        Dict with the scrape results, how many due companies were claimed by
+        other workers, and how many were left for a later round
+    """
+    limit = settings.schedule_batch_size if limit is None else limit
+    now = datetime.utcnow()
+    due = due_companies(db, now=now)
+
+    with CompanyLocks(db) as locks:
+        batch = []
+        claimed_elsewhere = 0
+
+        for company in due:
+            if len(batch) >= limit:
+                break
+            if not locks.try_acquire(company.id):
+                claimed_elsewhere += 1
+                continue
+
+            db.refresh(company)
+            if company.next_scrape_at is not None and company.next_scrape_at > now:
+                claimed_elsewhere += 1
+                continue
+            batch.append(company)
+
+        results = scrape_companies(db, batch, locks=locks)
+        # Reschedule before the locks are released, so the next claimant sees it
+        reschedule_scraped(db, batch, results)
+
+    return {
+        "results": results,
+        "scraped": len(batch),
+        "claimed_elsewhere": claimed_elsewhere,
+        "deferred": len(due) - len(batch) - claimed_elsewhere,
+        "total_jobs_added": sum(r.get("jobs_added", 0) for r in results),
+    }
+
+
+def schedule_summary(db: Session, companies: list[Company]) -> list[dict]:
+    """Per-company schedule and churn, for the admin view."""
+    stats = load_churn_stats(db, companies)
+
+    return [
+        {
+            "company": c.slug,
+            "tier": c.tier,
+            "next_scrape_at": c.next_scrape_at,
+            "runs": stats[c.id].runs,
+            "changed_runs": stats[c.id].changed_runs,
+            "postings_churned": stats[c.id].postings_churned,
+            "changes_per_day": round(stats[c.id].change_rate * 24, 3),
+        }
+        for c in sorted(companies, key=lambda c: c.next_scrape_at or datetime.min)
+    ]
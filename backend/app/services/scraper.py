@@ -1,23 +1,91 @@
-from datetime import datetime
+import asyncio
+import hashlib
+import json
+import logging
+import uuid
+from collections import defaultdict
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 
+import httpx
+from sqlalchemy import (
+    String,
+    all_,
+    any_,
+    bindparam,
+    case,
+    func,
+    literal_column,
+    null,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.models import Company, JobPosting, ScrapeRun
-from app.services.ats import AshbyScraper, GreenhouseScraper, LeverScraper
-from app.services.ats.base import BaseScraper
+from app.services.ats.archive import PayloadArchive, ReplayScraper, SnapshotWriter
+from app.services.ats.base import BaseScraper, FetchResult, KnownPosting, RawJob
+from app.services.ats.http import http_pool
+from app.services.ats.registry import registry
+from app.services.ats.resilience import CircuitOpenError
+from app.services.locations import location_columns
+from app.services.locks import CompanyLocks
+
+logger = logging.getLogger(__name__)
+
+# Jobs handed from a board's stream to the database per chunk (one upsert each)
+SCRAPE_CHUNK_SIZE = 500
+
+# Max chunks buffered between the fetchers and the database writer. Together with
+# SCRAPE_CHUNK_SIZE this bounds scrape-all memory, however large the boards are.
+SCRAPE_QUEUE_DEPTH = 8
+
+# Max staleness of the stored last_seen_at on still-open postings
+LAST_SEEN_REFRESH = timedelta(hours=settings.last_seen_refresh_hours)
+
+# Raw posting columns rewritten when a posting's content fingerprint changes
+CONTENT_FIELDS = (
+    "title_raw",
+    "description_html",
+    "description_plain",
+    "department_raw",
+    "location_raw",
+    "job_url",
+    "apply_url",
+    "ats_remote_policy",
+    "ats_employment_type",
+    "ats_salary_min",
+    "ats_salary_max",
+    "ats_salary_currency",
+    "location_cities",
+    "location_countries",
+    "location_remote",
+)
+
+# RawJob fields stored as the posting's ats_* columns
+STRUCTURED_FIELDS = (
+    "remote_policy",
+    "employment_type",
+    "salary_min",
+    "salary_max",
+    "salary_currency",
+)
 
 
 def get_scraper(ats_type: str) -> BaseScraper:
-    """Get the appropriate scraper for an ATS type."""
-    scrapers = {
-        "greenhouse": GreenhouseScraper(),
-        "ashby": AshbyScraper(),
-        "lever": LeverScraper(),
-    }
+    """Get the appropriate scraper for an ATS type.
 
-    scraper = scrapers.get(ats_type)
-    if not scraper:
-        raise ValueError(f"Unknown ATS type: {ats_type}")
+    In replay mode (settings.scrape_replay) the scraper reads each board's
+    latest snapshot from the payload archive instead of calling the ATS.
+    """
+    scraper = registry.get(ats_type)
+    if settings.scrape_replay:
+        return ReplayScraper(scraper, PayloadArchive(settings.scrape_archive_dir), ats_type)
 
     return scraper
 
@@ -31,110 +99,629 @@ def run_scrape_for_company(db: Session, company: Company) -> dict:
     if not company.ats_type or not company.ats_identifier:
         return {"status": "skipped", "reason": "Missing ATS configuration"}
 
-    # Create scrape run record
-    scrape_run = ScrapeRun(company_id=company.id)
-    db.add(scrape_run)
-    db.flush()
+    result = scrape_companies(db, [company])[0]
+    result.pop("company")
+    return result
+
+
+def scrape_companies(
+    db: Session, companies: list[Company], locks: CompanyLocks | None = None
+) -> list[dict]:
+    """Scrape many companies concurrently and update the database.
+
+    All boards are fetched at once over the pooled async HTTP client, whose
+    connections stay open between calls, with in-flight requests capped per
+    ATS host. Each board is streamed in chunks of SCRAPE_CHUNK_SIZE jobs to a
+    single writer that applies them as they arrive, in a worker thread so the
+    fetches keep going meanwhile. The session is never used concurrently and
+    memory stays bounded by the chunk size rather than the board size.
+
+    Each company is first claimed with a Postgres advisory lock. Companies
+    another process is already scraping are skipped, so any number of workers
+    can scrape side by side without duplicate ScrapeRuns.
+
+    Args:
+        db: Database session
+        companies: Companies to scrape
+        locks: Locks the caller already holds, if it claimed the companies itself
+
+    Returns:
+        List of scrape result dicts, one per company, each tagged with the company slug
+    """
+    if locks is not None:
+        return http_pool.run(_scrape_companies_async(db, companies, locks))
+
+    with CompanyLocks(db) as locks:
+        return http_pool.run(_scrape_companies_async(db, companies, locks))
+
+
+async def _scrape_companies_async(
+    db: Session, companies: list[Company], locks: CompanyLocks
+) -> list[dict]:
+    results = []
+    pending = []
+
+    for company in companies:
+        if not company.ats_type or not company.ats_identifier:
+            results.append({
+                "company": company.slug,
+                "status": "skipped",
+                "reason": "Missing ATS configuration",
+            })
+        elif not locks.try_acquire(company.id):
+            results.append({
+                "company": company.slug,
+                "status": "skipped",
+                "reason": "Scrape already in progress",
+            })
+        else:
+            pending.append(company)
+
+    semaphores: dict[str, asyncio.Semaphore] = defaultdict(
+        lambda: asyncio.Semaphore(settings.scrape_concurrency_per_host)
+    )
+
+    known = _load_known_postings(db, pending)
+    # Replayed boards are already archived
+    archive = None
+    if settings.scrape_archive_dir and not settings.scrape_replay:
+        archive = PayloadArchive(settings.scrape_archive_dir)
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=SCRAPE_QUEUE_DEPTH)
+    writer = _ScrapeWriter(db, known, archive)
+
+    # The pooled client is shared across calls, so it is not closed here
+    client = http_pool.async_client
+    producers = {
+        company.id: asyncio.create_task(
+            _stream_company(
+                company, _Board.of(company), client, semaphores, known.get(company.id), queue
+            )
+        )
+        for company in pending
+    }
 
     try:
-        # Get appropriate scraper
-        scraper = get_scraper(company.ats_type)
+        broken: set[uuid.UUID] = set()
+        remaining = len(pending)
+
+        while remaining:
+            event, company, payload = await queue.get()
+            if company.id in broken:
+                continue  # Already recorded as failed, its producer is cancelled
+
+            # Written off the event loop, so the fetches keep streaming meanwhile
+            result, failed = await asyncio.to_thread(writer.apply, event, company, payload)
+            if result is not None:
+                results.append({"company": company.slug, **result})
+                remaining -= 1
+            if failed:
+                broken.add(company.id)
+                producers[company.id].cancel()
+    finally:
+        for producer in producers.values():
+            producer.cancel()
+        await asyncio.gather(*producers.values(), return_exceptions=True)
+
+    return results
+
+
+class _ScrapeWriter:
+    """Applies the board fetchers' events to the database, one event at a time.
+
+    apply() is blocking and runs in a worker thread, so upserts don't stall the
+    event loop the fetches share. The caller awaits each event before handing
+    over the next, so the session is still never used concurrently.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        known: dict[uuid.UUID, dict[str, KnownPosting]],
+        archive: PayloadArchive | None,
+    ):
+        self.db = db
+        self.known = known
+        self.archive = archive
+        self.deltas: dict[uuid.UUID, _BoardDelta] = {}
+
+    def apply(self, event: str, company: Company, payload) -> tuple[dict | None, bool]:
+        """Apply one event from _stream_company.
+
+        Returns:
+            The company's result once its scrape is over (else None), and whether
+            writing it failed, so the rest of its board should be dropped
+        """
+        db = self.db
+        try:
+            if event == "start":
+                started_at, fetch = payload
+                scrape_run = ScrapeRun(company_id=company.id, started_at=started_at)
+                db.add(scrape_run)
+                db.commit()
+                archive = self.archive
+                snapshot = archive.writer() if archive and not fetch.not_modified else None
+                self.deltas[company.id] = _BoardDelta(
+                    db, company, scrape_run, fetch, self.known.get(company.id), snapshot
+                )
+
+            elif event == "chunk":
+                self.deltas[company.id].apply_chunk(payload)
+
+            elif event == "done":
+                return self.deltas[company.id].finish(), False
+
+            elif event == "failed":
+                started_at, error = payload
+                delta = self.deltas.get(company.id)
+                if delta is not None:
+                    return delta.fail(error), False
+
+                scrape_run = ScrapeRun(company_id=company.id, started_at=started_at)
+                db.add(scrape_run)
+                db.flush()
+                # Fast-failed without a request while the ATS host is degraded
+                status = "circuit_open" if isinstance(error, CircuitOpenError) else "failed"
+                return _record_failure(db, scrape_run, error, status=status), False
+
+            return None, False
+
+        except Exception as e:
+            # A write that fails (e.g. a value too long for its column) fails
+            # that company's scrape only
+            logger.exception("Writing the scrape of %s failed", company.slug)
+            db.rollback()
+            delta = self.deltas.get(company.id)
+            if delta is not None:
+                return delta.fail(e), True
+
+            scrape_run = ScrapeRun(company_id=company.id, started_at=datetime.utcnow())
+            db.add(scrape_run)
+            return _record_failure(db, scrape_run, e), True
+
+
+@dataclass(frozen=True)
+class _Board:
+    """What a fetcher needs of a company, read up front.
+
+    Fetchers must not touch the Company itself: the writer thread's commits
+    expire it, and reloading it from the event loop would use the session
+    concurrently.
+    """
+
+    ats_type: str
+    identifier: str
+    etag: str | None
+    last_modified: str | None
+
+    @classmethod
+    def of(cls, company: Company) -> "_Board":
+        return cls(
+            company.ats_type, company.ats_identifier, company.ats_etag, company.ats_last_modified
+        )
+
+
+async def _stream_company(
+    company: Company,
+    board: _Board,
+    client: httpx.AsyncClient,
+    semaphores: dict[str, asyncio.Semaphore],
+    known: dict[str, KnownPosting] | None,
+    queue: asyncio.Queue,
+):
+    """Fetch one company's board and feed it to the writer in chunks.
+
+    Emits ("start", company, (started_at, fetch)), then zero or more
+    ("chunk", company, jobs), then ("done", company, None) - or
+    ("failed", company, (started_at, error)) at any point. The company is only
+    passed along; the board's details come from board.
+    """
+    started_at = datetime.utcnow()
+
+    try:
+        scraper = get_scraper(board.ats_type)
+        async with semaphores[scraper.host]:
+            started_at = datetime.utcnow()
+            fetch = await scraper.fetch_board(
+                board.identifier,
+                client,
+                etag=board.etag,
+                last_modified=board.last_modified,
+                known=known,
+            )
+            await queue.put(("start", company, (started_at, fetch)))
+
+            chunk = []
+            async for raw_job in _iterate(fetch.jobs):
+                chunk.append(raw_job)
+                if len(chunk) >= SCRAPE_CHUNK_SIZE:
+                    await queue.put(("chunk", company, chunk))
+                    chunk = []
+            if chunk:
+                await queue.put(("chunk", company, chunk))
+
+        await queue.put(("done", company, None))
+    except Exception as e:
+        await queue.put(("failed", company, (started_at, e)))
+
+
+async def _iterate(jobs: Iterable[RawJob] | AsyncIterator[RawJob]) -> AsyncIterator[RawJob]:
+    """Iterate a FetchResult's jobs, whether they are streamed or already in memory."""
+    if hasattr(jobs, "__aiter__"):
+        async for raw_job in jobs:
+            yield raw_job
+    else:
+        for raw_job in jobs:
+            yield raw_job
+
+
+def _load_known_postings(
+    db: Session, companies: list[Company]
+) -> dict[uuid.UUID, dict[str, KnownPosting]]:
+    """Load the stored fingerprint and ATS revision of every posting, keyed by company id."""
+    known: dict[uuid.UUID, dict[str, KnownPosting]] = defaultdict(dict)
+    if not companies:
+        return known
+
+    rows = db.execute(
+        select(
+            JobPosting.company_id,
+            JobPosting.external_id,
+            JobPosting.ats_updated_at,
+            JobPosting.content_hash,
+        ).where(JobPosting.company_id.in_([company.id for company in companies]))
+    )
+    for company_id, external_id, updated_at, content_hash in rows:
+        known[company_id][external_id] = KnownPosting(updated_at, content_hash)
+
+    return known
+
 
-        # Fetch jobs from ATS
-        raw_jobs = scraper.fetch_jobs(company.ats_identifier)
+class _BoardDelta:
+    """Applies one company's scrape to the database, a chunk at a time.
 
-        # Track what we found
-        jobs_found = len(raw_jobs)
-        jobs_added = 0
-        jobs_updated = 0
-        external_ids_seen = set()
+    Each chunk becomes at most one INSERT ... ON CONFLICT statement that adds
+    new postings and rewrites edited ones; postings whose stored fingerprint
+    and ATS revision already match are skipped without touching the database.
+    finish() then runs one UPDATE that reactivates (and coarsely refreshes)
+    postings we already had and one UPDATE that marks everything not seen as
+    removed - unless the board's payload fingerprint shows it is unchanged.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        company: Company,
+        scrape_run: ScrapeRun,
+        fetch: FetchResult,
+        known: dict[str, KnownPosting] | None,
+        snapshot: SnapshotWriter | None = None,
+    ):
+        self.db = db
+        self.company = company
+        self.scrape_run = scrape_run
+        self.fetch = fetch
+        self.known = known or {}
+        self.snapshot = snapshot
+        self.now = datetime.utcnow()
+
+        self.jobs_found = 0
+        self.seen: set[str] = set()
+        self.added: set[str] = set()
+        self.changed: set[str] = set()
+        self.chunks_written = 0
+        # Compact per-posting records for the payload fingerprint (no descriptions)
+        self.records: list[tuple] = []
+
+    def apply_chunk(self, raw_jobs: list[RawJob]):
+        """Upsert the new and edited postings in one chunk of the board."""
+        rows = []
+        # Stored under the fingerprint from before structured fields were part of
+        # it: the content is unchanged, so the hash is upgraded in place
+        upgraded = []
 
         for raw_job in raw_jobs:
-            external_ids_seen.add(raw_job.external_id)
+            self.jobs_found += 1
+            if self.snapshot is not None:
+                self.snapshot.write(raw_job)
+
+            # Deduplicate by external_id - the ATS occasionally lists a posting twice
+            if raw_job.external_id in self.seen:
+                continue
+            self.seen.add(raw_job.external_id)
+
+            content_hash = compute_content_hash(raw_job)
+            self.records.append(_payload_record(raw_job, content_hash))
+
+            stored = self.known.get(raw_job.external_id)
+            if (
+                stored is not None
+                and stored.content_hash == content_hash
+                and stored.updated_at == raw_job.updated_at
+            ):
+                continue
+            if (
+                stored is not None
+                and stored.content_hash != content_hash
+                and stored.content_hash == compute_content_hash(raw_job, structured=False)
+            ):
+                upgraded.append(raw_job.external_id)
+
+            rows.append({
+                "company_id": self.company.id,
+                "external_id": raw_job.external_id,
+                "title_raw": raw_job.title,
+                "description_html": raw_job.description_html,
+                "description_plain": raw_job.description_plain,
+                "department_raw": raw_job.department,
+                "location_raw": raw_job.location,
+                **location_columns(raw_job.location),
+                "job_url": raw_job.job_url,
+                "apply_url": raw_job.apply_url,
+                **{f"ats_{field}": getattr(raw_job, field) for field in STRUCTURED_FIELDS},
+                "published_at": raw_job.published_at,
+                "content_hash": content_hash,
+                "ats_updated_at": raw_job.updated_at,
+                # Use ATS published date for first_seen_at if available
+                "first_seen_at": raw_job.published_at or self.now,
+                "last_seen_at": self.now,
+            })
 
-            # Check if job exists
-            existing = (
-                db.query(JobPosting)
+        if not rows:
+            return
+
+        # Existing postings hit uq_company_external_id and are only rewritten when the
+        # content fingerprint or ATS revision changed; xmax = 0 in RETURNING tells
+        # freshly inserted rows apart from rewritten ones.
+        stmt = pg_insert(JobPosting).values(rows)
+        unchanged = or_(
+            JobPosting.content_hash == stmt.excluded.content_hash,
+            JobPosting.external_id == any_(_text_array(upgraded)),
+        )
+        ats_salary = or_(
+            stmt.excluded.ats_salary_min.isnot(None), stmt.excluded.ats_salary_max.isnot(None)
+        )
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_company_external_id",
+            set_={
+                **{field: stmt.excluded[field] for field in CONTENT_FIELDS},
+                "content_hash": stmt.excluded.content_hash,
+                "ats_updated_at": stmt.excluded.ats_updated_at,
+                # The ATS's own fields take precedence over a kept normalization,
+                # as they do when the normalizer writes one
+                "remote_policy": func.coalesce(
+                    stmt.excluded.ats_remote_policy, JobPosting.remote_policy
+                ),
+                **{
+                    field: case(
+                        (ats_salary, stmt.excluded[f"ats_{field}"]),
+                        else_=getattr(JobPosting, field),
+                    )
+                    for field in ("salary_min", "salary_max", "salary_currency")
+                },
+                # Edited postings go back through the normalizer with a fresh retry
+                # budget. Rows scraped before fingerprints existed, or under the
+                # fingerprint without structured fields, only get their hash backfilled.
+                "normalized_at": case(
+                    (JobPosting.content_hash.is_(None), JobPosting.normalized_at),
+                    (unchanged, JobPosting.normalized_at),
+                    else_=null(),
+                ),
+                # Re-derived by preprocess_pending ahead of normalization
+                "description_text": case(
+                    (unchanged, JobPosting.description_text),
+                    else_=null(),
+                ),
+                "description_blocks": case(
+                    (unchanged, JobPosting.description_blocks),
+                    else_=null(),
+                ),
+                "normalize_attempts": case(
+                    (JobPosting.content_hash.is_(None), JobPosting.normalize_attempts),
+                    (unchanged, JobPosting.normalize_attempts),
+                    else_=0,
+                ),
+            },
+            where=or_(
+                JobPosting.content_hash.is_distinct_from(stmt.excluded.content_hash),
+                JobPosting.ats_updated_at.is_distinct_from(stmt.excluded.ats_updated_at),
+            ),
+        ).returning(JobPosting.external_id, literal_column("xmax = 0"))
+
+        try:
+            for external_id, inserted in self.db.execute(stmt):
+                if inserted:
+                    self.added.add(external_id)
+                else:
+                    self.changed.add(external_id)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        self.chunks_written += 1
+
+    def finish(self) -> dict:
+        """Mark unseen postings removed and record the completed scrape run."""
+        company = self.company
+        scrape_run = self.scrape_run
+
+        if self.fetch.not_modified:
+            # The ATS answered 304, so nothing was streamed - count what is live
+            self.jobs_found = (
+                self.db.query(func.count(JobPosting.id))
                 .filter(
                     JobPosting.company_id == company.id,
-                    JobPosting.external_id == raw_job.external_id,
+                    JobPosting.removed_at.is_(None),
                 )
-                .first()
+                .scalar()
             )
+            payload_hash = company.payload_hash
+            unchanged = True
+        else:
+            payload_hash = _hash_records(self.records)
+            unchanged = payload_hash == company.payload_hash
 
-            if existing:
-                # Update last_seen_at
-                existing.last_seen_at = datetime.utcnow()
-
-                # If it was previously removed, mark it as active again
-                if existing.removed_at:
-                    existing.removed_at = None
-
-                jobs_updated += 1
-            else:
-                # Create new job
-                # Use ATS published date for first_seen_at if available,
-                # otherwise fall back to now
-                now = datetime.utcnow()
-                first_seen = raw_job.published_at or now
-
-                job = JobPosting(
-                    company_id=company.id,
-                    external_id=raw_job.external_id,
-                    title_raw=raw_job.title,
-                    description_html=raw_job.description_html,
-                    description_plain=raw_job.description_plain,
-                    department_raw=raw_job.department,
-                    location_raw=raw_job.location,
-                    job_url=raw_job.job_url,
-                    apply_url=raw_job.apply_url,
-                    published_at=raw_job.published_at,
-                    first_seen_at=first_seen,
-                    last_seen_at=now,
-                )
-                db.add(job)
-                jobs_added += 1
-
-        # Mark jobs as removed if not seen in this scrape
         jobs_removed = 0
-        active_jobs = (
-            db.query(JobPosting)
-            .filter(
-                JobPosting.company_id == company.id,
-                JobPosting.removed_at.is_(None),
-            )
-            .all()
-        )
+        if not unchanged:
+            jobs_removed = self._apply_removals()
 
-        for job in active_jobs:
-            if job.external_id not in external_ids_seen:
-                job.removed_at = datetime.utcnow()
-                jobs_removed += 1
+        jobs_seen = self.jobs_found if self.fetch.not_modified else len(self.seen)
+        status = "unchanged" if unchanged else "success"
 
-        # Update scrape run
         scrape_run.completed_at = datetime.utcnow()
-        scrape_run.status = "success"
-        scrape_run.jobs_found = jobs_found
-        scrape_run.jobs_added = jobs_added
+        scrape_run.status = status
+        scrape_run.jobs_found = self.jobs_found
+        scrape_run.jobs_added = len(self.added)
         scrape_run.jobs_removed = jobs_removed
+        scrape_run.jobs_changed = len(self.changed)
+        scrape_run.payload_hash = payload_hash
+        if self.snapshot is not None:
+            scrape_run.snapshot_hash = self.snapshot.commit(
+                company.ats_type, company.ats_identifier
+            )
 
-        # Update company last_scraped_at
+        company.payload_hash = payload_hash
+        company.ats_etag = self.fetch.etag
+        company.ats_last_modified = self.fetch.last_modified
         company.last_scraped_at = datetime.utcnow()
 
-        db.commit()
+        self.db.commit()
 
         return {
-            "status": "success",
-            "jobs_found": jobs_found,
-            "jobs_added": jobs_added,
-            "jobs_updated": jobs_updated,
+            "status": status,
+            "jobs_found": self.jobs_found,
+            "jobs_added": len(self.added),
+            "jobs_updated": jobs_seen - len(self.added),
+            "jobs_changed": len(self.changed),
             "jobs_removed": jobs_removed,
         }
 
-    except Exception as e:
-        scrape_run.completed_at = datetime.utcnow()
-        scrape_run.status = "failed"
-        scrape_run.error_message = str(e)
-        db.commit()
+    def _apply_removals(self) -> int:
+        """Reactivate postings seen again and remove those missing; returns removals."""
+        company = self.company
+        seen = list(self.seen)
+        now = self.now
+
+        # Active postings are implicitly confirmed by company.last_scraped_at, so the
+        # stored last_seen_at only needs writing on reactivation, or when it has fallen
+        # more than LAST_SEEN_REFRESH behind. This keeps steady-state scrapes from
+        # producing a new tuple version for every open posting.
+        existing_ids = [eid for eid in seen if eid not in self.added]
+        if existing_ids:
+            self.db.execute(
+                update(JobPosting)
+                .where(
+                    JobPosting.company_id == company.id,
+                    JobPosting.external_id == any_(_text_array(existing_ids)),
+                    or_(
+                        JobPosting.removed_at.isnot(None),
+                        JobPosting.last_seen_at < now - LAST_SEEN_REFRESH,
+                    ),
+                )
+                .values(last_seen_at=now, removed_at=None),
+                execution_options={"synchronize_session": False},
+            )
+
+        # Mark jobs as removed if not seen in this scrape. They were last confirmed by
+        # the previous successful scrape, so settle last_seen_at as part of the transition.
+        removed = self.db.execute(
+            update(JobPosting)
+            .where(
+                JobPosting.company_id == company.id,
+                JobPosting.removed_at.is_(None),
+                JobPosting.external_id != all_(_text_array(seen)),
+            )
+            .values(
+                removed_at=now,
+                last_seen_at=func.greatest(JobPosting.last_seen_at, company.last_scraped_at),
+            ),
+            execution_options={"synchronize_session": False},
+        )
+
+        return removed.rowcount
+
+    def fail(self, error: Exception) -> dict:
+        """Record a scrape that broke off part way through.
+
+        Chunks already applied stay - they are real postings - but nothing is
+        marked removed, and the payload fingerprint is cleared so the next
+        scrape runs a full delta.
+        """
+        if self.snapshot is not None:
+            self.snapshot.discard()
+
+        if self.chunks_written:
+            self.company.payload_hash = None
+            status = "partial"
+        else:
+            status = "failed"
+
+        self.scrape_run.jobs_found = self.jobs_found
+        self.scrape_run.jobs_added = len(self.added)
+        self.scrape_run.jobs_changed = len(self.changed)
+        result = _record_failure(self.db, self.scrape_run, error, status=status)
+        return result
+
+
+def compute_content_hash(raw_job: RawJob, structured: bool = True) -> str:
+    """Fingerprint the parts of a posting that feed normalization.
+
+    structured=False gives the fingerprint from before the ATS's structured
+    fields were part of it, which postings scraped earlier are stored with.
+    """
+    if raw_job.content_hash:
+        return raw_job.content_hash
+
+    record = [
+        raw_job.title,
+        raw_job.description_html,
+        raw_job.description_plain,
+        raw_job.department,
+        raw_job.location,
+    ]
+    # Only added when present, so postings without them keep their fingerprint
+    values = [getattr(raw_job, field) for field in STRUCTURED_FIELDS]
+    if structured and any(value is not None for value in values):
+        record.append(values)
+    encoded = json.dumps(record, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def _payload_record(raw_job: RawJob, content_hash: str) -> tuple:
+    """The per-posting part of a board's payload fingerprint."""
+    return (
+        raw_job.external_id,
+        content_hash,
+        raw_job.job_url,
+        raw_job.apply_url,
+        str(raw_job.published_at),
+        str(raw_job.updated_at),
+    )
+
+
+def _hash_records(records: list[tuple]) -> str:
+    """Fingerprint a board, independent of the order the ATS listed jobs in.
+
+    Built from per-posting content hashes, so a board fetched incrementally
+    (with unchanged content carried over) hashes the same as a full fetch.
+    """
+    encoded = json.dumps(sorted(records), separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def _text_array(values: list[str]):
+    """Bind a list of strings as a single Postgres text[] parameter."""
+    return bindparam(None, values, type_=ARRAY(String), unique=True)
+
+
+def _record_failure(
+    db: Session, scrape_run: ScrapeRun, error: Exception, status: str = "failed"
+) -> dict:
+    """Mark a scrape run as failed."""
+    scrape_run.completed_at = datetime.utcnow()
+    scrape_run.status = status
+    scrape_run.error_message = str(error)
+    db.commit()
 
-        return {"status": "failed", "error": str(e)}
+    return {"status": status, "error": str(error)}
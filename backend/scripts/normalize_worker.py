@@ -0,0 +1,46 @@
+"""Run a normalization worker that keeps normalizing jobs as they are scraped.
+
+Start as many of these as the OpenAI rate limits allow. Workers lease pending
+jobs with FOR UPDATE SKIP LOCKED, so they never normalize the same job twice,
+and a crashed worker's leases expire and are picked up by the others.
+
+Usage:
+    python scripts/normalize_worker.py [--window N] [--interval SECONDS]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.database import SessionLocal
+from app.services.normalizer import normalize_stream
+from app.services.preprocess import preprocess_pending
+
+
+def work(window: int, interval: float):
+    while True:
+        db = SessionLocal()
+        try:
+            preprocess_pending(db)
+            result = normalize_stream(db, window=window)
+            if result["total"]:
+                print(f"Normalized {result['success']} jobs ({result['failed']} failed)")
+        except Exception as e:
+            print(f"Normalization round failed: {e}")
+        finally:
+            db.close()
+
+        # The stream only returns once the queue is empty
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--window", type=int, default=50, help="API calls in flight")
+    parser.add_argument("--interval", type=float, default=30.0, help="Seconds between polls")
+    args = parser.parse_args()
+
+    work(args.window, args.interval)
@@ -0,0 +1,28 @@
+"""Parse the locations of postings stored without one, or of all postings.
+
+Usage:
+    python scripts/parse_locations.py [--reparse]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.database import SessionLocal
+from app.services.locations import parse_pending_locations
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--reparse", action="store_true", help="Re-parse every posting after a gazetteer change"
+    )
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print(json.dumps(parse_pending_locations(db, args.reparse), indent=2))
+    finally:
+        db.close()
@@ -0,0 +1,32 @@
+"""Run background workers for queued admin pipeline jobs (scrape-all, repopulate, ...).
+
+Use this when the API runs with PIPELINE_WORKERS=0, to keep long pipelines
+off the web processes. Any number of these can run against the same database.
+
+Usage:
+    python scripts/pipeline_worker.py [--workers N]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.pipeline import PipelineWorkerPool
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2, help="Jobs to run at once")
+    args = parser.parse_args()
+
+    pool = PipelineWorkerPool(args.workers)
+    pool.start()
+    print(f"Running {args.workers} pipeline workers")
+
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        pool.stop()
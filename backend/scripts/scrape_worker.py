@@ -0,0 +1,50 @@
+"""Run a scrape worker that keeps scraping companies as their schedule falls due.
+
+Start as many of these as needed, on one host or several. Workers claim
+companies through Postgres advisory locks, so they share the due list
+without scraping any company twice.
+
+Usage:
+    python scripts/scrape_worker.py [--interval SECONDS] [--batch N]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.database import SessionLocal
+from app.services.scheduler import run_due_scrapes
+
+
+def work(interval: float, batch: int | None):
+    while True:
+        result = None
+        db = SessionLocal()
+        try:
+            result = run_due_scrapes(db, limit=batch)
+            print(
+                f"Scraped {result['scraped']} companies "
+                f"({result['total_jobs_added']} new jobs, "
+                f"{result['claimed_elsewhere']} claimed by other workers, "
+                f"{result['deferred']} deferred)"
+            )
+        except Exception as e:
+            print(f"Scrape round failed: {e}")
+        finally:
+            db.close()
+
+        # Go straight into the next round while there is a backlog
+        if not result or not result["deferred"]:
+            time.sleep(interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--interval", type=float, default=60.0, help="Seconds between rounds")
+    parser.add_argument("--batch", type=int, default=None, help="Max boards per round")
+    args = parser.parse_args()
+
+    work(args.interval, args.batch)
@@ -0,0 +1,31 @@
+"""Retrain the normalization pre-classifier and print its held-out accuracy report.
+
+Usage:
+    python scripts/train_classifier.py [--min-confidence P]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.database import SessionLocal
+from app.services.classifier import train_classifier
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--min-confidence",
+        type=float,
+        default=None,
+        help="Confidence the report's coverage is counted at (default CLASSIFIER_MIN_CONFIDENCE)",
+    )
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print(json.dumps(train_classifier(db, args.min_confidence), indent=2))
+    finally:
+        db.close()
@@ -42,6 +42,8 @@ def db_session(test_engine):
 
     Uses a nested transaction pattern where commit() creates a savepoint
     instead of actually committing, allowing full rollback after the test.
+    rollback() goes back to the last savepoint, like a real session going
+    back to its last commit.
     """
     connection = test_engine.connect()
     transaction = connection.begin()
@@ -61,6 +63,15 @@ def db_session(test_engine):
 
     session.commit = fake_commit
 
+    def fake_rollback():
+        # Roll back to the last "commit" rather than undoing the whole test
+        nested = session.get_nested_transaction()
+        if nested is not None and nested.is_active:
+            nested.rollback()
+        session.begin_nested()
+
+    session.rollback = fake_rollback
+
     # Start initial nested transaction
     session.begin_nested()
 
@@ -0,0 +1,510 @@
+"""
+Tests for the ATS scrapers' HTTP behaviour.
+
+Requests are served by httpx.MockTransport, so no network access is needed.
+"""
+import asyncio
+import json
+from datetime import datetime
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.services.ats.ashby import AshbyScraper
+from app.services.ats.base import KnownPosting
+from app.services.ats.greenhouse import GreenhouseScraper
+from app.services.ats.http import HttpPool
+from app.services.ats.lever import LeverScraper
+from app.services.ats.registry import ScraperRegistry
+from app.services.ats.resilience import CircuitBreaker, CircuitOpenError, retry_delay
+from app.services.ats.stream import JsonArrayStream
+from app.services.scraper import compute_content_hash
+
+
+def greenhouse_job(job_id: int, updated_at: str, content: bool = True) -> dict:
+    job = {
+        "id": job_id,
+        "title": f"Engineer {job_id}",
+        "updated_at": updated_at,
+        "location": {"name": "San Francisco, CA"},
+        "absolute_url": f"https://boards.greenhouse.io/acme/jobs/{job_id}",
+    }
+    if content:
+        job["content"] = f"<p>Job {job_id}</p>"
+        job["departments"] = [{"name": "Engineering"}]
+    return job
+
+
+def fetch(scraper, handler, **kwargs):
+    """Run fetch_board against a mock transport, draining the streamed jobs."""
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            result = await scraper.fetch_board("acme", client, **kwargs)
+            if hasattr(result.jobs, "__aiter__"):
+                result.jobs = [job async for job in result.jobs]
+            return result
+
+    return asyncio.run(run())
+
+
+class TestGreenhouseIncrementalFetch:
+    """Tests for the two-phase Greenhouse fetch."""
+
+    def test_first_scrape_fetches_full_content(self):
+        """With nothing stored, the board is fetched once with content=true."""
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, json={"jobs": [greenhouse_job(1, "2025-01-01T00:00:00Z")]})
+
+        result = fetch(GreenhouseScraper(), handler)
+
+        assert len(requests) == 1
+        assert requests[0].url.params["content"] == "true"
+        assert result.jobs[0].description_html == "<p>Job 1</p>"
+        assert result.jobs[0].updated_at == datetime(2025, 1, 1)
+
+    def test_only_new_or_updated_jobs_fetch_content(self):
+        """Unchanged jobs are carried over by content hash; the rest are fetched individually."""
+        listing = [greenhouse_job(i, "2025-01-01T00:00:00Z", content=False) for i in range(1, 5)]
+        listing.append(greenhouse_job(5, "2025-02-01T00:00:00-05:00", content=False))
+        requested = []
+
+        def handler(request):
+            requested.append(request.url.path)
+            if request.url.path.endswith("/jobs"):
+                assert "content" not in request.url.params
+                return httpx.Response(200, json={"jobs": listing})
+            job_id = int(request.url.path.rsplit("/", 1)[1])
+            return httpx.Response(200, json=greenhouse_job(job_id, "2025-02-01T05:00:00Z"))
+
+        known = {
+            str(i): KnownPosting(updated_at=datetime(2025, 1, 1), content_hash=f"hash-{i}")
+            for i in range(1, 5)
+        }
+        known["5"] = KnownPosting(updated_at=datetime(2025, 1, 1), content_hash="hash-5")
+
+        result = fetch(GreenhouseScraper(), handler, known=known)
+
+        assert requested == ["/v1/boards/acme/jobs", "/v1/boards/acme/jobs/5"]
+        by_id = {job.external_id: job for job in result.jobs}
+        assert len(by_id) == 5
+        assert compute_content_hash(by_id["1"]) == "hash-1"
+        assert by_id["5"].description_html == "<p>Job 5</p>"
+        assert by_id["5"].content_hash is None
+
+    def test_mostly_stale_listing_falls_back_to_full_fetch(self):
+        """When most jobs need content, a single content=true request is used instead."""
+        listing = [greenhouse_job(i, "2025-03-01T00:00:00Z", content=False) for i in range(1, 5)]
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            if request.url.params.get("content") == "true":
+                jobs = [greenhouse_job(i, "2025-03-01T00:00:00Z") for i in range(1, 5)]
+                return httpx.Response(200, json={"jobs": jobs})
+            return httpx.Response(200, json={"jobs": listing}, headers={"ETag": '"v2"'})
+
+        known = {"1": KnownPosting(updated_at=datetime(2025, 1, 1), content_hash="hash-1")}
+
+        result = fetch(GreenhouseScraper(), handler, known=known)
+
+        assert len(requests) == 2
+        assert len(result.jobs) == 4
+        assert all(job.description_html for job in result.jobs)
+        assert result.etag == '"v2"'
+
+
+class TestJsonArrayStream:
+    """Tests for the incremental board payload parser."""
+
+    def feed_in_pieces(self, stream, text, size):
+        items = []
+        for i in range(0, len(text), size):
+            items.extend(stream.feed(text[i : i + size]))
+        items.extend(stream.close())
+        return items
+
+    def test_keyed_array_split_at_every_position(self):
+        """Items under a top-level key are recovered however the body is chunked."""
+        payload = {
+            "apiVersion": "1",
+            "meta": {"jobs": ["not", "these"]},
+            "jobs": [{"id": i, "title": 'Say "hi" ]}', "n": i * 10} for i in range(5)],
+            "total": 5,
+        }
+        text = json.dumps(payload)
+
+        for size in range(1, 12):
+            assert self.feed_in_pieces(JsonArrayStream("jobs"), text, size) == payload["jobs"]
+
+    def test_bare_array_with_numbers_across_chunks(self):
+        """A number split across chunks is not emitted early."""
+        stream = JsonArrayStream()
+        assert stream.feed("[1, 23") == [1]
+        assert stream.feed("4, 5]") == [234, 5]
+        assert stream.close() == []
+
+    def test_truncated_document_raises(self):
+        """A body that ends mid-array is an error, not a short board."""
+        stream = JsonArrayStream("jobs")
+        stream.feed('{"jobs": [{"id": 1}')
+
+        with pytest.raises(ValueError):
+            stream.close()
+
+
+def lever_handler(total: int, requests: list):
+    """Serve a Lever board of `total` postings with skip/limit pagination."""
+    postings = [
+        {"id": f"lever-{i}", "text": f"Engineer {i}", "categories": {"team": "Engineering"}}
+        for i in range(total)
+    ]
+
+    def handler(request):
+        requests.append(request)
+        skip = int(request.url.params["skip"])
+        limit = int(request.url.params["limit"])
+        return httpx.Response(200, json=postings[skip : skip + limit])
+
+    return handler
+
+
+class TestLeverPagination:
+    """Tests for the paginated Lever fetch."""
+
+    def scraper(self) -> LeverScraper:
+        scraper = LeverScraper(HttpPool())
+        scraper.PAGE_SIZE = 10
+        scraper.PAGE_CONCURRENCY = 3
+        return scraper
+
+    def test_pages_merged_in_order(self):
+        """Every page is fetched and its postings come back in board order."""
+        requests = []
+
+        result = fetch(self.scraper(), lever_handler(45, requests))
+
+        assert [job.external_id for job in result.jobs] == [f"lever-{i}" for i in range(45)]
+        assert result.jobs[0].department == "Engineering"
+        # First page, then one wave of three pages, then a wave that hits the short page
+        skips = [int(r.url.params["skip"]) for r in requests]
+        assert skips == [0, 10, 20, 30, 40, 50, 60]
+
+    def test_small_board_single_request(self):
+        """A board that fits in one page takes one request."""
+        requests = []
+
+        result = fetch(self.scraper(), lever_handler(7, requests))
+
+        assert len(result.jobs) == 7
+        assert len(requests) == 1
+
+    def test_board_of_exact_page_multiple(self):
+        """A full last page is followed by an empty one, which ends the fetch."""
+        requests = []
+
+        result = fetch(self.scraper(), lever_handler(20, requests))
+
+        assert len(result.jobs) == 20
+
+    def test_first_page_error_raised_up_front(self):
+        """An error on the first page fails the fetch before any jobs are streamed."""
+        with pytest.raises(httpx.HTTPStatusError):
+            fetch(self.scraper(), lambda request: httpx.Response(404))
+
+
+class TestStructuredFields:
+    """Tests for keeping the remote policy, employment type and salary the ATS states."""
+
+    def test_ashby_workplace_and_compensation(self):
+        requests = []
+        job = {
+            "id": "a1",
+            "title": "Engineer",
+            "workplaceType": "Hybrid",
+            "isRemote": False,
+            "employmentType": "FullTime",
+            "compensation": {
+                "summaryComponents": [
+                    {"compensationType": "EquityPercentage", "interval": "NONE"},
+                    {
+                        "compensationType": "Salary",
+                        "interval": "1 YEAR",
+                        "currencyCode": "USD",
+                        "minValue": 180000,
+                        "maxValue": 240000.0,
+                    },
+                ],
+            },
+        }
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, json={"jobs": [job]})
+
+        raw_job = fetch(AshbyScraper(), handler).jobs[0]
+
+        assert requests[0].url.params["includeCompensation"] == "true"
+        assert raw_job.remote_policy == "hybrid"
+        assert raw_job.employment_type == "FullTime"
+        assert (raw_job.salary_min, raw_job.salary_max, raw_job.salary_currency) == (
+            180000, 240000, "USD"
+        )
+
+    def test_ashby_is_remote_without_workplace_type(self):
+        raw_job = AshbyScraper()._parse_job({"id": "a1", "title": "Engineer", "isRemote": True})
+
+        assert raw_job.remote_policy == "remote"
+        assert raw_job.salary_min is None
+
+    def test_lever_yearly_salary_only(self):
+        job = {
+            "id": "l1",
+            "text": "Engineer",
+            "workplaceType": "on-site",
+            "categories": {"commitment": "Intern"},
+            "salaryRange": {
+                "currency": "EUR", "interval": "per-year-salary", "min": 60000, "max": 80000
+            },
+        }
+
+        raw_job = LeverScraper()._parse_job(job)
+        hourly = LeverScraper()._parse_job({
+            **job,
+            "workplaceType": "unspecified",
+            "salaryRange": {"currency": "EUR", "interval": "per-hour-wage", "min": 30, "max": 40},
+        })
+
+        assert (raw_job.remote_policy, raw_job.employment_type) == ("onsite", "Intern")
+        assert (raw_job.salary_min, raw_job.salary_max, raw_job.salary_currency) == (
+            60000, 80000, "EUR"
+        )
+        assert (hourly.remote_policy, hourly.salary_min) == (None, None)
+
+    def test_greenhouse_metadata_and_offices(self):
+        job = greenhouse_job(1, "2025-01-01T00:00:00Z")
+        job["metadata"] = [
+            {"name": "Workplace Type", "value_type": "single_select", "value": "Remote"},
+            {
+                "name": "Salary Range",
+                "value_type": "currency_range",
+                "value": {"unit": "USD", "min_value": "150000.0", "max_value": "200000.0"},
+            },
+        ]
+
+        raw_job = GreenhouseScraper()._parse_job(job)
+        hourly = GreenhouseScraper()._parse_job({
+            **greenhouse_job(2, "2025-01-01T00:00:00Z"),
+            "metadata": [{
+                "name": "Pay Range",
+                "value_type": "currency_range",
+                "value": {"unit": "USD", "min_value": "40.0", "max_value": "60.0"},
+            }],
+            "offices": [{"name": "Remote - US"}, {"name": "Remote - Canada"}],
+        })
+
+        assert raw_job.remote_policy == "remote"
+        assert (raw_job.salary_min, raw_job.salary_max, raw_job.salary_currency) == (
+            150000, 200000, "USD"
+        )
+        assert hourly.salary_min is None
+        assert hourly.remote_policy == "remote"
+
+    def test_structured_fields_change_fingerprint(self):
+        raw_job = GreenhouseScraper()._parse_job(greenhouse_job(1, "2025-01-01T00:00:00Z"))
+        before = compute_content_hash(raw_job)
+        raw_job.salary_min = 100000
+
+        assert compute_content_hash(raw_job) != before
+
+
+@pytest.fixture
+def no_backoff():
+    """Retry immediately instead of sleeping between attempts."""
+    with patch.object(settings, "scrape_retry_base_delay_seconds", 0):
+        yield
+
+
+class TestRetries:
+    """Tests for retrying transient ATS failures."""
+
+    def test_transient_errors_retried(self, no_backoff):
+        """5xx responses and timeouts are retried until the board loads."""
+        responses = iter([
+            httpx.Response(503),
+            httpx.ReadTimeout("timed out"),
+            httpx.Response(200, json={"jobs": [greenhouse_job(1, "2025-01-01T00:00:00Z")]}),
+        ])
+
+        def handler(request):
+            response = next(responses)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        scraper = GreenhouseScraper(HttpPool())
+        result = fetch(scraper, handler)
+
+        assert [job.external_id for job in result.jobs] == ["1"]
+        assert not scraper.http.breaker(scraper.host).is_open
+
+    def test_gives_up_after_max_retries(self, no_backoff):
+        """A board that keeps failing raises after scrape_max_retries retries."""
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(502)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            fetch(GreenhouseScraper(HttpPool()), handler)
+
+        assert len(requests) == settings.scrape_max_retries + 1
+
+    def test_client_errors_not_retried(self, no_backoff):
+        """A 404 is the board's answer, not a transient failure."""
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(404)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            fetch(GreenhouseScraper(HttpPool()), handler)
+
+        assert len(requests) == 1
+
+    def test_retry_after_honored(self):
+        """Retry-After sets the wait on a 429, capped at the max delay."""
+        assert retry_delay(0, httpx.Response(429, headers={"Retry-After": "7"})) == 7
+        assert retry_delay(0, httpx.Response(429, headers={"Retry-After": "3600"})) == (
+            settings.scrape_retry_max_delay_seconds
+        )
+
+    def test_backoff_grows_with_jitter(self):
+        """Without Retry-After the wait doubles per attempt, jittered below the cap."""
+        base = settings.scrape_retry_base_delay_seconds
+        for attempt in range(3):
+            delay = retry_delay(attempt, httpx.Response(503))
+            assert base * 2**attempt / 2 <= delay <= base * 2**attempt
+
+
+class TestCircuitBreaker:
+    """Tests for the per-host circuit breaker."""
+
+    def test_opens_after_threshold_and_fails_fast(self, no_backoff):
+        """Once a host keeps failing, later fetches fail without a request."""
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(503)
+
+        scraper = GreenhouseScraper(HttpPool())
+        with patch.object(settings, "scrape_breaker_failure_threshold", 2):
+            with pytest.raises(CircuitOpenError):
+                fetch(scraper, handler)
+            sent = len(requests)
+
+            with pytest.raises(CircuitOpenError):
+                fetch(scraper, handler)
+
+        assert sent == 2
+        assert len(requests) == sent
+
+    def test_rate_limiting_does_not_open(self, no_backoff):
+        """429s are retried, but say nothing about whether the host is down."""
+
+        def handler(request):
+            return httpx.Response(429)
+
+        scraper = GreenhouseScraper(HttpPool())
+        with patch.object(settings, "scrape_breaker_failure_threshold", 1):
+            with pytest.raises(httpx.HTTPStatusError):
+                fetch(scraper, handler)
+
+        assert not scraper.http.breaker(scraper.host).is_open
+
+    def test_interrupted_trial_releases_slot(self, no_backoff):
+        """A trial that ends in an unexpected error does not hold the breaker open for good."""
+
+        def handler(request):
+            raise RuntimeError("cancelled")
+
+        scraper = GreenhouseScraper(HttpPool())
+        breaker = scraper.http.breaker(scraper.host)
+        breaker.cooldown = 0
+        breaker.record_failure()
+        breaker.opened_at = 0.0
+
+        with pytest.raises(RuntimeError):
+            fetch(scraper, handler)
+
+        assert breaker.check() is True  # The next trial is let through
+
+    def test_trial_request_after_cooldown(self):
+        """After the cooldown one trial goes through; success closes the breaker."""
+        breaker = CircuitBreaker("api.lever.co", failure_threshold=1, cooldown=0)
+        breaker.record_failure()
+        assert breaker.is_open
+
+        breaker.check()
+        with pytest.raises(CircuitOpenError):
+            breaker.check()  # Only one trial at a time
+
+        breaker.record_success()
+        assert not breaker.is_open
+        breaker.check()
+
+    def test_failed_trial_reopens(self):
+        """A failing trial request opens the breaker again."""
+        breaker = CircuitBreaker("api.lever.co", failure_threshold=1, cooldown=60)
+        breaker.record_failure()
+        breaker.opened_at -= 60
+
+        breaker.check()
+        breaker.record_failure()
+
+        with pytest.raises(CircuitOpenError):
+            breaker.check()
+
+
+class TestScraperRegistry:
+    """Tests for the long-lived scrapers and their shared HTTP pool."""
+
+    def test_scrapers_are_reused(self):
+        """Every lookup returns the same scraper, bound to the registry's pool."""
+        pool = HttpPool()
+        registry = ScraperRegistry(pool)
+
+        scraper = registry.get("greenhouse")
+
+        assert registry.get("greenhouse") is scraper
+        assert scraper.http is pool
+        assert registry.get("lever").http is pool
+
+    def test_unknown_ats_type(self):
+        """Unsupported ATS types are rejected."""
+        with pytest.raises(ValueError):
+            ScraperRegistry(HttpPool()).get("workday")
+
+    def test_async_client_survives_between_runs(self):
+        """The async client is created once and reused by later scrapes until closed."""
+        pool = HttpPool()
+
+        async def get_client():
+            return pool.async_client
+
+        try:
+            client = pool.run(get_client())
+            assert pool.run(get_client()) is client
+            assert not client.is_closed
+        finally:
+            pool.close()
+
+        assert client.is_closed
@@ -0,0 +1,235 @@
+"""
+Tests for batch-API normalization.
+
+A fake batch server stands in for the provider: it holds submitted batches
+until the test finishes them.
+"""
+import json
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from app.config import settings
+from app.models import JobPosting, NormalizationBatch, NormalizationCache, PipelineJob
+from app.services.batch_normalizer import (
+    BatchStatus,
+    LocalBatchTransport,
+    poll_normalization_batches,
+    submit_normalization_batch,
+)
+from app.services.normalizer import lease_pending_jobs
+from app.services.pipeline import enqueue_job, run_next_job
+from app.services.scraper import run_scrape_for_company
+from tests.conftest import make_raw_job
+from tests.test_normalizer import normalized
+
+
+def respond(body: dict) -> dict:
+    """A Responses API response body carrying a NormalizedJob."""
+    text = normalized().model_dump_json()
+    return {
+        "id": "resp_1",
+        "model": body["model"],
+        "output": [
+            {"type": "message", "role": "assistant", "content": [
+                {"type": "output_text", "text": text, "annotations": []},
+            ]},
+        ],
+    }
+
+
+class FakeBatchServer:
+    """Holds submitted batches as in progress until finish() is called."""
+
+    def __init__(self):
+        self.requests: dict[str, list[dict]] = {}
+        self.finished: dict[str, BatchStatus] = {}
+
+    def submit(self, requests: list[dict]) -> str:
+        batch_id = f"batch_{len(self.requests)}"
+        self.requests[batch_id] = requests
+        return batch_id
+
+    def poll(self, batch_id: str) -> BatchStatus:
+        return self.finished.get(batch_id, BatchStatus("in_progress"))
+
+    def finish(self, batch_id: str, status: str = "completed", fail: int = 0, drop: int = 0):
+        """Answer the batch's requests: the first `fail` with errors, the last `drop` not at all."""
+        requests = self.requests[batch_id]
+        results = [
+            {
+                "custom_id": request["custom_id"],
+                "response": {"status_code": 500, "body": {"error": {"message": "Server error"}}},
+                "error": None,
+            }
+            if i < fail
+            else {
+                "custom_id": request["custom_id"],
+                "response": {"status_code": 200, "body": respond(request["body"])},
+                "error": None,
+            }
+            for i, request in enumerate(requests[:len(requests) - drop])
+        ]
+        self.finished[batch_id] = BatchStatus(status, results)
+
+
+@pytest.fixture
+def pending_jobs(db_session, test_company, mock_scraper):
+    """Three distinct unnormalized jobs for test_company, and nothing else pending."""
+    db_session.query(JobPosting).update({"normalized_at": datetime.utcnow()})
+    db_session.query(NormalizationCache).delete()
+    db_session.query(NormalizationBatch).delete()
+    db_session.query(PipelineJob).delete()
+    mock_scraper.set_jobs([make_raw_job(f"job-{i}", title=f"Engineer {i}") for i in range(3)])
+    with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+        run_scrape_for_company(db_session, test_company)
+    return db_session.query(JobPosting).filter(JobPosting.normalized_at.is_(None)).all()
+
+
+class TestBatchNormalization:
+    """Tests for submitting batches and applying their results."""
+
+    def test_submit_writes_structured_requests(self, db_session, pending_jobs):
+        server = FakeBatchServer()
+
+        summary = submit_normalization_batch(db_session, server)
+
+        assert summary["jobs"] == 3
+        [requests] = server.requests.values()
+        assert {r["custom_id"] for r in requests} == {str(job.id) for job in pending_jobs}
+        body = requests[0]["body"]
+        assert requests[0]["url"] == "/v1/responses"
+        assert body["text"]["format"]["type"] == "json_schema"
+        assert body["text"]["format"]["strict"] is True
+        assert "Engineer" in body["input"][1]["content"]
+        json.dumps(requests)  # Serializable as JSONL
+
+    def test_known_fields_left_out_of_schema(self, db_session, pending_jobs):
+        """A posting whose ATS states its remote policy isn't asked for one, as in live calls."""
+        pending_jobs[0].ats_remote_policy = "remote"
+        db_session.commit()
+
+        schemas = []
+
+        def respond_to_schema(body: dict) -> dict:
+            fields = body["text"]["format"]["schema"]["properties"]
+            schemas.append(fields)
+            response = respond(body)
+            content = response["output"][0]["content"][0]
+            data = {k: v for k, v in json.loads(content["text"]).items() if k in fields}
+            content["text"] = json.dumps(data)
+            return response
+
+        transport = LocalBatchTransport(respond_to_schema)
+        submit_normalization_batch(db_session, transport)
+        totals = poll_normalization_batches(db_session, transport)
+
+        assert sorted("remote_policy" in fields for fields in schemas) == [False, True, True]
+        assert totals["success"] == 3
+        db_session.refresh(pending_jobs[0])
+        assert pending_jobs[0].remote_policy == "remote"
+
+    def test_batch_cut_at_size_limits(self, db_session, pending_jobs):
+        """Jobs past the input file or token limit wait for the next batch."""
+        server = FakeBatchServer()
+
+        with patch("app.services.batch_normalizer.MAX_BATCH_BYTES", 1):
+            first = submit_normalization_batch(db_session, server)
+        with patch.object(settings, "normalize_batch_max_tokens", 1):
+            second = submit_normalization_batch(db_session, server)
+
+        # One request always goes, even over a limit on its own
+        assert (first["jobs"], second["jobs"]) == (1, 1)
+        assert len(lease_pending_jobs(db_session, "worker-a", 10)) == 1
+
+    def test_submitted_jobs_held_until_results(self, db_session, pending_jobs):
+        """Streaming workers leave jobs alone while their batch is out."""
+        server = FakeBatchServer()
+        submit_normalization_batch(db_session, server)
+
+        assert lease_pending_jobs(db_session, "worker-a", 10) == []
+        assert poll_normalization_batches(db_session, server)["open"] == 1
+        assert submit_normalization_batch(db_session, server) is None
+
+    def test_results_applied(self, db_session, pending_jobs):
+        server = FakeBatchServer()
+        submit_normalization_batch(db_session, server)
+        server.finish("batch_0")
+
+        totals = poll_normalization_batches(db_session, server)
+
+        assert totals == {"open": 0, "applied": 1, "success": 3, "failed": 0}
+        for job in pending_jobs:
+            db_session.refresh(job)
+            assert job.normalized_title == "Software Engineer"
+            assert job.normalize_leased_until is None
+        batch = db_session.query(NormalizationBatch).one()
+        assert batch.status == "completed"
+        assert batch.succeeded == 3
+        assert db_session.query(NormalizationCache).count() == 3
+
+    def test_failed_and_missing_results_released(self, db_session, pending_jobs):
+        """Errored jobs count an attempt; jobs an expired batch never reached are released."""
+        server = FakeBatchServer()
+        submit_normalization_batch(db_session, server)
+        server.finish("batch_0", status="expired", fail=1, drop=1)
+
+        totals = poll_normalization_batches(db_session, server)
+
+        assert totals["success"] == 1
+        assert totals["failed"] == 1
+        assert db_session.query(NormalizationBatch).one().status == "failed"
+        pending = db_session.query(JobPosting).filter(JobPosting.normalized_at.is_(None)).all()
+        assert sorted(job.normalize_attempts for job in pending) == [0, 1]
+        assert len(lease_pending_jobs(db_session, "worker-a", 10)) == 2
+
+    def test_cached_jobs_not_submitted(self, db_session, pending_jobs):
+        transport = LocalBatchTransport(respond)
+        submit_normalization_batch(db_session, transport)
+        poll_normalization_batches(db_session, transport)
+
+        pending_jobs[0].normalized_at = None
+        db_session.commit()
+        summary = submit_normalization_batch(db_session, transport)
+
+        assert summary == {"batch_id": None, "jobs": 0, "cached": 1, "classified": 0}
+
+    def test_local_transport_round_trip(self, db_session, pending_jobs):
+        transport = LocalBatchTransport(respond)
+
+        summary = submit_normalization_batch(db_session, transport)
+        totals = poll_normalization_batches(db_session, transport)
+
+        assert summary["jobs"] == 3
+        assert totals["success"] == 3
+        assert db_session.query(JobPosting).filter(JobPosting.normalized_at.is_(None)).count() == 0
+
+
+class TestBatchPipelineJob:
+    """Tests for the normalize_batch pipeline job."""
+
+    def test_submits_waits_and_applies(self, db_session, pending_jobs):
+        server = FakeBatchServer()
+        job = enqueue_job(db_session, "normalize_batch")
+
+        polls = []
+
+        def poll(batch_id):
+            # Still running on the first poll, done on the second
+            polls.append(batch_id)
+            if len(polls) == 2:
+                server.finish(batch_id)
+            return FakeBatchServer.poll(server, batch_id)
+
+        server.poll = poll
+        with (
+            patch("app.services.pipeline.get_batch_transport", return_value=server),
+            patch.object(settings, "normalize_batch_poll_seconds", 0),
+        ):
+            run_next_job(db_session, "worker-a")
+
+        assert job.status == "succeeded"
+        assert job.result["submitted"] == {"batches": 1, "jobs": 3, "cached": 0, "classified": 0}
+        assert job.result["applied"] == {"batches": 1, "success": 3, "failed": 0}
+        assert [s["name"] for s in job.stages] == ["preprocess", "submit", "wait"]
@@ -0,0 +1,200 @@
+"""
+Tests for the local normalization pre-classifier.
+
+Training data is a synthetic set of LLM-labeled postings whose fields follow
+from their titles and locations.
+"""
+import random
+import uuid
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from app.config import settings
+from app.models import ClassifierModel, JobPosting, NormalizationCache
+from app.services.classifier import PreClassifier, _clean_title, load_classifier, train_classifier
+from app.services.normalizer import normalize_stream
+from tests.test_normalizer import fake_openai  # noqa: F401
+
+ROLES = [
+    # title, seniority, function, is_leadership, tech
+    ("Senior Software Engineer", "senior", "engineering", False, "Python"),
+    ("Staff Software Engineer", "staff", "engineering", False, "Go"),
+    ("Research Scientist", "mid", "research", False, "PyTorch"),
+    ("Account Executive", "mid", "sales", False, None),
+    ("Engineering Manager", "manager", "engineering", True, "Python"),
+    ("Technical Recruiter", "mid", "people", False, None),
+]
+LOCATIONS = [("San Francisco, CA", "onsite"), ("Remote - US", "remote"), ("London, UK", "onsite")]
+
+
+def add_posting(db_session, company, title, location, **labels) -> JobPosting:
+    job = JobPosting(
+        id=uuid.uuid4(),
+        company_id=company.id,
+        external_id=str(uuid.uuid4()),
+        title_raw=title,
+        location_raw=location,
+        description_plain=f"We are hiring a {title}. You will work with Python and PyTorch. "
+                          f"3+ years of experience required.",
+        **labels,
+    )
+    db_session.add(job)
+    return job
+
+
+@pytest.fixture
+def labeled_postings(db_session, test_company):
+    """300 LLM-normalized postings, and nothing else normalized or pending."""
+    db_session.query(JobPosting).delete()
+    db_session.query(ClassifierModel).delete()
+    db_session.query(NormalizationCache).delete()
+
+    rng = random.Random(1)
+    for _ in range(300):
+        title, seniority, function, leadership, tech = rng.choice(ROLES)
+        location, policy = rng.choice(LOCATIONS)
+        add_posting(
+            db_session, test_company, title, location,
+            seniority=seniority,
+            function=function,
+            is_leadership=leadership,
+            remote_policy=policy,
+            tech_stack=[tech] if tech else [],
+            keywords=["inference"],
+            normalized_at=datetime.utcnow(),
+            normalized_by="llm",
+        )
+    db_session.commit()
+
+
+@pytest.fixture
+def trained(db_session, labeled_postings):
+    with patch.object(settings, "classifier_min_training_jobs", 100):
+        report = train_classifier(db_session)
+    assert report["status"] == "trained"
+    return report
+
+
+class TestTraining:
+    """Tests for training and the accuracy report."""
+
+    def test_report_on_holdout(self, db_session, trained):
+        assert trained["holdout"] == 60
+        assert trained["trained_on"] == 210
+        assert trained["coverage"] > 0.5
+        for field in ("seniority", "function", "is_leadership", "remote_policy"):
+            assert trained["fields"][field]["accuracy"] >= 0.95
+        assert trained["confident_all_correct"] >= 0.95
+
+        model = db_session.query(ClassifierModel).one()
+        assert model.report["holdout"] == 60
+
+    def test_skipped_without_enough_labels(self, db_session, labeled_postings):
+        report = train_classifier(db_session)
+
+        assert report["status"] == "skipped"
+        assert db_session.query(ClassifierModel).count() == 0
+
+    def test_saved_model_round_trips(self, db_session, trained):
+        classifier = load_classifier(db_session)
+        restored = PreClassifier.from_bytes(classifier.to_bytes())
+        job = {"title": "Engineering Manager", "location": "Remote - US", "description": ""}
+
+        assert restored.predict([job]) == classifier.predict([job])
+        fields, confidence = classifier.predict([job])[0]
+        assert fields["is_leadership"] is True
+        assert fields["remote_policy"] == "remote"
+
+    def test_own_predictions_not_used_for_training(self, db_session, labeled_postings):
+        """Postings the classifier filled in never become training labels."""
+        db_session.query(JobPosting).update({"normalized_by": "classifier"})
+        db_session.commit()
+
+        with patch.object(settings, "classifier_min_training_jobs", 1):
+            assert train_classifier(db_session)["status"] == "skipped"
+
+
+class TestNormalizerIntegration:
+    """Tests for confidently classified postings skipping the LLM."""
+
+    def pending(self, db_session, company, title, location, **fields) -> JobPosting:
+        job = add_posting(db_session, company, title, location, **fields)
+        db_session.commit()
+        return job
+
+    def test_confident_posting_skips_llm(
+        self, db_session, test_company, trained, fake_openai  # noqa: F811
+    ):
+        responses, _ = fake_openai
+        job = self.pending(db_session, test_company, "Technical Recruiter - London", "London, UK")
+
+        result = normalize_stream(db_session)
+
+        assert result["classified"] == 1
+        assert responses.calls == 0
+        db_session.refresh(job)
+        assert job.normalized_by == "classifier"
+        assert job.normalized_at is not None
+        assert job.normalized_title == "Technical Recruiter"
+        assert job.function == "people"
+        assert job.team_area == "unknown"
+        assert job.experience_years_min == 3
+        assert job.tech_stack == ["PyTorch", "Python"]
+        assert job.keywords == []
+
+    def test_posting_stating_salary_goes_to_llm(
+        self, db_session, test_company, trained, fake_openai  # noqa: F811
+    ):
+        """The classifier cannot read a salary, so a posting that states one is not skipped."""
+        responses, _ = fake_openai
+        job = self.pending(db_session, test_company, "Technical Recruiter - London", "London, UK")
+        job.description_plain += "\n\nThe salary range for this role is $150,000 - $200,000."
+        db_session.commit()
+
+        result = normalize_stream(db_session)
+
+        assert result["classified"] == 0
+        assert responses.calls == 1
+        db_session.refresh(job)
+        assert job.normalized_by == "llm"
+
+    def test_salary_from_ats_does_not_need_llm(
+        self, db_session, test_company, trained, fake_openai  # noqa: F811
+    ):
+        responses, _ = fake_openai
+        job = self.pending(
+            db_session, test_company, "Technical Recruiter - London", "London, UK",
+            ats_salary_min=150000, ats_salary_max=200000, ats_salary_currency="USD",
+        )
+        job.description_plain += "\n\nThe salary range for this role is $150,000 - $200,000."
+        db_session.commit()
+
+        result = normalize_stream(db_session)
+
+        assert result["classified"] == 1
+        assert responses.calls == 0
+        db_session.refresh(job)
+        assert (job.salary_min, job.salary_max) == (150000, 200000)
+
+    def test_unsure_posting_goes_to_llm(
+        self, db_session, test_company, trained, fake_openai  # noqa: F811
+    ):
+        responses, _ = fake_openai
+        job = self.pending(db_session, test_company, "Technical Recruiter", "London, UK")
+
+        with patch.object(settings, "classifier_min_confidence", 1.01):
+            result = normalize_stream(db_session)
+
+        assert result["classified"] == 0
+        assert responses.calls == 1
+        db_session.refresh(job)
+        assert job.normalized_by == "llm"
+
+
+class TestCleanTitle:
+    def test_strips_trailing_location(self):
+        assert _clean_title("Software Engineer - New York", "New York, NY") == "Software Engineer"
+        assert _clean_title("Recruiter (London)", "London, UK") == "Recruiter"
+        assert _clean_title("Engineer, Inference", "San Francisco") == "Engineer, Inference"
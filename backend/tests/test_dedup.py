@@ -0,0 +1,59 @@
+"""
+Tests for MinHash near-duplicate detection.
+"""
+from app.services.dedup import NearDuplicateIndex, minhash, similarity
+
+TEMPLATE = (
+    "We are hiring a software engineer to build the inference platform that serves "
+    "our models to millions of users. You will design low latency serving systems, "
+    "own capacity planning, and work closely with research to ship new models. "
+    "Requirements: five years of backend experience, strong Python or Go, and a "
+    "track record of operating large distributed systems in production. "
+    "This role is based in {city}. We offer competitive pay and generous benefits."
+)
+
+
+class TestMinHash:
+    """Tests for signatures and similarity estimates."""
+
+    def test_identical_text(self):
+        assert similarity(minhash(TEMPLATE), minhash(TEMPLATE)) == 1.0
+
+    def test_location_variant_is_similar(self):
+        a = minhash(TEMPLATE.format(city="San Francisco"))
+        b = minhash(TEMPLATE.format(city="New York"))
+
+        assert similarity(a, b) >= 0.8
+
+    def test_unrelated_text_is_dissimilar(self):
+        a = minhash(TEMPLATE.format(city="London"))
+        b = minhash("Account executive selling to enterprise customers across EMEA.")
+
+        assert similarity(a, b) < 0.2
+
+
+class TestNearDuplicateIndex:
+    """Tests for LSH lookups."""
+
+    def test_finds_near_duplicate_in_group(self):
+        index = NearDuplicateIndex()
+        index.add("sf", ("acme", "engineer"), minhash(TEMPLATE.format(city="San Francisco")))
+
+        match = index.query(("acme", "engineer"), minhash(TEMPLATE.format(city="Seattle")))
+
+        assert match == "sf"
+
+    def test_groups_never_match(self):
+        index = NearDuplicateIndex()
+        index.add("sf", ("acme", "engineer"), minhash(TEMPLATE.format(city="San Francisco")))
+
+        assert index.query(("acme", "staff engineer"), minhash(TEMPLATE.format(city="SF"))) is None
+
+    def test_remove(self):
+        index = NearDuplicateIndex()
+        signature = minhash(TEMPLATE)
+        index.add("a", "group", signature)
+        index.remove("a")
+
+        assert index.query("group", signature) is None
+        assert len(index) == 0
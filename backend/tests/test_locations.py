@@ -0,0 +1,122 @@
+"""
+Tests for parsing free-text ATS locations against the bundled gazetteer.
+"""
+from unittest.mock import patch
+
+import pytest
+
+from app.api.jobs import list_jobs, location_facets
+from app.models import JobPosting
+from app.services.locations import ParsedLocation, parse_location, parse_pending_locations
+from app.services.scraper import run_scrape_for_company
+from tests.conftest import make_raw_job
+
+
+class TestParseLocation:
+    def test_multi_location_string(self):
+        parsed = parse_location("San Francisco, CA | New York City, NY | Remote")
+
+        assert parsed == ParsedLocation(("San Francisco", "New York"), ("US",), remote=True)
+
+    @pytest.mark.parametrize("raw, cities, countries", [
+        ("SF or NYC", ("San Francisco", "New York"), ("US",)),
+        ("Seattle, Washington", ("Seattle",), ("US",)),
+        ("Washington, D.C.", ("Washington",), ("US",)),
+        ("Zürich, Switzerland", ("Zurich",), ("CH",)),
+        ("Bengaluru, Karnataka, India", ("Bangalore",), ("IN",)),
+        ("Hybrid (London, England)", ("London",), ("GB",)),
+        ("Singapore", ("Singapore",), ("SG",)),
+        ("Multiple Locations", (), ()),
+    ])
+    def test_cities_and_countries(self, raw, cities, countries):
+        parsed = parse_location(raw)
+
+        assert (parsed.cities, parsed.countries, parsed.remote) == (cities, countries, False)
+
+    def test_qualifier_disambiguates_city(self):
+        assert parse_location("Cambridge, MA").countries == ("US",)
+        assert parse_location("Cambridge, UK").countries == ("GB",)
+        assert parse_location("Perth, WA").countries == ("AU",)
+
+    def test_state_places_city_listed_only_elsewhere(self):
+        """A US state after a city known only in other countries puts it in the US."""
+        assert parse_location("Dublin, CA") == ParsedLocation(("Dublin",), ("US",))
+        assert parse_location("Dublin, California").countries == ("US",)
+        assert parse_location("Dublin, CA, USA").countries == ("US",)
+        # A region of a country the city is in wins over a US state of the same code
+        assert parse_location("Sydney, WA").countries == ("AU",)
+
+    def test_code_that_does_not_qualify_city_dropped(self):
+        assert parse_location("Dublin, NZ") == ParsedLocation(("Dublin",), ("IE",))
+
+    @pytest.mark.parametrize("raw", ["St. Louis, MO", "Saint Louis", "st louis"])
+    def test_saint_abbreviated_or_spelled_out(self, raw):
+        assert parse_location(raw) == ParsedLocation(("St. Louis",), ("US",))
+
+    @pytest.mark.parametrize("raw, countries", [
+        ("Remote - US", ("US",)),
+        ("Remote in the U.S.", ("US",)),
+        ("Remote - Canada or US", ("CA", "US")),
+        ("Work from home", ()),
+    ])
+    def test_remote(self, raw, countries):
+        parsed = parse_location(raw)
+
+        assert parsed.remote
+        assert parsed.countries == countries
+        assert parsed.cities == ()
+
+    def test_codes_only_standalone_or_after_city(self):
+        """Words that happen to be codes ("in", "or") are not read as places."""
+        assert parse_location("Based in London").countries == ("GB",)
+        assert parse_location("Remote, IN").countries == ("IN",)
+
+
+class TestStoredLocations:
+    @pytest.fixture
+    def scraped(self, db_session, test_company, mock_scraper):
+        db_session.query(JobPosting).delete()
+        mock_scraper.set_jobs([
+            make_raw_job("sf", "Engineer", location="San Francisco, CA"),
+            make_raw_job("multi", "Researcher", location="NYC | London, UK"),
+            make_raw_job("remote", "Recruiter", location="Remote - US"),
+        ])
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            run_scrape_for_company(db_session, test_company)
+        return {job.external_id: job for job in db_session.query(JobPosting)}
+
+    def test_scrape_stores_parsed_location(self, scraped):
+        job = scraped["multi"]
+
+        assert job.location_cities == ["New York", "London"]
+        assert job.location_countries == ["US", "GB"]
+        assert job.location_remote is False
+        assert scraped["remote"].location_remote is True
+
+    def test_backfill_parses_each_location_once(self, db_session, scraped):
+        db_session.query(JobPosting).update({"location_remote": None, "location_cities": None})
+        db_session.commit()
+        parse_location.cache_clear()
+
+        result = parse_pending_locations(db_session)
+
+        assert result == {"locations": 3, "updated": 3}
+        assert parse_location.cache_info().misses == 3
+        db_session.refresh(scraped["sf"])
+        assert scraped["sf"].location_cities == ["San Francisco"]
+        assert parse_pending_locations(db_session)["updated"] == 0
+
+    def test_filters_and_facets(self, db_session, scraped):
+        def titles(**filters):
+            result = list_jobs(db=db_session, limit=100, offset=0, **filters)
+            return sorted(job["title_raw"] for job in result["jobs"])
+
+        assert titles(city="NYC") == ["Researcher"]
+        assert titles(country="United States") == ["Engineer", "Recruiter", "Researcher"]
+        assert titles(country="gb") == ["Researcher"]
+        assert titles(remote=True) == ["Recruiter"]
+
+        facets = location_facets(company=None, limit=50, db=db_session)
+        assert facets["countries"] == [{"country": "US", "jobs": 3}, {"country": "GB", "jobs": 1}]
+        assert {"city": "London", "jobs": 1} in facets["cities"]
+        assert facets["remote"] == 1
@@ -0,0 +1,632 @@
+"""
+Tests for rate-limited async normalization.
+
+The OpenAI client is replaced with a fake whose responses (and 429s) are
+scripted per call; the rate limiter is exercised with a fake clock.
+"""
+import asyncio
+import json
+import re
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import httpx
+import openai
+import pytest
+
+from app.config import settings
+from app.models import JobPosting, NormalizationCache
+from app.services.normalizer import (
+    NormalizedJob,
+    RemotePolicy,
+    lease_pending_jobs,
+    normalize_jobs_parallel,
+    normalize_pending_jobs,
+    normalize_stream,
+    record_result,
+)
+from app.services.ratelimit import RateLimiter, TokenBucket
+from app.services.scraper import run_scrape_for_company
+from tests.conftest import make_raw_job
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def normalized() -> NormalizedJob:
+    return NormalizedJob(
+        normalized_title="Software Engineer",
+        seniority="mid",
+        function="engineering",
+        team_area="unknown",
+        is_leadership=False,
+        experience_years_min=None,
+        remote_policy="unknown",
+        tech_stack=["python"],
+        keywords=[],
+        notable_signals=[],
+        salary_min=None,
+        salary_max=None,
+        salary_currency=None,
+    )
+
+
+def rate_limited(retry_after: str = "0") -> openai.RateLimitError:
+    response = httpx.Response(
+        429,
+        headers={"retry-after": retry_after},
+        request=httpx.Request("POST", "https://api.openai.com/v1/responses"),
+    )
+    return openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+
+class FakeResponses:
+    """Stands in for AsyncOpenAI.responses, failing the first `throttle` calls."""
+
+    def __init__(self, throttle: int = 0):
+        self.throttle = throttle
+        self.result = normalized()
+        self.calls = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.pack_sizes = []
+        self.requests: list[dict] = []
+        self.skip_ids: set[str] = set()  # packed job ids left out of the answer
+        self.invalid_ids: set[str] = set()  # packed job ids answered with a bad item
+
+    async def create(self, **kwargs):
+        """A packed request, answered with one item per "### Job <id>" header."""
+        self.calls += 1
+        self.requests.append(kwargs)
+        if self.throttle:
+            self.throttle -= 1
+            raise rate_limited()
+
+        ids = re.findall(r"^### Job (\d+)$", kwargs["input"][1]["content"], re.MULTILINE)
+        self.pack_sizes.append(len(ids))
+        items = [
+            {**self.result.model_dump(mode="json"), "job_id": job_id}
+            for job_id in ids
+            if job_id not in self.skip_ids
+        ]
+        for item in items:
+            if item["job_id"] in self.invalid_ids:
+                item["seniority"] = "emperor"
+        await asyncio.sleep(0.001)
+        return SimpleNamespace(
+            output_text=json.dumps({"jobs": items}), usage=SimpleNamespace(total_tokens=900)
+        )
+
+    async def parse(self, **kwargs):
+        self.calls += 1
+        self.requests.append(kwargs)
+        if self.throttle:
+            self.throttle -= 1
+            raise rate_limited()
+
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        await asyncio.sleep(0.001)
+        self.in_flight -= 1
+        return SimpleNamespace(output_parsed=self.result, usage=SimpleNamespace(total_tokens=500))
+
+
+@pytest.fixture
+def fake_openai():
+    """Patch in a fresh fake client and limiter for each test."""
+    responses = FakeResponses()
+    limiter = RateLimiter(requests_per_minute=60_000, tokens_per_minute=10**9, max_concurrency=8)
+
+    with (
+        patch.object(settings, "openai_api_key", "sk-test"),
+        patch("app.services.normalizer._get_async_client",
+              return_value=SimpleNamespace(responses=responses)),
+        patch("app.services.normalizer._get_limiter", return_value=limiter),
+    ):
+        yield responses, limiter
+
+
+@pytest.fixture
+def pending_jobs(db_session, test_company, mock_scraper):
+    """Three distinct unnormalized jobs for test_company, and nothing else pending."""
+    db_session.query(JobPosting).update({"normalized_at": datetime.utcnow()})
+    db_session.query(NormalizationCache).delete()
+    mock_scraper.set_jobs([make_raw_job(f"job-{i}", title=f"Engineer {i}") for i in range(3)])
+    with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+        run_scrape_for_company(db_session, test_company)
+    return db_session.query(JobPosting).filter(JobPosting.normalized_at.is_(None)).all()
+
+
+class TestTokenBucket:
+    """Tests for the per-minute token bucket."""
+
+    def test_refills_at_per_minute_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(per_minute=60, clock=clock)
+        bucket.take(bucket.capacity)
+
+        assert bucket.wait_time(1) == pytest.approx(1.0)
+        clock.now = 1.0
+        assert bucket.wait_time(1) == 0
+
+    def test_idle_budget_is_capped(self):
+        """A long quiet spell doesn't bank a burst beyond a few seconds' worth."""
+        clock = FakeClock()
+        bucket = TokenBucket(per_minute=600, clock=clock)
+        clock.now = 3600
+        bucket.take(50)
+
+        assert bucket.capacity == 50
+        assert bucket.wait_time(1) > 0
+
+    def test_adjust_refunds_overestimate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(per_minute=600, clock=clock)
+        bucket.take(50)
+        bucket.adjust(30)
+
+        assert bucket.tokens == pytest.approx(bucket.capacity - 20)
+
+
+class TestRateLimiter:
+    """Tests for adaptive concurrency."""
+
+    def run(self, limiter: RateLimiter, **ticket):
+        async def one():
+            async with limiter.request(estimated_tokens=100) as t:
+                for key, value in ticket.items():
+                    setattr(t, key, value)
+
+        asyncio.run(one())
+
+    def test_throttle_halves_concurrency_and_pauses(self):
+        clock = FakeClock()
+        limiter = RateLimiter(6000, 10**6, max_concurrency=40, initial_concurrency=20, clock=clock)
+
+        self.run(limiter, throttled=True, retry_after=3.0)
+
+        assert limiter.concurrency == 10
+        assert limiter.requests.wait_time(1) == 0
+        assert limiter._paused_until == 3.0
+
+    def test_concurrency_grows_while_latency_steady(self):
+        limiter = RateLimiter(60_000, 10**9, max_concurrency=10, initial_concurrency=2)
+
+        for _ in range(20):
+            self.run(limiter)
+
+        assert limiter.concurrency > 2
+        assert limiter.concurrency <= 10
+
+    def test_reported_usage_corrects_token_estimate(self):
+        clock = FakeClock()
+        limiter = RateLimiter(6000, 60_000, max_concurrency=4, clock=clock)
+        start = limiter.tokens.tokens
+
+        self.run(limiter, used_tokens=40)
+
+        assert limiter.tokens.tokens == pytest.approx(start - 40)
+
+
+class TestNormalizeParallel:
+    """Tests for normalize_jobs_parallel on the async client."""
+
+    def test_normalizes_batch(self, db_session, fake_openai, pending_jobs):
+        responses, _ = fake_openai
+
+        result = normalize_jobs_parallel(db_session, limit=10, max_workers=4)
+
+        assert result["total"] == 3
+        assert result["success"] == 3
+        assert responses.calls == 3
+        assert responses.peak_in_flight <= 4
+        for job in pending_jobs:
+            db_session.refresh(job)
+            assert job.normalized_title == "Software Engineer"
+            assert job.normalized_at is not None
+        assert db_session.query(NormalizationCache).count() == 3
+
+    def test_rate_limited_requests_retried(self, db_session, fake_openai, pending_jobs):
+        """429s shrink concurrency and are retried rather than failing the job."""
+        responses, limiter = fake_openai
+        responses.throttle = 2
+        limiter.concurrency = 8.0
+
+        result = normalize_jobs_parallel(db_session, limit=10)
+
+        assert result["success"] == 3
+        assert result["failed"] == 0
+        assert responses.calls == 5
+        assert limiter.concurrency < 4
+
+    def test_persistent_throttling_fails_job(self, db_session, fake_openai, pending_jobs):
+        """A failed job is released with its attempt counted, for a later retry."""
+        responses, _ = fake_openai
+        responses.throttle = 100
+
+        with patch("app.services.normalizer.NORMALIZE_MAX_RETRIES", 1):
+            result = normalize_jobs_parallel(db_session, limit=10)
+
+        assert result["failed"] == 3
+        assert "Rate limit" in result["errors"][0]["error"]
+        for job in pending_jobs:
+            db_session.refresh(job)
+            assert job.normalized_at is None
+            assert job.normalize_attempts == 1
+            assert job.normalize_leased_until is None
+
+    def test_skipped_without_api_key(self, db_session, pending_jobs):
+        with patch.object(settings, "openai_api_key", ""):
+            result = normalize_jobs_parallel(db_session, limit=10)
+
+        assert result["status"] == "skipped"
+        assert result["total"] == 0
+
+
+class TestNormalizeStream:
+    """Tests for leasing and the sliding window."""
+
+    def test_window_refilled_until_drained(self, db_session, fake_openai, pending_jobs):
+        responses, _ = fake_openai
+
+        result = normalize_stream(db_session, window=1)
+
+        assert result["success"] == 3
+        assert responses.peak_in_flight == 1
+        assert lease_pending_jobs(db_session, "worker-a", 10) == []
+
+    def test_limit(self, db_session, fake_openai, pending_jobs):
+        result = normalize_stream(db_session, window=2, limit=2)
+
+        assert result["total"] == 2
+        assert len(lease_pending_jobs(db_session, "worker-a", 10)) == 1
+
+    def test_progress_reported(self, db_session, fake_openai, pending_jobs):
+        reports = []
+
+        with patch("app.services.normalizer.PROGRESS_SECONDS", 0):
+            normalize_stream(db_session, window=1, on_progress=lambda r: reports.append(dict(r)))
+
+        assert [r["success"] for r in reports] == [1, 2, 3]
+
+
+class TestNormalizationCache:
+    """Tests for reusing results for content normalized before."""
+
+    def test_repost_served_from_cache(
+        self, db_session, fake_openai, pending_jobs, test_company, mock_scraper
+    ):
+        """A reposted req with identical content costs no API call."""
+        responses, _ = fake_openai
+        normalize_stream(db_session)
+
+        mock_scraper.set_jobs([make_raw_job("job-0-repost", title="Engineer 0")])
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            run_scrape_for_company(db_session, test_company)
+        result = normalize_stream(db_session)
+
+        assert result["success"] == 1
+        assert result["cached"] == 1
+        assert responses.calls == 3
+        repost = db_session.query(JobPosting).filter_by(external_id="job-0-repost").one()
+        assert repost.normalized_title == "Software Engineer"
+        assert repost.normalize_leased_until is None
+
+    def test_pending_jobs_respect_leases(self, db_session, fake_openai, pending_jobs):
+        """The scrape-triggered path leases too, so it never races a normalize worker."""
+        held = lease_pending_jobs(db_session, "worker-a", 1)
+
+        result = normalize_pending_jobs(db_session, company_slug="test-company", limit=10)
+
+        assert result["total"] == 2
+        job = db_session.get(JobPosting, uuid.UUID(held[0]["id"]))
+        db_session.refresh(job)
+        assert job.normalized_at is None
+        assert job.normalize_lease_owner == "worker-a"
+
+    def test_changed_content_not_cached(self, db_session, fake_openai, pending_jobs):
+        responses, _ = fake_openai
+        normalize_stream(db_session)
+
+        pending_jobs[0].location_raw = "London, UK"
+        pending_jobs[0].normalized_at = None
+        db_session.commit()
+        result = normalize_stream(db_session)
+
+        assert result["cached"] == 0
+        assert responses.calls == 4
+
+    def test_prompt_change_invalidates(self, db_session, fake_openai, pending_jobs):
+        responses, _ = fake_openai
+        normalize_stream(db_session)
+        db_session.query(JobPosting).update({"normalized_at": None})
+        db_session.commit()
+
+        with patch("app.services.normalizer.PROMPT_FINGERPRINT", "v2"):
+            result = normalize_stream(db_session)
+
+        assert result["cached"] == 0
+        assert responses.calls == 6
+
+
+class TestNearDuplicates:
+    """Tests for normalizing one representative per cluster of near-duplicates."""
+
+    TEMPLATE = (
+        "Join the team building our inference platform. You will design low latency "
+        "serving systems, own capacity planning and work with research to ship new "
+        "models to millions of users. Five years of backend experience, strong Python "
+        "or Go, and experience operating large distributed systems. {extra}"
+    )
+
+    @pytest.fixture
+    def templated_board(self, db_session, test_company, mock_scraper):
+        """One req listed in four locations, plus an unrelated posting."""
+        db_session.query(JobPosting).update({"normalized_at": datetime.utcnow()})
+        db_session.query(NormalizationCache).delete()
+
+        def posting(external_id, title, location, extra):
+            job = make_raw_job(external_id, title=title, location=location)
+            job.description_plain = self.TEMPLATE.format(extra=extra)
+            job.description_html = f"<p>{job.description_plain}</p>"
+            return job
+
+        mock_scraper.set_jobs([
+            posting("sf", "Software Engineer, Inference", "San Francisco, CA", "Pay: $200k."),
+            posting("ny", "Software Engineer, Inference - New York", "New York", "Pay: $200k."),
+            posting("rm", "Software Engineer, Inference", "Remote - US", "Pay: $180k."),
+            posting("ld", "Software Engineer, Inference", "London, UK", "Pay: $200k."),
+            posting("sr", "Staff Software Engineer, Inference", "San Francisco, CA", "Pay: $200k."),
+        ])
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            run_scrape_for_company(db_session, test_company)
+
+        return {job.external_id: job for job in db_session.query(JobPosting).filter(
+            JobPosting.company_id == test_company.id
+        )}
+
+    def test_one_call_per_cluster(self, db_session, fake_openai, templated_board):
+        responses, _ = fake_openai
+        responses.result = normalized().model_copy(update={
+            "remote_policy": RemotePolicy.onsite,
+            "salary_min": 200000,
+            "salary_currency": "USD",
+        })
+
+        result = normalize_stream(db_session, window=10)
+
+        assert result["success"] == 5
+        assert result["duplicates"] == 3
+        assert responses.calls == 2
+
+        jobs = templated_board
+        for job in jobs.values():
+            db_session.refresh(job)
+            assert job.normalized_title == "Software Engineer"
+        assert jobs["sf"].duplicate_of is None
+        assert jobs["sr"].duplicate_of is None
+        representative = jobs["sf"] if jobs["ny"].duplicate_of == jobs["sf"].id else jobs["ny"]
+        assert {jobs[k].duplicate_of for k in ("rm", "ld")} == {representative.id}
+
+        # Location-dependent fields follow each posting's own input
+        assert jobs["rm"].remote_policy == "remote"
+        assert jobs["ld"].remote_policy == "onsite"
+        assert jobs["ld"].salary_min == 200000
+        assert jobs["rm"].salary_min is None
+
+    def test_failed_representative_handed_on(self, db_session, fake_openai, templated_board):
+        """A duplicate takes over when its representative's call fails."""
+        responses, _ = fake_openai
+        responses.throttle = 2
+
+        with patch("app.services.normalizer.NORMALIZE_MAX_RETRIES", 0):
+            result = normalize_stream(db_session, window=10)
+
+        # The first two calls (the two clusters' representatives) fail; the
+        # second cluster has no one left to take over
+        assert result["failed"] == 2
+        assert result["success"] == 3
+        assert responses.calls == 3
+
+
+class TestPacking:
+    """Tests for normalizing several short postings in one request."""
+
+    @pytest.fixture(autouse=True)
+    def packing(self):
+        with patch.object(settings, "normalize_pack_max_jobs", 8):
+            yield
+
+    def test_short_postings_share_one_call(self, db_session, fake_openai, pending_jobs):
+        responses, _ = fake_openai
+
+        result = normalize_stream(db_session, window=10)
+
+        assert responses.calls == 1
+        assert responses.pack_sizes == [3]
+        assert result["success"] == 3
+        assert result["packed"] == 3
+        for job in pending_jobs:
+            db_session.refresh(job)
+            assert job.normalized_title == "Software Engineer"
+            assert job.normalized_by == "llm"
+
+    def test_only_failed_items_retried(self, db_session, fake_openai, pending_jobs):
+        responses, _ = fake_openai
+        responses.skip_ids = {"2"}
+        responses.invalid_ids = {"3"}
+
+        result = normalize_stream(db_session, window=10)
+
+        # One packed call, then one single-job call for each bad item
+        assert responses.calls == 3
+        assert result["success"] == 3
+        assert result["packed"] == 1
+        assert db_session.query(JobPosting).filter(JobPosting.seniority == "emperor").count() == 0
+
+    def test_pack_size_limit(self, db_session, fake_openai, pending_jobs):
+        responses, _ = fake_openai
+
+        with patch.object(settings, "normalize_pack_max_jobs", 2):
+            result = normalize_stream(db_session, window=10)
+
+        assert responses.pack_sizes == [2]
+        assert responses.calls == 2
+        assert result["success"] == 3
+
+    def test_packs_share_known_fields(self, db_session, fake_openai, pending_jobs):
+        """Postings only share a pack, and its reduced schema, with the same known fields."""
+        responses, _ = fake_openai
+        for job in pending_jobs[:2]:
+            job.ats_remote_policy = "remote"
+        db_session.commit()
+
+        result = normalize_stream(db_session, window=10)
+
+        # The third posting, alone in its group, goes out as a single-job call
+        assert responses.pack_sizes == [2]
+        [packed] = [request for request in responses.requests if "text" in request]
+        assert "remote_policy" not in json.dumps(packed["text"])
+        assert "seniority" in json.dumps(packed["text"])
+        assert result["packed"] == 2
+        db_session.refresh(pending_jobs[0])
+        assert pending_jobs[0].remote_policy == "remote"
+
+    def test_long_postings_sent_alone(self, db_session, fake_openai, pending_jobs):
+        responses, _ = fake_openai
+
+        with patch.object(settings, "normalize_pack_job_tokens", 1):
+            result = normalize_stream(db_session, window=10)
+
+        assert responses.pack_sizes == []
+        assert responses.calls == 3
+        assert result["packed"] == 0
+
+
+class TestAtsFields:
+    """Tests for normalizing postings whose ATS states the remote policy and salary."""
+
+    @pytest.fixture
+    def ats_job(self, db_session, test_company, mock_scraper):
+        db_session.query(JobPosting).update({"normalized_at": datetime.utcnow()})
+        db_session.query(NormalizationCache).delete()
+        raw_job = make_raw_job("ats-1", title="Research Engineer")
+        raw_job.description_html = (
+            "<h3>What You'll Do</h3><p>Train large models.</p>"
+            "<h3>Compensation</h3><p>The base salary range is $300,000 - $400,000.</p>"
+        )
+        raw_job.remote_policy = "remote"
+        raw_job.employment_type = "FullTime"
+        raw_job.salary_min, raw_job.salary_max, raw_job.salary_currency = 300000, 400000, "USD"
+        mock_scraper.set_jobs([raw_job])
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            run_scrape_for_company(db_session, test_company)
+        return db_session.query(JobPosting).filter_by(external_id="ats-1").one()
+
+    def test_known_fields_not_extracted(self, db_session, fake_openai, ats_job):
+        responses, _ = fake_openai
+
+        normalize_stream(db_session)
+
+        request = responses.requests[0]
+        schema_fields = request["text_format"].model_fields
+        assert "remote_policy" not in schema_fields
+        assert "salary_min" not in schema_fields
+        assert "seniority" in schema_fields
+        prompt = request["input"][1]["content"]
+        assert "Employment type: FullTime" in prompt
+        assert "Train large models" in prompt
+        assert "$300,000" not in prompt
+
+    def test_ats_values_take_precedence(self, db_session, fake_openai, ats_job):
+        """Whatever the model answers, the ATS's own values are stored."""
+        responses, _ = fake_openai
+        responses.result = normalized().model_copy(update={
+            "remote_policy": RemotePolicy.onsite,
+            "salary_min": 1,
+        })
+
+        normalize_stream(db_session)
+
+        db_session.refresh(ats_job)
+        assert ats_job.normalized_title == "Software Engineer"
+        assert ats_job.remote_policy == "remote"
+        assert (ats_job.salary_min, ats_job.salary_max, ats_job.salary_currency) == (
+            300000, 400000, "USD"
+        )
+
+
+class TestLeases:
+    """Tests for leasing pending jobs to workers."""
+
+    def test_leased_jobs_not_leased_again(self, db_session, pending_jobs):
+        first = lease_pending_jobs(db_session, "worker-a", 2)
+        second = lease_pending_jobs(db_session, "worker-b", 10)
+
+        assert len(first) == 2
+        assert len(second) == 1
+        assert {j["id"] for j in first}.isdisjoint(j["id"] for j in second)
+        assert first[0]["company_name"] == "Test Company"
+        assert first[0]["description"].startswith("Job description")
+
+    def test_lease_limited(self, db_session, pending_jobs):
+        """Exactly limit jobs are leased when more are pending."""
+        for job in pending_jobs:
+            job.first_seen_at = datetime(2024, 1, 1)
+        db_session.commit()
+
+        leased = lease_pending_jobs(db_session, "worker-a", 1)
+
+        assert len(leased) == 1
+        owners = db_session.query(JobPosting.normalize_lease_owner).filter(
+            JobPosting.normalize_lease_owner.isnot(None)
+        )
+        assert owners.count() == 1
+
+    def test_expired_lease_reclaimed(self, db_session, pending_jobs):
+        """Jobs held by a worker that died become claimable once the lease runs out."""
+        lease_pending_jobs(db_session, "worker-a", 10)
+        db_session.query(JobPosting).filter(JobPosting.normalize_lease_owner == "worker-a").update(
+            {"normalize_leased_until": datetime.utcnow() - timedelta(seconds=1)}
+        )
+        db_session.commit()
+
+        assert len(lease_pending_jobs(db_session, "worker-b", 10)) == 3
+
+    def test_result_after_lease_lost_dropped(self, db_session, pending_jobs):
+        """A worker whose lease ran out and was taken over doesn't write its late result."""
+        lease_pending_jobs(db_session, "worker-a", 10)
+        db_session.query(JobPosting).update(
+            {"normalize_leased_until": datetime.utcnow() - timedelta(seconds=1)}
+        )
+        db_session.commit()
+        job_id = lease_pending_jobs(db_session, "worker-b", 1)[0]["id"]
+
+        results = {"total": 0, "success": 0, "failed": 0, "errors": []}
+        for worker_id in ("worker-a", "worker-b"):
+            written = record_result(
+                db_session, worker_id, {"job_id": job_id, "status": "failed"}, results
+            )
+            assert written == (worker_id == "worker-b")
+        db_session.commit()
+
+        assert results["total"] == 1
+        job = db_session.get(JobPosting, uuid.UUID(job_id))
+        assert job.normalize_attempts == 1
+        assert job.normalize_lease_owner is None
+
+    def test_exhausted_jobs_not_leased(self, db_session, pending_jobs):
+        pending_jobs[0].normalize_attempts = settings.normalize_max_attempts
+        db_session.commit()
+
+        leased = lease_pending_jobs(db_session, "worker-a", 10)
+
+        assert len(leased) == 2
+        assert str(pending_jobs[0].id) not in {j["id"] for j in leased}
@@ -0,0 +1,219 @@
+"""
+Tests for the background pipeline job queue.
+
+Jobs are claimed and run inline; no worker threads are started.
+"""
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from app.config import settings
+from app.models import PipelineJob
+from app.services.locks import CompanyLocks
+from app.services.pipeline import claim_next_job, enqueue_job, run_job, run_next_job
+
+
+@pytest.fixture(autouse=True)
+def empty_queue(db_session):
+    """Keep jobs left in the dev database out of these tests."""
+    db_session.query(PipelineJob).delete()
+    db_session.commit()
+
+
+def staged_task(db, progress, count: int = 2):
+    with progress.stage("first"):
+        progress.update(done=1)
+    with progress.stage("second"):
+        progress.update(done=count)
+    return {"count": count, "when": datetime(2025, 1, 1)}
+
+
+def failing_task(db, progress):
+    with progress.stage("boom"):
+        raise RuntimeError("ATS unreachable")
+
+
+class TestQueue:
+    """Tests for enqueueing and claiming jobs."""
+
+    def test_enqueue_and_claim(self, db_session):
+        """A queued job is claimed once, by one worker."""
+        job = enqueue_job(db_session, "scrape_all", normalize=False)
+        assert job.status == "queued"
+        assert job.params == {"normalize": False}
+
+        claimed = claim_next_job(db_session, "worker-a")
+
+        assert claimed.id == job.id
+        assert claimed.status == "running"
+        assert claimed.worker_id == "worker-a"
+        assert claimed.attempts == 1
+        assert claim_next_job(db_session, "worker-b") is None
+
+    def test_oldest_job_claimed_first(self, db_session):
+        """Jobs run in the order they were queued."""
+        first = enqueue_job(db_session, "normalize_all")
+        enqueue_job(db_session, "synthesize_all")
+
+        assert claim_next_job(db_session, "worker-a").id == first.id
+
+    def test_unknown_kind_rejected(self, db_session):
+        with pytest.raises(ValueError):
+            enqueue_job(db_session, "defragment")
+
+    def test_stale_running_job_reclaimed(self, db_session):
+        """A job whose worker stopped reporting is picked up again."""
+        job = enqueue_job(db_session, "scrape_all")
+        claim_next_job(db_session, "worker-a")
+        job.heartbeat_at = datetime.utcnow() - timedelta(hours=1)
+        db_session.commit()
+
+        reclaimed = claim_next_job(db_session, "worker-b")
+
+        assert reclaimed.id == job.id
+        assert reclaimed.worker_id == "worker-b"
+        assert reclaimed.attempts == 2
+
+
+    def test_stale_job_out_of_attempts_failed(self, db_session):
+        """A job that keeps going quiet is given up on rather than left running."""
+        job = enqueue_job(db_session, "scrape_all")
+        claim_next_job(db_session, "worker-a")
+        job.attempts = settings.pipeline_max_attempts
+        job.heartbeat_at = datetime.utcnow() - timedelta(hours=1)
+        db_session.commit()
+
+        assert claim_next_job(db_session, "worker-b") is None
+
+        db_session.refresh(job)
+        assert job.status == "failed"
+        assert "stopped responding" in job.error_message
+        assert job.completed_at is not None
+
+    def test_repopulate_not_retried(self, db_session):
+        """A quiet repopulate is failed rather than run again, which would wipe twice."""
+        job = enqueue_job(db_session, "repopulate")
+        claim_next_job(db_session, "worker-a")
+        job.heartbeat_at = datetime.utcnow() - timedelta(hours=1)
+        db_session.commit()
+
+        assert claim_next_job(db_session, "worker-b") is None
+
+        db_session.refresh(job)
+        assert job.status == "failed"
+        assert "not retried" in job.error_message
+
+
+class TestRunJob:
+    """Tests for executing jobs and reporting their progress."""
+
+    def test_progress_stages_and_result(self, db_session):
+        """A finished job has its result, final progress and a timing per stage."""
+        with patch.dict("app.services.pipeline.TASKS", {"staged": staged_task}):
+            job = PipelineJob(kind="staged", params={"count": 5}, status="queued")
+            db_session.add(job)
+            db_session.commit()
+
+            run_next_job(db_session, "worker-a")
+
+        assert job.status == "succeeded"
+        assert job.result == {"count": 5, "when": "2025-01-01 00:00:00"}
+        assert job.progress == {"stage": "second", "done": 5}
+        assert [s["name"] for s in job.stages] == ["first", "second"]
+        assert all(s["seconds"] >= 0 for s in job.stages)
+        assert job.completed_at is not None
+
+    def test_failure_recorded(self, db_session):
+        """A task that raises leaves the job failed with its error."""
+        with patch.dict("app.services.pipeline.TASKS", {"failing": failing_task}):
+            job = PipelineJob(kind="failing", params={}, status="queued")
+            db_session.add(job)
+            db_session.commit()
+
+            claimed = claim_next_job(db_session, "worker-a")
+            run_job(db_session, claimed)
+
+        assert job.status == "failed"
+        assert job.error_message == "ATS unreachable"
+        assert job.completed_at is not None
+
+    def test_reclaimed_job_result_dropped(self, db_session):
+        """A worker that stalled and lost its job neither reports nor records a result."""
+        reported = []
+
+        def stalled_task(db, progress):
+            # Another worker reclaims the job while this one is stuck
+            job.heartbeat_at = datetime.utcnow() - timedelta(hours=1)
+            db.commit()
+            assert claim_next_job(db, "worker-b").id == job.id
+
+            progress.update(done=1)
+            reported.append(True)
+            return {"done": 1}
+
+        with patch.dict("app.services.pipeline.TASKS", {"stalled": stalled_task}):
+            job = PipelineJob(kind="stalled", params={}, status="queued")
+            db_session.add(job)
+            db_session.commit()
+
+            run_next_job(db_session, "worker-a")
+
+        db_session.refresh(job)
+        assert reported == []
+        assert job.status == "running"
+        assert job.worker_id == "worker-b"
+        assert job.result is None
+
+    def test_heartbeat_while_task_runs(self, db_session):
+        """A long stage that reports no progress still keeps the job alive."""
+
+        def quiet_task(db, progress):
+            time.sleep(0.2)
+            return {}
+
+        beats = []
+        with (
+            patch.dict("app.services.pipeline.TASKS", {"quiet": quiet_task}),
+            patch("app.services.pipeline.HEARTBEAT_SECONDS", 0.02),
+            patch("app.services.pipeline._send_heartbeat", lambda *args: beats.append(args)),
+        ):
+            job = PipelineJob(kind="quiet", params={}, status="queued")
+            db_session.add(job)
+            db_session.commit()
+
+            run_next_job(db_session, "worker-a")
+
+        assert job.status == "succeeded"
+        assert len(beats) >= 3
+        assert beats[0] == (job.id, "worker-a", 1)
+
+    def test_scrape_all_job(self, db_session, test_company, mock_scraper, make_job):
+        """The scrape-all pipeline runs as a job and reports its totals."""
+        mock_scraper.set_jobs([make_job("job-001"), make_job("job-002")])
+        job = enqueue_job(db_session, "scrape_all", normalize=False)
+
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            run_next_job(db_session, "worker-a")
+
+        assert job.status == "succeeded"
+        results = {r["company"]: r for r in job.result["scrape"]["results"]}
+        assert results["test-company"]["jobs_added"] == 2
+        assert [s["name"] for s in job.stages] == ["scrape"]
+
+    def test_scrape_all_leaves_companies_locked_elsewhere_unscheduled(
+        self, db_session, test_company, another_company, mock_scraper, make_job
+    ):
+        """Only the companies this job scraped get their next scrape scheduled."""
+        mock_scraper.set_jobs([make_job("job-001")])
+        enqueue_job(db_session, "scrape_all", normalize=False)
+
+        with CompanyLocks(db_session) as other_worker:
+            other_worker.try_acquire(another_company.id)
+            with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+                run_next_job(db_session, "worker-a")
+
+        db_session.refresh(another_company)
+        assert test_company.next_scrape_at > datetime.utcnow()
+        assert another_company.next_scrape_at is None
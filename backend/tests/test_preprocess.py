@@ -0,0 +1,166 @@
+"""
+Tests for description preprocessing: HTML to text and boilerplate stripping.
+"""
+import html
+from dataclasses import replace
+from unittest.mock import patch
+
+from app.models import JobPosting
+from app.services.normalizer import lease_pending_jobs
+from app.services.preprocess import (
+    find_boilerplate,
+    html_to_text,
+    preprocess_pending,
+    strip_boilerplate,
+)
+from app.services.scraper import run_scrape_for_company
+from tests.conftest import make_raw_job
+
+ABOUT = (
+    "<h3>About Us</h3><p>Test Company builds reliable, interpretable AI systems and "
+    "believes in a safe transition through transformative AI.</p>"
+)
+EEO = (
+    "<p>Test Company is an equal opportunity employer. We do not discriminate on the basis "
+    "of race, religion, color, national origin, gender or any other protected status.</p>"
+)
+
+
+def greenhouse_html(title: str) -> str:
+    """An entity-escaped description, the way Greenhouse sends it."""
+    body = (
+        f"{ABOUT}<h3>The Role</h3><p>As a {title} you will own systems end to end.</p>"
+        f"<ul><li>5+ years building {title} systems</li><li>Python&nbsp;or Rust</li></ul>"
+        f"{EEO}"
+    )
+    return html.escape(body)
+
+
+def board(*titles: str) -> list:
+    return [
+        replace(
+            make_raw_job(f"job-{i}", title),
+            description_html=greenhouse_html(title),
+            description_plain=None,
+        )
+        for i, title in enumerate(titles)
+    ]
+
+
+class TestHtmlToText:
+    def test_escaped_html_becomes_compact_text(self):
+        text = html_to_text(greenhouse_html("ML Engineer"))
+
+        assert "<" not in text and "&" not in text
+        assert "### The Role" in text
+        assert "- 5+ years building ML Engineer systems\n- Python or Rust" in text
+        assert "\n\n\n" not in text
+
+
+class TestBoilerplate:
+    def texts(self, *titles: str) -> list[tuple[str, str]]:
+        return [(title, html_to_text(greenhouse_html(title))) for title in titles]
+
+    def test_blocks_shared_across_roles_are_stripped(self):
+        postings = self.texts("ML Engineer", "Recruiter", "Account Executive")
+        boilerplate = find_boilerplate(postings)
+
+        text = strip_boilerplate(postings[0][1], boilerplate)
+
+        assert "equal opportunity" not in text
+        assert "About Us" not in text and "reliable, interpretable" not in text
+        # Short shared headings stay when what follows is not boilerplate
+        assert text.startswith("### The Role\n\nAs a ML Engineer")
+        assert "- 5+ years building ML Engineer systems" in text
+
+    def test_one_role_in_many_locations_is_not_boilerplate(self):
+        """Requirements repeated by the same title are not company-wide text."""
+        postings = self.texts("ML Engineer", "ML Engineer", "ML Engineer", "Recruiter")
+
+        assert find_boilerplate(postings) == set()
+
+    def test_never_strips_everything(self):
+        text = "Test Company is an equal opportunity employer and values every applicant."
+        boilerplate = find_boilerplate([(title, text) for title in ("A", "B", "C")])
+
+        assert strip_boilerplate(text, boilerplate) == text
+
+
+class TestScrapePreprocessing:
+    def test_stripped_text_stored_ahead_of_normalization(
+        self, db_session, test_company, mock_scraper
+    ):
+        mock_scraper.set_jobs(board("ML Engineer", "Recruiter", "Account Executive"))
+
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            run_scrape_for_company(db_session, test_company)
+        job = db_session.query(JobPosting).filter_by(external_id="job-0").one()
+        assert job.description_text is None
+
+        preprocess_pending(db_session)
+
+        db_session.refresh(job)
+        assert job.description_text.startswith("### The Role")
+        assert "equal opportunity" not in job.description_text
+        assert len(job.description_text) < len(job.description_html) / 3
+
+        leased = lease_pending_jobs(db_session, "worker", limit=10)
+        assert {j["description"] for j in leased} == {
+            j.description_text for j in db_session.query(JobPosting)
+        }
+
+    def test_only_edited_posting_is_reprocessed(self, db_session, test_company, mock_scraper):
+        jobs = board("ML Engineer", "Recruiter", "Account Executive")
+        mock_scraper.set_jobs(jobs)
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            run_scrape_for_company(db_session, test_company)
+            preprocess_pending(db_session)
+
+            jobs[1] = replace(jobs[1], description_html=greenhouse_html("Technical Recruiter"))
+            mock_scraper.set_jobs(jobs)
+            run_scrape_for_company(db_session, test_company)
+        result = preprocess_pending(db_session)
+
+        assert result["updated"] == 1
+        job = db_session.query(JobPosting).filter_by(external_id="job-1").one()
+        db_session.refresh(job)
+        assert "Technical Recruiter systems" in job.description_text
+
+    def test_unchanged_postings_not_converted_again(
+        self, db_session, test_company, mock_scraper
+    ):
+        """Boilerplate is re-found from stored block keys, converting only the edit."""
+        jobs = board("ML Engineer", "Recruiter", "Account Executive")
+        mock_scraper.set_jobs(jobs)
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            run_scrape_for_company(db_session, test_company)
+            preprocess_pending(db_session)
+
+            jobs[1] = replace(jobs[1], description_html=greenhouse_html("Technical Recruiter"))
+            mock_scraper.set_jobs(jobs)
+            run_scrape_for_company(db_session, test_company)
+
+        with patch(
+            "app.services.preprocess.html_to_text", side_effect=html_to_text
+        ) as convert:
+            preprocess_pending(db_session)
+
+        assert convert.call_count == 1
+        job = db_session.query(JobPosting).filter_by(external_id="job-1").one()
+        db_session.refresh(job)
+        assert "equal opportunity" not in job.description_text
+
+    def test_backfill_of_older_postings(self, db_session, test_company, mock_scraper):
+        mock_scraper.set_jobs(board("ML Engineer", "Recruiter", "Account Executive"))
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            run_scrape_for_company(db_session, test_company)
+        db_session.query(JobPosting).update({"description_text": None})
+        db_session.commit()
+
+        result = preprocess_pending(db_session)
+
+        assert result["companies"] == 1
+        assert result["updated"] == 3
+        assert result["text_chars"] < result["raw_chars"]
+        pending = db_session.query(JobPosting).filter(JobPosting.description_text.is_(None))
+        assert pending.count() == 0
@@ -0,0 +1,98 @@
+"""
+Tests for fitting job descriptions into the normalization prompt's token budget.
+"""
+from unittest.mock import patch
+
+from app.config import settings
+from app.services.normalizer import build_input
+from app.services.prompt_budget import count_tokens, fit_description, split_sections
+
+ABOUT = "Test Company is building the future of AI infrastructure for everyone. " * 40
+DUTIES = "- Design and operate low latency model serving systems at scale.\n" * 30
+DESCRIPTION = f"""### About Test Company
+
+{ABOUT.strip()}
+
+### What You'll Do
+
+{DUTIES.strip()}
+
+### What You Bring
+
+- 5+ years of backend engineering experience
+- Strong Python or Go
+
+### Compensation
+
+The base salary range for this role is $200,000 - $250,000 USD.
+
+Hybrid: three days a week in our San Francisco office."""
+
+
+class TestSplitSections:
+    def test_sections_follow_headings(self):
+        kinds = [(s.kind, s.heading) for s in split_sections(DESCRIPTION)]
+
+        assert kinds == [
+            ("about", "### About Test Company"),
+            ("responsibilities", "### What You'll Do"),
+            ("requirements", "### What You Bring"),
+            ("compensation", "### Compensation"),
+        ]
+
+    def test_untitled_blocks_classified_by_content(self):
+        text = (
+            "We build AI systems.\n\nPay: $150,000 - $180,000.\n\nThis role is fully remote.\n\n"
+            "Benefits:\n\nUnlimited PTO.\n\nYou need 3+ years of experience."
+        )
+
+        kinds = [s.kind for s in split_sections(text)]
+
+        assert kinds == ["other", "compensation", "location", "benefits", "requirements"]
+
+
+class TestFitDescription:
+    def test_short_description_unchanged(self):
+        text = "### Requirements\n\n- 3+ years of Python"
+
+        assert fit_description(text, 100) == text
+
+    def test_keeps_salary_and_requirements_when_over_budget(self):
+        budget = 200
+        assert count_tokens(DESCRIPTION) > budget
+
+        fitted = fit_description(DESCRIPTION, budget)
+
+        assert count_tokens(fitted) <= budget
+        assert "$200,000 - $250,000" in fitted
+        assert "5+ years of backend engineering" in fitted
+        assert "Hybrid: three days a week" in fitted
+        assert "Test Company is building" not in fitted
+        # Sections stay in their original order, under their headings
+        assert fitted.index("### What You Bring") < fitted.index("### Compensation")
+
+    def test_oversized_section_cut_short(self):
+        budget = 250
+
+        fitted = fit_description(DESCRIPTION, budget)
+
+        assert count_tokens(fitted) <= budget
+        assert "### What You'll Do\n\n- Design and operate" in fitted
+        assert "..." in fitted
+
+    def test_skipped_sections_left_out(self):
+        fitted = fit_description(DESCRIPTION, 2000, skip=["compensation", "location"])
+
+        assert "$200,000" not in fitted and "Hybrid" not in fitted
+        assert "5+ years of backend engineering" in fitted
+
+
+class TestPromptInput:
+    def test_prompt_uses_description_budget(self):
+        job_data = {"company_name": "Test Company", "title": "Engineer", "description": DESCRIPTION}
+
+        with patch.object(settings, "normalize_description_tokens", 150):
+            prompt = build_input(job_data)[1]["content"]
+
+        assert "$200,000 - $250,000" in prompt
+        assert "Test Company is building" not in prompt
@@ -0,0 +1,213 @@
+"""
+Tests for the adaptive scrape scheduler.
+
+Scrape history is written directly as ScrapeRun rows; scrapes themselves use
+the mock scraper.
+"""
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from app.config import settings
+from app.models import Company, ScrapeRun
+from app.services.locks import CompanyLocks
+from app.services.scheduler import (
+    due_companies,
+    load_churn_stats,
+    reschedule,
+    run_due_scrapes,
+    scrape_interval,
+)
+
+
+@pytest.fixture(autouse=True)
+def no_jitter():
+    with patch("app.services.scheduler.SCHEDULE_JITTER", 0):
+        yield
+
+
+def add_runs(db_session, company: Company, statuses: list[str], every: timedelta, churn: int = 3):
+    """Record a scrape history, oldest first, ending now."""
+    now = datetime.utcnow()
+    for i, status in enumerate(statuses):
+        db_session.add(ScrapeRun(
+            company_id=company.id,
+            started_at=now - every * (len(statuses) - i),
+            status=status,
+            jobs_added=churn if status == "success" else 0,
+            jobs_removed=0,
+            jobs_changed=0,
+        ))
+    db_session.commit()
+
+
+def make_company(db_session, slug: str, tier: str = "tier2", **kwargs) -> Company:
+    company = Company(
+        id=uuid.uuid4(),
+        name=slug,
+        slug=slug,
+        ats_type="greenhouse",
+        ats_identifier=slug,
+        tier=tier,
+        is_active=True,
+        **kwargs,
+    )
+    db_session.add(company)
+    db_session.commit()
+    return company
+
+
+class TestChurnStats:
+    """Tests for summarizing scrape history."""
+
+    def test_counts_changed_and_unchanged_runs(self, db_session, test_company):
+        """Changed runs and their churn are counted; failed runs are ignored."""
+        add_runs(
+            db_session, test_company,
+            ["success", "unchanged", "failed", "success", "unchanged"],
+            every=timedelta(hours=1),
+        )
+
+        stats = load_churn_stats(db_session, [test_company])[test_company.id]
+
+        assert stats.runs == 4
+        assert stats.changed_runs == 2
+        assert stats.postings_churned == 6
+        assert stats.span_hours == pytest.approx(5, abs=0.1)
+
+    def test_only_recent_runs_counted(self, db_session, test_company):
+        """History is limited to the most recent runs."""
+        add_runs(db_session, test_company, ["success"] * 30, every=timedelta(hours=1))
+
+        stats = load_churn_stats(db_session, [test_company])[test_company.id]
+
+        assert stats.runs == 20
+
+
+class TestScrapeInterval:
+    """Tests for choosing each company's next scrape time."""
+
+    def test_busy_board_scraped_more_often(self, db_session):
+        """A board that changes on most scrapes gets a shorter interval."""
+        busy = make_company(db_session, "busy")
+        quiet = make_company(db_session, "quiet")
+        add_runs(db_session, busy, ["success"] * 10, every=timedelta(hours=6))
+        add_runs(db_session, quiet, ["unchanged"] * 10, every=timedelta(hours=6))
+
+        stats = load_churn_stats(db_session, [busy, quiet])
+
+        assert scrape_interval(busy, stats[busy.id]) < scrape_interval(quiet, stats[quiet.id])
+
+    def test_tier_scales_interval(self, db_session):
+        """With the same history, a tier1 company is polled more often."""
+        tier1 = make_company(db_session, "tier-one", tier="tier1")
+        tier2 = make_company(db_session, "tier-two", tier="tier2")
+        for company in (tier1, tier2):
+            add_runs(db_session, company, ["unchanged", "success"] * 3, every=timedelta(hours=8))
+
+        stats = load_churn_stats(db_session, [tier1, tier2])
+
+        assert scrape_interval(tier1, stats[tier1.id]) == pytest.approx(
+            scrape_interval(tier2, stats[tier2.id]) / 2, rel=0.01
+        )
+
+    def test_interval_bounds(self, db_session):
+        """Intervals stay within the configured min and max."""
+        hot = make_company(db_session, "hot", tier="tier1")
+        cold = make_company(db_session, "cold", tier="tier3")
+        add_runs(db_session, hot, ["success"] * 20, every=timedelta(minutes=5))
+        add_runs(db_session, cold, ["unchanged"] * 20, every=timedelta(days=7))
+
+        stats = load_churn_stats(db_session, [hot, cold])
+
+        assert scrape_interval(hot, stats[hot.id]) == timedelta(
+            minutes=settings.schedule_min_interval_minutes
+        )
+        assert scrape_interval(cold, stats[cold.id]) == timedelta(
+            hours=settings.schedule_max_interval_hours
+        )
+
+
+class TestDueCompanies:
+    """Tests for picking which companies to scrape."""
+
+    def test_due_ordered_by_tier_then_overdue(self, db_session):
+        """Higher tiers go first; within a tier the most overdue lead."""
+        now = datetime.utcnow()
+        late = make_company(db_session, "late", next_scrape_at=now - timedelta(hours=5))
+        new = make_company(db_session, "new")
+        top = make_company(
+            db_session, "top", tier="tier1", next_scrape_at=now - timedelta(minutes=1)
+        )
+        make_company(db_session, "later", next_scrape_at=now + timedelta(hours=1))
+
+        due = [c.slug for c in due_companies(db_session) if c.slug in ("late", "new", "top")]
+
+        assert due == [top.slug, new.slug, late.slug]
+        assert "later" not in [c.slug for c in due_companies(db_session)]
+
+    def test_run_due_scrapes_respects_budget(self, db_session, mock_scraper, make_job):
+        """Only `limit` boards are scraped; each scraped board gets a next time."""
+        db_session.query(Company).update({"is_active": False})
+        first = make_company(db_session, "first", tier="tier1")
+        second = make_company(db_session, "second", tier="tier2")
+        mock_scraper.set_jobs([make_job("job-001")])
+
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            result = run_due_scrapes(db_session, limit=1)
+
+        assert result["scraped"] == 1
+        assert result["deferred"] == 1
+        assert [r["company"] for r in result["results"]] == ["first"]
+        assert first.next_scrape_at > datetime.utcnow()
+        assert second.next_scrape_at is None
+
+    def test_workers_split_due_companies(self, db_session, mock_scraper, make_job):
+        """A company claimed by another worker is passed over for the next one due."""
+        db_session.query(Company).update({"is_active": False})
+        first = make_company(db_session, "first", tier="tier1")
+        second = make_company(db_session, "second", tier="tier2")
+        mock_scraper.set_jobs([make_job("job-001")])
+
+        with CompanyLocks(db_session) as other_worker:
+            other_worker.try_acquire(first.id)
+
+            with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+                result = run_due_scrapes(db_session, limit=1)
+
+        assert [r["company"] for r in result["results"]] == ["second"]
+        assert result["claimed_elsewhere"] == 1
+        assert result["deferred"] == 0
+        assert first.next_scrape_at is None
+        assert second.next_scrape_at > datetime.utcnow()
+
+    def test_rescheduled_company_not_rescraped(self, db_session, mock_scraper, make_job):
+        """A company another worker rescheduled after it was listed as due is skipped."""
+        db_session.query(Company).update({"is_active": False})
+        company = make_company(db_session, "raced")
+        mock_scraper.set_jobs([make_job("job-001")])
+
+        listed = due_companies(db_session)
+
+        def other_worker_finishes(db, limit=None, now=None):
+            company.next_scrape_at = datetime.utcnow() + timedelta(hours=1)
+            db.commit()
+            return listed
+
+        with (
+            patch("app.services.scheduler.due_companies", side_effect=other_worker_finishes),
+            patch("app.services.scraper.get_scraper", return_value=mock_scraper),
+        ):
+            result = run_due_scrapes(db_session)
+
+        assert result["scraped"] == 0
+        assert result["claimed_elsewhere"] == 1
+
+    def test_reschedule_sets_next_scrape(self, db_session, test_company):
+        """A rescheduled company is no longer due."""
+        reschedule(db_session, [test_company])
+
+        assert test_company.next_scrape_at > datetime.utcnow()
+        assert test_company not in due_companies(db_session)
@@ -7,13 +7,20 @@ These tests verify that the scrape pipeline correctly:
 3. Reactivates previously-removed jobs that reappear
 4. Tracks correct metrics in ScrapeRun
 """
+from dataclasses import replace
 from datetime import datetime, timedelta
 from unittest.mock import patch
 
 import pytest
+from sqlalchemy import event, func, select, text
 
+from app.config import settings
 from app.models import Company, JobPosting, ScrapeRun
-from app.services.scraper import run_scrape_for_company
+from app.services.ats.archive import PayloadArchive, ReplayScraper
+from app.services.ats.base import FetchResult
+from app.services.ats.resilience import CircuitOpenError
+from app.services.locks import CompanyLocks
+from app.services.scraper import run_scrape_for_company, scrape_companies
 from tests.conftest import MockScraper, make_raw_job
 
 
@@ -386,3 +393,552 @@ class TestEdgeCases:
 
         db_session.refresh(test_company)
         assert test_company.last_scraped_at is not None
+
+
+class TestBulkDelta:
+    """Tests for the set-based delta statements."""
+
+    def test_statement_count_independent_of_board_size(
+        self, db_session, test_company, mock_scraper, make_job
+    ):
+        """A large re-scrape should issue a handful of statements, not one per job."""
+        mock_scraper.set_jobs([make_job(f"job-{i:04d}") for i in range(500)])
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            run_scrape_for_company(db_session, test_company)
+
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        bind = db_session.connection()
+        event.listen(bind, "before_cursor_execute", count)
+        try:
+            mock_scraper.set_jobs(
+                [make_job(f"job-{i:04d}") for i in range(1, 500)] + [make_job("job-new")]
+            )
+            with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+                result = run_scrape_for_company(db_session, test_company)
+        finally:
+            event.remove(bind, "before_cursor_execute", count)
+
+        assert result["jobs_added"] == 1
+        assert result["jobs_updated"] == 499
+        assert result["jobs_removed"] == 1
+        assert len(statements) < 15
+
+    def test_board_applied_in_chunks(self, db_session, test_company, mock_scraper, make_job):
+        """A board larger than the chunk size is applied across several chunks."""
+        mock_scraper.set_jobs([make_job(f"job-{i:03d}") for i in range(7)])
+
+        with patch("app.services.scraper.SCRAPE_CHUNK_SIZE", 3), patch(
+            "app.services.scraper.get_scraper", return_value=mock_scraper
+        ):
+            result = run_scrape_for_company(db_session, test_company)
+
+            mock_scraper.set_jobs([make_job(f"job-{i:03d}") for i in range(2, 9)])
+            second = run_scrape_for_company(db_session, test_company)
+
+        assert result["jobs_added"] == 7
+        assert second["jobs_added"] == 2
+        assert second["jobs_removed"] == 2
+        assert second["jobs_found"] == 7
+
+    def test_duplicate_external_ids_in_payload(
+        self, db_session, test_company, mock_scraper, make_job
+    ):
+        """A posting listed twice by the ATS should only be stored once."""
+        mock_scraper.set_jobs([make_job("job-001"), make_job("job-001")])
+
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            result = run_scrape_for_company(db_session, test_company)
+
+        assert result["status"] == "success"
+        assert result["jobs_added"] == 1
+        jobs = db_session.query(JobPosting).filter_by(company_id=test_company.id).all()
+        assert len(jobs) == 1
+
+
+class TestUnchangedBoards:
+    """Tests for payload fingerprinting and conditional fetches."""
+
+    def test_identical_payload_recorded_as_unchanged(
+        self, db_session, test_company, mock_scraper, make_job
+    ):
+        """Re-scraping an identical board should skip the delta."""
+        mock_scraper.set_jobs([make_job("job-001"), make_job("job-002")])
+
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            first = run_scrape_for_company(db_session, test_company)
+            second = run_scrape_for_company(db_session, test_company)
+
+        assert first["status"] == "success"
+        assert second["status"] == "unchanged"
+        assert second["jobs_found"] == 2
+        assert second["jobs_added"] == 0
+        assert second["jobs_removed"] == 0
+
+        runs = (
+            db_session.query(ScrapeRun)
+            .filter_by(company_id=test_company.id)
+            .order_by(ScrapeRun.started_at)
+            .all()
+        )
+        assert [r.status for r in runs] == ["success", "unchanged"]
+        assert runs[0].payload_hash == runs[1].payload_hash
+
+    def test_job_order_does_not_change_fingerprint(
+        self, db_session, test_company, mock_scraper, make_job
+    ):
+        """The ATS listing jobs in a different order is not a change."""
+        jobs = [make_job("job-001"), make_job("job-002")]
+        mock_scraper.set_jobs(jobs)
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            run_scrape_for_company(db_session, test_company)
+
+        mock_scraper.set_jobs(list(reversed(jobs)))
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            result = run_scrape_for_company(db_session, test_company)
+
+        assert result["status"] == "unchanged"
+
+    def test_not_modified_response_skips_delta(
+        self, db_session, test_company, make_job
+    ):
+        """A 304 from the ATS is recorded as unchanged and keeps the stored validators."""
+
+        class ConditionalScraper(MockScraper):
+            async def fetch_board(
+                self, identifier, client, etag=None, last_modified=None, known=None
+            ):
+                if etag == "v1":
+                    return FetchResult(jobs=[], etag=etag, not_modified=True)
+                return FetchResult(jobs=self._jobs, etag="v1")
+
+        scraper = ConditionalScraper([make_job("job-001")])
+
+        with patch("app.services.scraper.get_scraper", return_value=scraper):
+            first = run_scrape_for_company(db_session, test_company)
+            second = run_scrape_for_company(db_session, test_company)
+
+        assert first["status"] == "success"
+        assert second["status"] == "unchanged"
+        assert second["jobs_found"] == 1
+        assert test_company.ats_etag == "v1"
+
+        job = db_session.query(JobPosting).filter_by(external_id="job-001").first()
+        assert job.removed_at is None
+
+
+class PayloadScraper(MockScraper):
+    """Mock scraper that parses ATS-shaped job objects, so scrapes can be archived."""
+
+    def __init__(self, payload: list[dict]):
+        self.payload = payload
+
+    def fetch_jobs(self, identifier: str):
+        return [self._load_job(job) for job in self.payload]
+
+    def _parse_job(self, job: dict):
+        return make_raw_job(job["id"], job["title"])
+
+
+class TestPayloadArchive:
+    """Tests for archiving raw board payloads and replaying them offline."""
+
+    @pytest.fixture
+    def archive_dir(self, tmp_path):
+        with patch.object(settings, "scrape_archive_dir", str(tmp_path)):
+            yield tmp_path
+
+    def test_scrape_archives_snapshot(self, db_session, test_company, archive_dir):
+        """Each scrape links its run to a snapshot of what the ATS returned."""
+        payload = [{"id": "job-001", "title": "ML Engineer"}, {"id": "job-002", "title": "SRE"}]
+
+        with patch("app.services.scraper.get_scraper", return_value=PayloadScraper(payload)):
+            run_scrape_for_company(db_session, test_company)
+            run_scrape_for_company(db_session, test_company)
+
+        runs = db_session.query(ScrapeRun).filter_by(company_id=test_company.id).all()
+        archive = PayloadArchive(archive_dir)
+        snapshot_hash = runs[0].snapshot_hash
+
+        assert snapshot_hash is not None
+        # Identical boards share one content-addressed snapshot
+        assert {r.snapshot_hash for r in runs} == {snapshot_hash}
+        assert [e["job"] for e in archive.read(snapshot_hash)] == payload
+        assert archive.latest("greenhouse", "testcompany") == snapshot_hash
+
+    def test_replay_reruns_delta_offline(self, db_session, test_company, archive_dir):
+        """A replayed scrape rebuilds the board from the archive."""
+        payload = [{"id": "job-001", "title": "ML Engineer"}, {"id": "job-002", "title": "SRE"}]
+        with patch("app.services.scraper.get_scraper", return_value=PayloadScraper(payload)):
+            run_scrape_for_company(db_session, test_company)
+
+        # Wipe the scraped state so the replay runs a full delta
+        db_session.query(JobPosting).filter_by(company_id=test_company.id).delete()
+        test_company.payload_hash = None
+        db_session.commit()
+
+        replay = ReplayScraper(PayloadScraper([]), PayloadArchive(archive_dir), "greenhouse")
+        with patch("app.services.scraper.get_scraper", return_value=replay):
+            result = run_scrape_for_company(db_session, test_company)
+
+        assert result["status"] == "success"
+        assert result["jobs_added"] == 2
+        titles = {j.title_raw for j in db_session.query(JobPosting).filter_by(
+            company_id=test_company.id
+        )}
+        assert titles == {"ML Engineer", "SRE"}
+
+    def test_replay_without_snapshot_fails(self, db_session, test_company, archive_dir):
+        """Replaying a board that was never archived is a failed scrape."""
+        replay = ReplayScraper(PayloadScraper([]), PayloadArchive(archive_dir), "greenhouse")
+        with patch("app.services.scraper.get_scraper", return_value=replay):
+            result = run_scrape_for_company(db_session, test_company)
+
+        assert result["status"] == "failed"
+
+    def test_jobs_without_source_not_archived(
+        self, db_session, test_company, mock_scraper, make_job, archive_dir
+    ):
+        """Boards that weren't parsed from an ATS payload leave no partial snapshot."""
+        mock_scraper.set_jobs([make_job("job-001")])
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            run_scrape_for_company(db_session, test_company)
+
+        run = db_session.query(ScrapeRun).filter_by(company_id=test_company.id).one()
+        assert run.snapshot_hash is None
+        assert list((archive_dir / "tmp").iterdir()) == []
+
+    def test_replay_skips_listing_only_snapshots(self, db_session, test_company, archive_dir):
+        """An incremental scrape's snapshot can't rebuild the board, so replay passes it over."""
+        payload = [{"id": "job-001", "title": "ML Engineer"}, {"id": "job-002", "title": "SRE"}]
+        with patch("app.services.scraper.get_scraper", return_value=PayloadScraper(payload)):
+            run_scrape_for_company(db_session, test_company)
+        full_run = db_session.query(ScrapeRun).filter_by(company_id=test_company.id).one()
+        full_hash = full_run.snapshot_hash
+
+        # An incremental fetch carries unchanged postings over by fingerprint only
+        class ListingScraper(PayloadScraper):
+            def fetch_jobs(self, identifier):
+                jobs = super().fetch_jobs(identifier)
+                return [replace(job, content_hash="stored") for job in jobs]
+
+        with patch("app.services.scraper.get_scraper", return_value=ListingScraper(payload)):
+            run_scrape_for_company(db_session, test_company)
+
+        runs = db_session.query(ScrapeRun).filter_by(company_id=test_company.id).all()
+        listing_hash = ({r.snapshot_hash for r in runs} - {full_hash}).pop()
+        archive = PayloadArchive(archive_dir)
+        assert [e["content_hash"] for e in archive.read(listing_hash)] == ["stored", "stored"]
+        assert archive.latest("greenhouse", "testcompany") == full_hash
+
+    def test_discard_after_commit_is_noop(self, archive_dir):
+        """A snapshot already committed stays in the archive when the scrape then fails."""
+        archive = PayloadArchive(archive_dir)
+        writer = archive.writer()
+        job = make_raw_job("job-001")
+        job.source = {"id": "job-001"}
+        writer.write(job)
+        snapshot_hash = writer.commit("greenhouse", "testcompany")
+
+        writer.discard()
+
+        assert archive.path(snapshot_hash).exists()
+
+
+class TestContentChanges:
+    """Tests for per-posting content fingerprints."""
+
+    def test_edited_posting_rewritten_and_queued_for_normalization(
+        self, db_session, test_company, mock_scraper, make_job
+    ):
+        """An edited posting gets its raw fields updated and normalized_at cleared."""
+        mock_scraper.set_jobs([make_job("job-001", "ML Engineer")])
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            run_scrape_for_company(db_session, test_company)
+
+        job = db_session.query(JobPosting).filter_by(external_id="job-001").first()
+        job.normalized_at = datetime.utcnow()
+        db_session.commit()
+        original_hash = job.content_hash
+
+        mock_scraper.set_jobs([make_job("job-001", "Senior ML Engineer")])
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            result = run_scrape_for_company(db_session, test_company)
+
+        db_session.refresh(job)
+        assert result["jobs_added"] == 0
+        assert result["jobs_updated"] == 1
+        assert result["jobs_changed"] == 1
+        assert job.title_raw == "Senior ML Engineer"
+        assert job.content_hash != original_hash
+        assert job.normalized_at is None
+
+    def test_unedited_posting_keeps_normalization(
+        self, db_session, test_company, mock_scraper, make_job
+    ):
+        """A posting whose content is unchanged is not sent back to the normalizer."""
+        mock_scraper.set_jobs([make_job("job-001"), make_job("job-002")])
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            run_scrape_for_company(db_session, test_company)
+
+        job = db_session.query(JobPosting).filter_by(external_id="job-001").first()
+        job.normalized_at = datetime.utcnow()
+        db_session.commit()
+
+        # job-002 disappears, so the board changes but job-001 does not
+        mock_scraper.set_jobs([make_job("job-001")])
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            result = run_scrape_for_company(db_session, test_company)
+
+        db_session.refresh(job)
+        assert result["jobs_changed"] == 0
+        assert job.normalized_at is not None
+
+    def test_posting_gaining_structured_fields_keeps_normalization(
+        self, db_session, test_company, mock_scraper, make_job
+    ):
+        """A posting fingerprinted before structured fields counted is not renormalized."""
+        mock_scraper.set_jobs([make_job("job-001")])
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            run_scrape_for_company(db_session, test_company)
+
+        job = db_session.query(JobPosting).filter_by(external_id="job-001").first()
+        job.normalized_at = datetime.utcnow()
+        job.remote_policy = "onsite"
+        db_session.commit()
+        original_hash = job.content_hash
+
+        raw_job = make_job("job-001")
+        raw_job.remote_policy = "remote"
+        raw_job.salary_min, raw_job.salary_max = 150000, 200000
+        mock_scraper.set_jobs([raw_job])
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            run_scrape_for_company(db_session, test_company)
+
+        db_session.refresh(job)
+        assert job.content_hash != original_hash
+        assert job.normalized_at is not None
+        assert job.ats_remote_policy == job.remote_policy == "remote"
+        assert (job.salary_min, job.salary_max) == (150000, 200000)
+
+    def test_carried_over_posting_keeps_stored_content(
+        self, db_session, test_company, mock_scraper, make_job
+    ):
+        """A posting passed through by content hash alone does not blank its description."""
+        job_001 = make_job("job-001")
+        job_001.updated_at = datetime(2025, 1, 1)
+        mock_scraper.set_jobs([job_001])
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            run_scrape_for_company(db_session, test_company)
+
+        stored = db_session.query(JobPosting).filter_by(external_id="job-001").first()
+        carried = replace(
+            job_001,
+            description_html=None,
+            description_plain=None,
+            department=None,
+            content_hash=stored.content_hash,
+        )
+        mock_scraper.set_jobs([carried, make_job("job-002")])
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            result = run_scrape_for_company(db_session, test_company)
+
+        db_session.refresh(stored)
+        assert result["jobs_changed"] == 0
+        assert stored.description_html == job_001.description_html
+        assert stored.department_raw == "Engineering"
+
+
+class TestLastSeenTracking:
+    """Tests for run-level last-seen tracking."""
+
+    def test_rescrape_does_not_rewrite_fresh_last_seen(
+        self, db_session, test_company, mock_scraper, make_job
+    ):
+        """Still-open postings are confirmed by the company scrape, not per-row writes."""
+        mock_scraper.set_jobs([make_job("job-001")])
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            run_scrape_for_company(db_session, test_company)
+
+        job = db_session.query(JobPosting).filter_by(external_id="job-001").first()
+        stored_last_seen = job.last_seen_at
+
+        # Add a job so the board changes and the delta runs
+        mock_scraper.set_jobs([make_job("job-001"), make_job("job-002")])
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            run_scrape_for_company(db_session, test_company)
+
+        db_session.refresh(job)
+        db_session.refresh(test_company)
+        assert job.last_seen_at == stored_last_seen
+        assert job.last_confirmed_at == test_company.last_scraped_at
+
+    def test_stale_last_seen_refreshed(self, db_session, test_company, mock_scraper, make_job):
+        """The stored last_seen_at is still refreshed at a coarse interval."""
+        mock_scraper.set_jobs([make_job("job-001")])
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            run_scrape_for_company(db_session, test_company)
+
+        job = db_session.query(JobPosting).filter_by(external_id="job-001").first()
+        stale = datetime.utcnow() - timedelta(days=3)
+        job.last_seen_at = stale
+        db_session.commit()
+
+        mock_scraper.set_jobs([make_job("job-001"), make_job("job-002")])
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            run_scrape_for_company(db_session, test_company)
+
+        db_session.refresh(job)
+        assert job.last_seen_at > stale
+
+    def test_removal_settles_last_seen(self, db_session, test_company, mock_scraper, make_job):
+        """A removed posting keeps the time of the last scrape that saw it."""
+        mock_scraper.set_jobs([make_job("job-001"), make_job("job-002")])
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            run_scrape_for_company(db_session, test_company)
+            mock_scraper.set_jobs([make_job("job-001"), make_job("job-002"), make_job("job-003")])
+            run_scrape_for_company(db_session, test_company)
+
+        db_session.refresh(test_company)
+        confirmed_at = test_company.last_scraped_at
+
+        mock_scraper.set_jobs([make_job("job-001")])
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            run_scrape_for_company(db_session, test_company)
+
+        job = db_session.query(JobPosting).filter_by(external_id="job-002").first()
+        assert job.removed_at is not None
+        assert job.last_seen_at == confirmed_at
+        assert job.last_confirmed_at == confirmed_at
+
+
+class TestScrapeAll:
+    """Tests for the concurrent scrape-all engine."""
+
+    def test_all_companies_scraped(
+        self, db_session, test_company, another_company, mock_scraper, make_job
+    ):
+        """Every company gets its own delta and ScrapeRun."""
+        mock_scraper.set_jobs([make_job("job-001"), make_job("job-002")])
+
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            results = scrape_companies(db_session, [test_company, another_company])
+
+        by_slug = {r["company"]: r for r in results}
+        assert by_slug["test-company"]["jobs_added"] == 2
+        assert by_slug["another-company"]["jobs_added"] == 2
+
+        runs = db_session.query(ScrapeRun).filter_by(status="success").all()
+        assert {r.company_id for r in runs} == {test_company.id, another_company.id}
+
+    def test_failed_fetch_does_not_affect_other_companies(
+        self, db_session, test_company, another_company, make_job
+    ):
+        """A failing board is recorded as failed while the others still succeed."""
+
+        class FlakyScraper(MockScraper):
+            def fetch_jobs(self, identifier: str):
+                if identifier == "testcompany":
+                    raise RuntimeError("board unavailable")
+                return self._jobs
+
+        scraper = FlakyScraper([make_job("job-001")])
+
+        with patch("app.services.scraper.get_scraper", return_value=scraper):
+            results = scrape_companies(db_session, [test_company, another_company])
+
+        by_slug = {r["company"]: r for r in results}
+        assert by_slug["test-company"]["status"] == "failed"
+        assert "board unavailable" in by_slug["test-company"]["error"]
+        assert by_slug["another-company"]["jobs_added"] == 1
+
+        failed_run = db_session.query(ScrapeRun).filter_by(company_id=test_company.id).one()
+        assert failed_run.status == "failed"
+
+    def test_failed_write_does_not_affect_other_companies(
+        self, db_session, test_company, another_company, make_job
+    ):
+        """A board whose postings the database rejects fails alone."""
+
+        class OversizedScraper(MockScraper):
+            def fetch_jobs(self, identifier: str):
+                if identifier == "testcompany":
+                    return [replace(make_job("job-001"), location="x" * 300)]
+                return self._jobs
+
+        scraper = OversizedScraper([make_job("job-001")])
+
+        with patch("app.services.scraper.get_scraper", return_value=scraper):
+            results = scrape_companies(db_session, [test_company, another_company])
+
+        by_slug = {r["company"]: r for r in results}
+        assert by_slug["test-company"]["status"] == "failed"
+        assert by_slug["another-company"]["jobs_added"] == 1
+
+        failed_run = db_session.query(ScrapeRun).filter_by(company_id=test_company.id).one()
+        assert failed_run.status == "failed"
+        assert db_session.query(JobPosting).filter_by(company_id=test_company.id).count() == 0
+
+    def test_open_circuit_recorded_distinctly(
+        self, db_session, test_company, another_company, make_job
+    ):
+        """A board skipped by an open circuit breaker gets its own status."""
+
+        class DegradedScraper(MockScraper):
+            def fetch_jobs(self, identifier: str):
+                if identifier == "testcompany":
+                    raise CircuitOpenError("boards-api.greenhouse.io")
+                return self._jobs
+
+        scraper = DegradedScraper([make_job("job-001")])
+
+        with patch("app.services.scraper.get_scraper", return_value=scraper):
+            results = scrape_companies(db_session, [test_company, another_company])
+
+        by_slug = {r["company"]: r for r in results}
+        assert by_slug["test-company"]["status"] == "circuit_open"
+        assert by_slug["another-company"]["status"] == "success"
+
+        run = db_session.query(ScrapeRun).filter_by(company_id=test_company.id).one()
+        assert run.status == "circuit_open"
+
+    def test_company_locked_by_another_worker_skipped(
+        self, db_session, test_company, another_company, mock_scraper, make_job
+    ):
+        """A company another process is scraping is skipped, not scraped twice."""
+        mock_scraper.set_jobs([make_job("job-001")])
+
+        with CompanyLocks(db_session) as other_worker:
+            assert other_worker.try_acquire(test_company.id)
+
+            with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+                results = scrape_companies(db_session, [test_company, another_company])
+
+        by_slug = {r["company"]: r for r in results}
+        assert by_slug["test-company"]["status"] == "skipped"
+        assert by_slug["another-company"]["status"] == "success"
+        assert db_session.query(ScrapeRun).filter_by(company_id=test_company.id).count() == 0
+
+    def test_locks_released_after_scrape(self, db_session, test_company, mock_scraper, make_job):
+        """Once a scrape finishes, the company can be claimed again."""
+        mock_scraper.set_jobs([make_job("job-001")])
+        with patch("app.services.scraper.get_scraper", return_value=mock_scraper):
+            run_scrape_for_company(db_session, test_company)
+
+        with CompanyLocks(db_session) as locks:
+            assert locks.try_acquire(test_company.id)
+
+    def test_locks_held_without_open_transaction(self, db_session, test_company):
+        """The lock connection sits idle between statements, not idle in a transaction."""
+        with CompanyLocks(db_session) as locks:
+            assert locks.try_acquire(test_company.id)
+            pid = locks._conn.execute(select(func.pg_backend_pid())).scalar()
+
+            state = db_session.execute(
+                text("SELECT state FROM pg_stat_activity WHERE pid = :pid"), {"pid": pid}
+            ).scalar()
+
+        assert state == "idle"
@@ -102,6 +102,7 @@ deploy_backend() {
         --set-secrets "ADMIN_API_KEY=openroles-admin-key:latest" \
         --memory 512Mi \
         --cpu 1 \
+        --no-cpu-throttling \
         --min-instances 0 \
         --max-instances 10 \
         --timeout 900
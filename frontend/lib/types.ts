@@ -31,12 +31,16 @@ export interface Job {
   title_raw: string;
   normalized_title: string | null;
   location_raw: string | null;
+  location_cities?: string[] | null;
+  location_countries?: string[] | null;
+  location_remote?: boolean | null;
   function: string | null;
   seniority: string | null;
   team_area: string | null;
   remote_policy: string | null;
   job_url: string | null;
   first_seen_at: string;
+  last_seen_at: string;
   removed_at: string | null;
 }
 
@@ -6,6 +6,7 @@
 #   ./repopulate.sh reset     # Just wipe data (keep companies)
 #   ./repopulate.sh scrape    # Scrape all companies
 #   ./repopulate.sh normalize # Normalize all jobs
+#   ./repopulate.sh normalize-batch # Normalize all jobs via the Batch API (cheap, up to 24h)
 #   ./repopulate.sh synthesize # Run synthesis
 #
 # Note: Backend must be running on port 8100
@@ -49,6 +50,33 @@ call_api() {
 
     echo "$response" | python3 -m json.tool 2>/dev/null || echo "$response"
     echo ""
+
+    # Long pipelines run as background jobs - wait for them to finish
+    local job_id
+    job_id=$(echo "$response" | python3 -c 'import json,sys; print(json.load(sys.stdin).get("job_id", ""))' 2>/dev/null || true)
+    if [ -n "$job_id" ]; then
+        wait_for_job "$job_id"
+    fi
+}
+
+wait_for_job() {
+    local job_id=$1
+    local status=""
+
+    while true; do
+        job=$(curl -s "$API_URL/jobs/$job_id" -H "X-API-Key: $ADMIN_API_KEY")
+        status=$(echo "$job" | python3 -c 'import json,sys; print(json.load(sys.stdin)["status"])')
+        if [ "$status" = "succeeded" ] || [ "$status" = "failed" ]; then
+            break
+        fi
+        progress=$(echo "$job" | python3 -c 'import json,sys; print(json.load(sys.stdin).get("progress") or "")')
+        echo "    $status $progress"
+        sleep 5
+    done
+
+    echo "$job" | python3 -m json.tool
+    echo ""
+    [ "$status" = "succeeded" ]
 }
 
 case "${1:-full}" in
@@ -62,10 +90,12 @@ case "${1:-full}" in
         echo ""
         echo "==> Normalizing all jobs (this takes a while)..."
         echo ""
-        # Use normalize-all endpoint which loops until done
-        curl -s -X POST "$API_URL/normalize-all?batch_size=50" \
-            -H "X-API-Key: $ADMIN_API_KEY" \
-            -H "Content-Type: application/json" | python3 -m json.tool
+        # normalize-all runs as a background job that streams until done
+        call_api "normalize-all" "Queueing normalization"
+        ;;
+    normalize-batch)
+        # Waits on the provider's batch queue, so this can take hours
+        call_api "normalize-batch" "Queueing batch normalization"
         ;;
     synthesize)
         call_api "synthesize-all?force=true" "Running synthesis (force regenerate)"
@@ -99,6 +129,7 @@ case "${1:-full}" in
         echo "  reset             Wipe all job data (keeps companies)"
         echo "  scrape            Scrape all companies"
         echo "  normalize         Normalize all pending jobs"
+        echo "  normalize-batch   Normalize all pending jobs via the Batch API (cheap, up to 24h)"
         echo "  synthesize        Run synthesis (force regenerate)"
         echo "  help              Show this help"
         ;;